@@ -0,0 +1,317 @@
+"""
+Audio decoding layer working on in-memory buffers.
+
+``decode_audio_bytes`` and ``decode_audio_file`` return 16 kHz mono float32
+numpy arrays that every backend in ``transcription.py`` accepts directly.
+WAV is parsed in-process; everything else is piped through ffmpeg
+(stdin -> stdout) without writing intermediate files.
+
+``FFmpegStreamDecoder`` keeps one ffmpeg process alive per connection and
+decodes a continuous container stream (e.g. MediaRecorder WebM/Opus)
+incrementally: every incoming fragment is written to ffmpeg's stdin exactly
+once and only the newly produced 16 kHz mono s16le PCM is handed to the
+consumer. Decode cost is therefore linear in audio duration instead of
+re-decoding the whole session buffer on every chunk.
+"""
+
+import io
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import wave
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+# Größe der Lese-Blöcke aus ffmpegs stdout (Bytes)
+PCM_READ_SIZE = 8192
+# Ziel-Samplerate aller Backends
+TARGET_SAMPLE_RATE = 16000
+# Zeitlimit für einmalige ffmpeg-Dekodierungen (Sekunden)
+FFMPEG_DECODE_TIMEOUT = 60
+# Eingabeformate, die nacheinander probiert werden, wenn die Erkennung scheitert
+FALLBACK_INPUT_FORMATS = ('webm', 'ogg', 'matroska')
+
+
+class AudioDecodeError(ValueError):
+    """Raised when audio data cannot be decoded by any available method."""
+
+
+class FFmpegStreamDecoder:
+    """
+    Long-lived ffmpeg pipe (stdin -> stdout s16le) for one audio stream.
+
+    ``feed()`` never blocks the caller: fragments are queued and written by a
+    writer thread, decoded PCM is read by a reader thread and passed to
+    ``on_pcm`` in sample-aligned blocks.
+    """
+
+    def __init__(self, on_pcm: Callable[[bytes], None], input_format: str = "webm",
+                 sample_rate: int = 16000, name: str = ""):
+        self.on_pcm = on_pcm
+        self.input_format = input_format
+        self.sample_rate = sample_rate
+        self.name = name
+        self.process: Optional[subprocess.Popen] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._input_queue: queue.Queue = queue.Queue()
+        self._writer_thread = None
+        self._reader_thread = None
+
+    def _command(self) -> list:
+        return [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin',
+            '-fflags', '+nobuffer+genpts',
+            '-probesize', '4096',
+            '-analyzeduration', '100000',
+            '-f', self.input_format, '-i', 'pipe:0',
+            '-ar', str(self.sample_rate),
+            '-ac', '1',
+            '-f', 's16le',
+            '-flush_packets', '1',
+            'pipe:1'
+        ]
+
+    def start(self):
+        """Spawn the ffmpeg process and its I/O threads."""
+        if self.process is not None:
+            return
+
+        self.process = subprocess.Popen(
+            self._command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+        self._writer_thread = threading.Thread(
+            target=self._writer, name=f"ffmpeg-writer-{self.name}", daemon=True
+        )
+        self._reader_thread = threading.Thread(
+            target=self._reader, name=f"ffmpeg-reader-{self.name}", daemon=True
+        )
+        self._writer_thread.start()
+        self._reader_thread.start()
+        print(f"FFmpeg stream decoder started for {self.name} (pid {self.process.pid})")
+
+    @property
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def feed(self, data: bytes):
+        """Queue a container fragment for decoding."""
+        if not data:
+            return
+        self.bytes_in += len(data)
+        self._input_queue.put(data)
+
+    def _writer(self):
+        stdin = self.process.stdin
+        try:
+            while True:
+                data = self._input_queue.get()
+                if data is None:
+                    break
+                stdin.write(data)
+        except (BrokenPipeError, OSError) as e:
+            print(f"FFmpeg decoder input closed for {self.name}: {e}")
+        finally:
+            try:
+                stdin.close()
+            except OSError:
+                pass
+
+    def _reader(self):
+        stdout = self.process.stdout
+        remainder = b''
+        try:
+            while True:
+                data = stdout.read(PCM_READ_SIZE)
+                if not data:
+                    break
+                if remainder:
+                    data = remainder + data
+                # Nur vollständige 16-bit Samples weitergeben
+                aligned = len(data) - (len(data) % 2)
+                remainder = data[aligned:]
+                if aligned:
+                    self.bytes_out += aligned
+                    try:
+                        self.on_pcm(data[:aligned])
+                    except Exception as e:
+                        print(f"Error in PCM consumer for {self.name}: {e}")
+        except (OSError, ValueError) as e:
+            print(f"FFmpeg decoder output closed for {self.name}: {e}")
+
+    def close(self, timeout: float = 2.0):
+        """
+        Finish decoding: close stdin, let ffmpeg flush the remaining PCM and stop it.
+        """
+        if self.process is None:
+            return
+
+        self._input_queue.put(None)
+        if self._writer_thread:
+            self._writer_thread.join(timeout=timeout)
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        if self._reader_thread:
+            self._reader_thread.join(timeout=timeout)
+
+        print(f"FFmpeg stream decoder for {self.name} closed "
+              f"(exit {self.process.returncode}, {self.bytes_in} bytes in, {self.bytes_out} bytes PCM out)")
+        self.process = None
+
+
+def wav_bytes_to_pcm(data: bytes) -> Tuple[bytes, int]:
+    """
+    Extract 16-bit mono PCM frames from an in-memory WAV file.
+
+    Returns:
+        Tuple of (PCM bytes, sample rate)
+
+    Raises:
+        ValueError: if the data is not a 16-bit mono WAV file
+    """
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wav_file:
+            if wav_file.getnchannels() != 1 or wav_file.getsampwidth() != 2:
+                raise ValueError(
+                    f"Expected 16-bit mono WAV, got {wav_file.getnchannels()} channels "
+                    f"with {wav_file.getsampwidth()} bytes/sample"
+                )
+            return wav_file.readframes(wav_file.getnframes()), wav_file.getframerate()
+    except wave.Error as e:
+        raise ValueError(f"Invalid WAV data: {e}")
+
+
+def pcm_to_float32(data: bytes, sample_format: str = "s16le") -> np.ndarray:
+    """
+    Interpret raw mono PCM bytes as a float32 array in [-1, 1].
+
+    Args:
+        data: Raw PCM bytes
+        sample_format: "s16le" (16-bit signed) or "f32le" (32-bit float)
+    """
+    if sample_format == "s16le":
+        return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    if sample_format == "f32le":
+        return np.frombuffer(data, dtype="<f4").astype(np.float32, copy=False)
+    raise ValueError(f"Unsupported PCM sample format: {sample_format}")
+
+
+def float32_to_pcm16(audio: np.ndarray) -> bytes:
+    """Convert a float32 array in [-1, 1] to 16-bit little-endian PCM bytes."""
+    return (np.clip(audio, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+def _resample_linear(audio: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Cheap linear resampling for the in-process WAV path."""
+    if source_rate == target_rate or len(audio) == 0:
+        return audio
+    target_length = int(round(len(audio) * target_rate / source_rate))
+    positions = np.linspace(0, len(audio) - 1, target_length)
+    return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+
+def _decode_wav_in_memory(data: bytes, sample_rate: int) -> Optional[np.ndarray]:
+    """Decode 16-bit PCM WAV without any subprocess; None if the WAV needs ffmpeg."""
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wav_file:
+            if wav_file.getsampwidth() != 2:
+                return None
+            channels = wav_file.getnchannels()
+            source_rate = wav_file.getframerate()
+            frames = wav_file.readframes(wav_file.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+    audio = pcm_to_float32(frames[:len(frames) - len(frames) % (2 * channels)])
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    return _resample_linear(audio, source_rate, sample_rate)
+
+
+def _ffmpeg_decode(input_args: list, data: Optional[bytes], sample_rate: int) -> np.ndarray:
+    cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin',
+        '-fflags', '+genpts+igndts', '-err_detect', 'ignore_err',
+        *input_args,
+        '-ar', str(sample_rate), '-ac', '1', '-f', 'f32le', 'pipe:1'
+    ]
+    result = subprocess.run(cmd, input=data, capture_output=True, timeout=FFMPEG_DECODE_TIMEOUT)
+    if result.returncode != 0 or not result.stdout:
+        raise AudioDecodeError(result.stderr.decode(errors='replace').strip() or "ffmpeg produced no audio")
+    usable = len(result.stdout) - len(result.stdout) % 4
+    return np.frombuffer(result.stdout[:usable], dtype='<f4').copy()
+
+
+def decode_audio_bytes(data: bytes, sample_rate: int = TARGET_SAMPLE_RATE,
+                       input_format: Optional[str] = None) -> np.ndarray:
+    """
+    Decode an in-memory audio file (WAV, WebM/Opus, Ogg, MP3, ...) to mono float32.
+
+    Args:
+        data: Complete encoded audio
+        sample_rate: Target sample rate
+        input_format: Optional ffmpeg input format to skip container detection
+
+    Raises:
+        AudioDecodeError: if no method can decode the data
+    """
+    if not data:
+        raise AudioDecodeError("Empty audio data")
+
+    if data.startswith(b'RIFF') and input_format in (None, 'wav'):
+        audio = _decode_wav_in_memory(data, sample_rate)
+        if audio is not None:
+            return audio
+
+    errors = []
+    candidates = [input_format] if input_format else [None, *FALLBACK_INPUT_FORMATS]
+    for candidate in candidates:
+        input_args = (['-f', candidate] if candidate else []) + ['-i', 'pipe:0']
+        try:
+            return _ffmpeg_decode(input_args, data, sample_rate)
+        except (AudioDecodeError, subprocess.TimeoutExpired, OSError) as e:
+            errors.append(f"{candidate or 'auto'}: {e}")
+
+    # Container, die Seeking brauchen (z.B. MP4 mit moov-Atom am Ende), lassen sich
+    # nicht über eine Pipe lesen - nur dann einmalig über eine Datei dekodieren
+    if input_format is None:
+        with tempfile.NamedTemporaryFile(suffix='.audio', delete=False) as tmp:
+            tmp.write(data)
+            temp_path = tmp.name
+        try:
+            return decode_audio_file(temp_path, sample_rate)
+        except AudioDecodeError as e:
+            errors.append(f"seekable: {e}")
+        finally:
+            os.unlink(temp_path)
+
+    raise AudioDecodeError(f"Could not decode {len(data)} bytes of audio ({'; '.join(errors)})")
+
+
+def decode_audio_file(audio_path: str, sample_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode an audio file on disk to mono float32 without intermediate files.
+
+    Raises:
+        AudioDecodeError: if the file cannot be decoded
+    """
+    if audio_path.lower().endswith('.wav'):
+        with open(audio_path, 'rb') as f:
+            audio = _decode_wav_in_memory(f.read(), sample_rate)
+        if audio is not None:
+            return audio
+
+    try:
+        return _ffmpeg_decode(['-i', audio_path], None, sample_rate)
+    except (subprocess.TimeoutExpired, OSError) as e:
+        raise AudioDecodeError(f"Could not decode {audio_path}: {e}")
@@ -0,0 +1,131 @@
+"""
+WebSocket audio protocol for the live transcription endpoints.
+
+Protocol version 1 (legacy) sends audio as base64 inside JSON text frames:
+``{"type": "audio_chunk", "audio": "<base64>", ...}``.
+
+Protocol version 2 sends audio as binary WebSocket frames with a compact,
+fixed 16-byte little-endian header followed by the raw payload:
+
+    offset  size  field
+    0       2     magic b"AS"
+    2       1     protocol version (2)
+    3       1     codec (see CODEC_*)
+    4       4     session id (uint32, chosen by the client)
+    8       4     chunk id (uint32, increasing per session)
+    12      4     sample rate in Hz (uint32, 0 for self-describing containers)
+
+Control messages (hello, ping, stop_stream, ...) stay JSON text frames, so
+both versions can be mixed on one connection and old clients keep working.
+"""
+
+import base64
+import json
+import struct
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+AUDIO_FRAME_MAGIC = b"AS"
+AUDIO_PROTOCOL_VERSION = 2
+AUDIO_FRAME_HEADER = struct.Struct("<2sBBIII")
+
+# Codec-IDs im Binär-Header
+CODEC_WEBM = 1        # MediaRecorder WebM/Opus
+CODEC_WAV = 2         # Vollständige WAV-Datei
+CODEC_PCM_S16LE = 3   # Rohes 16-bit PCM, mono
+CODEC_PCM_F32LE = 4   # Rohes float32 PCM, mono
+
+CODEC_NAMES = {
+    CODEC_WEBM: "webm",
+    CODEC_WAV: "wav",
+    CODEC_PCM_S16LE: "pcm_s16le",
+    CODEC_PCM_F32LE: "pcm_f32le",
+}
+
+
+class AudioFrame(NamedTuple):
+    """One decoded audio message, independent of the protocol version it arrived with."""
+    session_id: int
+    chunk_id: int
+    codec: int
+    sample_rate: int
+    payload: bytes
+
+
+def parse_audio_frame(data: bytes) -> AudioFrame:
+    """
+    Parse a binary protocol-2 audio frame.
+
+    Raises:
+        ValueError: if the frame is too short or has a wrong magic/version
+    """
+    if len(data) < AUDIO_FRAME_HEADER.size:
+        raise ValueError(f"Audio frame too short ({len(data)} bytes)")
+
+    magic, version, codec, session_id, chunk_id, sample_rate = AUDIO_FRAME_HEADER.unpack_from(data)
+    if magic != AUDIO_FRAME_MAGIC:
+        raise ValueError(f"Invalid audio frame magic {magic!r}")
+    if version != AUDIO_PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported audio protocol version {version}")
+    if codec not in CODEC_NAMES:
+        raise ValueError(f"Unknown audio codec id {codec}")
+
+    return AudioFrame(session_id, chunk_id, codec, sample_rate, data[AUDIO_FRAME_HEADER.size:])
+
+
+def encode_audio_frame(payload: bytes, codec: int, session_id: int = 0,
+                       chunk_id: int = 0, sample_rate: int = 0) -> bytes:
+    """Build a binary protocol-2 audio frame (used by test clients)."""
+    header = AUDIO_FRAME_HEADER.pack(
+        AUDIO_FRAME_MAGIC, AUDIO_PROTOCOL_VERSION, codec,
+        session_id & 0xFFFFFFFF, chunk_id & 0xFFFFFFFF, sample_rate
+    )
+    return header + bytes(payload)
+
+
+def legacy_audio_frame(data: Dict[str, Any]) -> AudioFrame:
+    """
+    Wrap a protocol-1 ``audio_chunk`` JSON message as an ``AudioFrame``.
+
+    Protocol 1 carries no codec field, so WAV is recognised by its RIFF
+    header and everything else is treated as WebM.
+    """
+    payload = base64.b64decode(data["audio"])
+    codec = CODEC_WAV if payload.startswith(b"RIFF") else CODEC_WEBM
+    return AudioFrame(0, 0, codec, 0, payload)
+
+
+async def receive_client_message(websocket: WebSocket, raw_codec: Optional[int] = None,
+                                 raw_sample_rate: int = 0) -> Tuple[Optional[Dict[str, Any]], Optional[AudioFrame]]:
+    """
+    Receive the next client message in either protocol version.
+
+    Args:
+        websocket: The client connection
+        raw_codec: If set, binary messages carry no header and are raw
+            payloads of this codec (declared once by the client up front)
+        raw_sample_rate: Sample rate reported for headerless payloads
+
+    Returns:
+        ``(control, None)`` for JSON text frames (including legacy
+        ``audio_chunk`` messages) or ``(None, frame)`` for binary audio frames.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+
+    if message.get("bytes") is not None:
+        if raw_codec is not None:
+            return None, AudioFrame(0, 0, raw_codec, raw_sample_rate, message["bytes"])
+        return None, parse_audio_frame(message["bytes"])
+    return json.loads(message["text"]), None
+
+
+def hello_response(codecs: Tuple[int, ...]) -> Dict[str, Any]:
+    """Server answer to a client ``hello`` announcing the supported protocol and codecs."""
+    return {
+        "type": "hello",
+        "protocol": AUDIO_PROTOCOL_VERSION,
+        "codecs": [CODEC_NAMES[codec] for codec in codecs],
+    }
@@ -0,0 +1,93 @@
+"""
+Dynamic micro-batching across concurrent requests.
+
+Model calls have a large fixed cost per forward pass. ``DynamicBatcher``
+collects items submitted by concurrent callers (inference executor threads)
+for up to ``max_wait_ms`` or until ``max_batch_size`` items are waiting, runs
+them through ``batch_fn`` in a single call and hands every caller its own
+result. Callers block until their items are done, so the batcher can be used
+from the existing synchronous inference code unchanged.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Sequence
+
+from backend.metrics import get_metrics
+
+
+class DynamicBatcher:
+    """
+    Groups single items from many threads into batched calls of ``batch_fn``.
+
+    ``batch_fn`` receives a list of items and must return a list of results
+    in the same order.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 8, max_wait_ms: float = 10.0):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name=f"batcher-{self.name}", daemon=True)
+                self._thread.start()
+
+    def submit_many(self, items: Sequence[Any]) -> List[Any]:
+        """Queue ``items`` and block until all of their results are available."""
+        if not items:
+            return []
+        self._ensure_worker()
+        futures = []
+        for item in items:
+            future = Future()
+            self._queue.put((item, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def submit(self, item: Any) -> Any:
+        """Queue one item and block until its result is available."""
+        return self.submit_many([item])[0]
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self):
+        metrics = get_metrics()
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"{self.name}: batch_fn returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                metrics.increment(f"batching.{self.name}.errors")
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            metrics.increment(f"batching.{self.name}.batches")
+            metrics.increment(f"batching.{self.name}.items", len(items))
+            metrics.observe(f"batching.{self.name}.batch_seconds", time.perf_counter() - start)
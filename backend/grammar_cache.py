@@ -0,0 +1,137 @@
+"""
+Sentence-level cache for grammar corrections.
+
+Medical dictation repeats template sentences ("Patient in gutem
+Allgemeinzustand", standard findings) constantly. Corrections are cached per
+normalized input sentence, in an in-memory LRU and optionally in a SQLite
+file that survives restarts. Entries are versioned by the grammar model, so
+switching the model never returns corrections made by the old one.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from backend.metrics import get_metrics
+from backend.result_cache import LRUCache
+
+# === Konfiguration ===
+GRAMMAR_CACHE_ENTRIES = int(os.environ.get("ASR_GRAMMAR_CACHE_ENTRIES", "50000"))
+# SQLite-Datei für die Persistenz (leer = nur im Speicher)
+GRAMMAR_CACHE_DB = os.environ.get("ASR_GRAMMAR_CACHE_DB", "cache/grammar_cache.sqlite")
+GRAMMAR_CACHE_DB_MAX_ROWS = int(os.environ.get("ASR_GRAMMAR_CACHE_DB_ROWS", "500000"))
+# Wie oft (in Schreibvorgängen) die Datenbank auf GRAMMAR_CACHE_DB_MAX_ROWS gekürzt wird
+GRAMMAR_CACHE_PRUNE_INTERVAL = 1000
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Cache key for a sentence: whitespace collapsed and stripped."""
+    return " ".join(sentence.split())
+
+
+class GrammarCache:
+    """Memory LRU in front of an optional SQLite table, keyed by (model version, sentence)."""
+
+    def __init__(self, version: str, max_entries: int = GRAMMAR_CACHE_ENTRIES,
+                 db_path: str = GRAMMAR_CACHE_DB, max_db_rows: int = GRAMMAR_CACHE_DB_MAX_ROWS):
+        self.version = version
+        self.memory = LRUCache(max_entries)
+        self.max_db_rows = max_db_rows
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS grammar_cache ("
+                    "version TEXT NOT NULL, sentence TEXT NOT NULL, corrected TEXT NOT NULL, "
+                    "last_used REAL NOT NULL, PRIMARY KEY (version, sentence))"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS grammar_cache_last_used ON grammar_cache (last_used)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"Grammar cache database {db_path} unavailable, using memory only: {e}")
+                self._db = None
+
+    def get_many(self, sentences: List[str]) -> Dict[str, str]:
+        """Look up normalized sentences; returns only the ones found."""
+        found = {}
+        missing = []
+        for sentence in sentences:
+            corrected = self.memory.get(sentence)
+            if corrected is not None:
+                found[sentence] = corrected
+            else:
+                missing.append(sentence)
+
+        metrics = get_metrics()
+        metrics.increment("grammar_cache.hits.memory", len(found))
+        if missing and self._db is not None:
+            with self._db_lock:
+                rows = []
+                for sentence in missing:
+                    row = self._db.execute(
+                        "SELECT corrected FROM grammar_cache WHERE version = ? AND sentence = ?",
+                        (self.version, sentence)
+                    ).fetchone()
+                    if row is not None:
+                        rows.append((sentence, row[0]))
+                if rows:
+                    self._db.executemany(
+                        "UPDATE grammar_cache SET last_used = ? WHERE version = ? AND sentence = ?",
+                        [(time.time(), self.version, sentence) for sentence, _ in rows]
+                    )
+                    self._db.commit()
+            for sentence, corrected in rows:
+                self.memory.put(sentence, corrected)
+                found[sentence] = corrected
+            metrics.increment("grammar_cache.hits.disk", len(rows))
+        metrics.increment("grammar_cache.misses", len(sentences) - len(found))
+        return found
+
+    def put_many(self, corrections: Dict[str, str]):
+        """Store corrections of normalized sentences."""
+        if not corrections:
+            return
+        for sentence, corrected in corrections.items():
+            self.memory.put(sentence, corrected)
+        if self._db is None:
+            return
+        now = time.time()
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO grammar_cache (version, sentence, corrected, last_used) VALUES (?, ?, ?, ?)",
+                [(self.version, sentence, corrected, now) for sentence, corrected in corrections.items()]
+            )
+            self._writes += len(corrections)
+            if self._writes >= GRAMMAR_CACHE_PRUNE_INTERVAL:
+                self._writes = 0
+                # Älteste Einträge (auch anderer Modellversionen) über dem Limit löschen
+                self._db.execute(
+                    "DELETE FROM grammar_cache WHERE rowid IN ("
+                    "SELECT rowid FROM grammar_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_db_rows,)
+                )
+            self._db.commit()
+
+    def stats(self) -> Dict[str, object]:
+        """Entries and hit rate, for sizing the cache."""
+        metrics = get_metrics()
+        hits = metrics.counter("grammar_cache.hits.memory") + metrics.counter("grammar_cache.hits.disk")
+        total = hits + metrics.counter("grammar_cache.misses")
+        db_rows = None
+        if self._db is not None:
+            with self._db_lock:
+                db_rows = self._db.execute(
+                    "SELECT COUNT(*) FROM grammar_cache WHERE version = ?", (self.version,)
+                ).fetchone()[0]
+        return {
+            "version": self.version,
+            "memory_entries": len(self.memory),
+            "db_entries": db_rows,
+            "hit_rate": round(hits / total, 3) if total else None,
+        }
@@ -0,0 +1,193 @@
+"""
+Dedicated inference executors for the ASR backends.
+
+Model inference is synchronous and CPU/GPU-bound. Running it directly inside
+an ``async`` endpoint blocks the event loop, so every other request, ping and
+WebSocket frame on the worker stalls. Each backend therefore gets its own
+bounded thread pool: a fixed number of workers plus a bounded wait queue.
+When both are full, new work is rejected immediately with
+``InferenceBusyError`` so the API can answer with 429 / "busy" instead of
+piling up latency.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# === Konfiguration ===
+# Worker pro Backend und maximale Anzahl wartender Aufträge (über ENV überschreibbar).
+# Whisper- und MultiMed-Chunks gleichzeitiger Worker werden im DynamicBatcher zu einem
+# Forward-Pass zusammengefasst, daher mehrere Worker für diese Backends. Alle übrigen
+# Aufrufe auf dasselbe Modell serialisiert registry.use(..., exclusive=True)
+INFERENCE_WORKERS = {
+    "whisper": int(os.environ.get("ASR_WORKERS_WHISPER", "4")),
+    "speechbrain": int(os.environ.get("ASR_WORKERS_SPEECHBRAIN", "1")),
+    "multimed": int(os.environ.get("ASR_WORKERS_MULTIMED", "4")),
+    "vosk": int(os.environ.get("ASR_WORKERS_VOSK", "2")),
+}
+INFERENCE_QUEUE_SIZE = {
+    "whisper": int(os.environ.get("ASR_QUEUE_WHISPER", "4")),
+    "speechbrain": int(os.environ.get("ASR_QUEUE_SPEECHBRAIN", "4")),
+    "multimed": int(os.environ.get("ASR_QUEUE_MULTIMED", "4")),
+    "vosk": int(os.environ.get("ASR_QUEUE_VOSK", "8")),
+}
+# Backend jedes Modells aus /api/models
+MODEL_BACKENDS = {
+    "Whisper tiny": "whisper",
+    "Whisper base": "whisper",
+    "Whisper medium": "whisper",
+    "Whisper large-v3": "whisper",
+    "SpeechBrain CRDNN": "speechbrain",
+    "MultiMed Whisper": "multimed",
+    "Vosk German": "vosk",
+}
+# Vorgeschlagene Wartezeit für Clients bei 429-Antworten
+INFERENCE_RETRY_AFTER_SECONDS = 2
+
+
+class InferenceBusyError(Exception):
+    """Raised when an inference executor has no free worker and no free queue slot."""
+
+    def __init__(self, backend: str, retry_after: int = INFERENCE_RETRY_AFTER_SECONDS):
+        super().__init__(f"Inference backend '{backend}' is busy")
+        self.backend = backend
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for one inference backend.
+
+    At most ``max_workers`` jobs run concurrently and at most ``queue_size``
+    further jobs wait for a worker. Everything beyond that is rejected.
+    """
+
+    def __init__(self, backend: str, max_workers: int, queue_size: int):
+        self.backend = backend
+        self.max_workers = max(1, max_workers)
+        self.queue_size = max(0, queue_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"inference-{backend}"
+        )
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_size)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    def _run(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        with self._lock:
+            self._pending -= 1
+            self._running += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._busy_seconds += elapsed
+            self._slots.release()
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` on this backend's pool without blocking the event loop.
+
+        Raises:
+            InferenceBusyError: if all workers and queue slots are taken
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise InferenceBusyError(self.backend)
+
+        with self._lock:
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(self._run, fn, args, kwargs)
+        except RuntimeError:
+            # Executor wurde bereits heruntergefahren
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+            raise
+
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the executor's load counters."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_size": self.queue_size,
+                "running": self._running,
+                "queued": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "busy_seconds": round(self._busy_seconds, 3),
+            }
+
+    def shutdown(self):
+        """Stop accepting work and wait for running jobs to finish."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def backend_for_model(model_name: str) -> str:
+    """
+    Map a UI model name (e.g. "Whisper base") to its inference backend.
+
+    Raises:
+        ValueError: for unknown model names (they must not count against another backend)
+    """
+    backend = MODEL_BACKENDS.get(model_name)
+    if backend is None:
+        raise ValueError(f"Unknown model '{model_name}'")
+    return backend
+
+
+# Global instances for reuse
+_executors: Dict[str, InferenceExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_inference_executor(backend: str) -> InferenceExecutor:
+    """Get or create the executor for an inference backend."""
+    with _executors_lock:
+        executor = _executors.get(backend)
+        if executor is None:
+            executor = InferenceExecutor(
+                backend,
+                INFERENCE_WORKERS.get(backend, 1),
+                INFERENCE_QUEUE_SIZE.get(backend, 4)
+            )
+            _executors[backend] = executor
+        return executor
+
+
+async def run_inference(model_name: str, fn: Callable, *args, **kwargs) -> Any:
+    """Run ``fn`` on the executor responsible for ``model_name``."""
+    executor = get_inference_executor(backend_for_model(model_name))
+    return await executor.run(fn, *args, **kwargs)
+
+
+def get_inference_stats() -> Dict[str, Dict[str, Any]]:
+    """Load counters of all executors that have been used so far."""
+    with _executors_lock:
+        return {name: executor.stats() for name, executor in _executors.items()}
+
+
+def shutdown_inference_executors():
+    """Shut down all inference executors (used on application shutdown)."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
@@ -0,0 +1,323 @@
+"""
+Asynchronous transcription jobs.
+
+A long upload used to hold its HTTP connection open for the whole
+inference, which breaks behind proxies (Caddy timeouts) and is lost when
+the client disconnects. Jobs decouple the two: the upload is stored on disk,
+a row in a SQLite job store tracks status, priority and progress, and a
+fixed pool of worker threads pulls jobs from the store (highest priority
+first, then oldest). Throughput is therefore set by the worker count, not by
+how many browsers are open. Results are kept for ``JOB_RETENTION_SECONDS``
+and jobs survive a server restart.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.metrics import get_metrics
+
+# === Konfiguration ===
+JOB_DB = os.environ.get("ASR_JOB_DB", "cache/jobs.sqlite")
+# Hochgeladene Audiodaten wartender Jobs
+JOB_AUDIO_DIR = os.environ.get("ASR_JOB_AUDIO_DIR", "cache/jobs")
+JOB_WORKERS = int(os.environ.get("ASR_JOB_WORKERS", "2"))
+# Maximal wartende Jobs, darüber werden neue mit 429 abgelehnt
+JOB_MAX_QUEUED = int(os.environ.get("ASR_JOB_MAX_QUEUED", "100"))
+# Wie lange fertige Jobs (und ihre Ergebnisse) abrufbar bleiben
+JOB_RETENTION_SECONDS = float(os.environ.get("ASR_JOB_RETENTION", str(24 * 3600)))
+# Wie oft abgelaufene Jobs gelöscht werden
+JOB_PURGE_INTERVAL = 60.0
+# Beim Öffnen laufende Jobs neu einreihen (aus, wenn mehrere Worker-Prozesse die Datenbank teilen)
+JOB_REQUEUE_ON_START = os.environ.get("ASR_JOB_REQUEUE", "1") != "0"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when its cancellation was requested."""
+
+
+class JobQueueFull(Exception):
+    """Raised by ``submit`` when ``JOB_MAX_QUEUED`` jobs are already waiting."""
+
+
+class JobStore:
+    """
+    SQLite table of jobs plus the uploaded audio files of unfinished jobs.
+
+    Several worker processes may share one store (``run.py --prod``); jobs
+    are claimed with a conditional update, so each job runs exactly once.
+    """
+
+    def __init__(self, db_path: str = JOB_DB, audio_dir: str = JOB_AUDIO_DIR,
+                 requeue: bool = JOB_REQUEUE_ON_START):
+        self.audio_dir = audio_dir
+        os.makedirs(audio_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30.0)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        # WAL: Leser in anderen Prozessen blockieren keine Schreiber
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, model_name TEXT NOT NULL, priority INTEGER NOT NULL, "
+            "status TEXT NOT NULL, progress REAL NOT NULL, stage TEXT, "
+            "created REAL NOT NULL, started REAL, finished REAL, "
+            "cancel_requested INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, created)")
+        self._db.commit()
+        if requeue:
+            self.requeue_interrupted()
+
+    def requeue_interrupted(self) -> int:
+        """Requeue jobs that were running when the server last stopped."""
+        with self._lock:
+            requeued = self._db.execute(
+                "UPDATE jobs SET status = ?, progress = 0, stage = NULL, started = NULL WHERE status = ?",
+                (JOB_QUEUED, JOB_RUNNING)
+            ).rowcount
+            self._db.commit()
+        if requeued:
+            print(f"Job store: {requeued} interrupted jobs requeued")
+        return requeued
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def audio_path(self, job_id: str) -> str:
+        return os.path.join(self.audio_dir, f"{job_id}.audio")
+
+    def submit(self, model_name: str, audio_bytes: bytes, priority: int = 0) -> str:
+        """Store the upload and queue a job for it; returns the job id."""
+        with self._lock:
+            queued = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (JOB_QUEUED,)).fetchone()[0]
+            if queued >= JOB_MAX_QUEUED:
+                raise JobQueueFull(f"{queued} jobs waiting")
+            job_id = uuid.uuid4().hex
+            with open(self.audio_path(job_id), "wb") as f:
+                f.write(audio_bytes)
+            self._db.execute(
+                "INSERT INTO jobs (id, model_name, priority, status, progress, created) VALUES (?, ?, ?, ?, 0, ?)",
+                (job_id, model_name, priority, JOB_QUEUED, time.time())
+            )
+            self._db.commit()
+        return job_id
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Mark the next queued job (highest priority, then oldest) as running and return it."""
+        with self._lock:
+            while True:
+                row = self._db.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, created ASC LIMIT 1",
+                    (JOB_QUEUED,)
+                ).fetchone()
+                if row is None:
+                    return None
+                started = time.time()
+                # Nur übernehmen, wenn kein anderer Prozess schneller war
+                claimed = self._db.execute(
+                    "UPDATE jobs SET status = ?, started = ? WHERE id = ? AND status = ?",
+                    (JOB_RUNNING, started, row["id"], JOB_QUEUED)
+                ).rowcount
+                self._db.commit()
+                if claimed:
+                    return {**dict(row), "status": JOB_RUNNING, "started": started}
+
+    def update_progress(self, job_id: str, progress: float, stage: str):
+        """
+        Record progress of a running job.
+
+        Raises:
+            JobCancelled: if cancellation of the job was requested
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET progress = ?, stage = ? WHERE id = ?", (round(progress, 3), stage, job_id)
+            )
+            self._db.commit()
+            cancel = self._db.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if cancel is not None and cancel[0]:
+            raise JobCancelled(job_id)
+
+    def finish(self, job_id: str, status: str, result: Optional[list] = None, error: Optional[str] = None):
+        """Store the outcome of a job and delete its audio."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, progress = CASE WHEN ? THEN 1.0 ELSE progress END, "
+                "finished = ?, result = ?, error = ? WHERE id = ?",
+                (status, status == JOB_DONE, time.time(),
+                 json.dumps(result, ensure_ascii=False) if result is not None else None, error, job_id)
+            )
+            self._db.commit()
+        self._remove_audio(job_id)
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a job: queued jobs immediately, running jobs at their next stage.
+
+        Returns:
+            New status of the job, or None if it does not exist
+        """
+        with self._lock:
+            row = self._db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            status = row[0]
+            if status == JOB_QUEUED:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, finished = ? WHERE id = ?", (JOB_CANCELLED, time.time(), job_id)
+                )
+                status = JOB_CANCELLED
+            elif status == JOB_RUNNING:
+                self._db.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            self._db.commit()
+        if status == JOB_CANCELLED:
+            self._remove_audio(job_id)
+        return status
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job row as dict (``result`` decoded), or None."""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = dict(row)
+            if job["status"] == JOB_QUEUED:
+                # Position in der Warteschlange (0 = als nächstes dran)
+                job["position"] = self._db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ? AND "
+                    "(priority > ? OR (priority = ? AND created < ?))",
+                    (JOB_QUEUED, job["priority"], job["priority"], job["created"])
+                ).fetchone()[0]
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def purge_expired(self, retention_seconds: float = JOB_RETENTION_SECONDS) -> int:
+        """Delete finished jobs older than the retention period."""
+        with self._lock:
+            removed = self._db.execute(
+                f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(JOB_FINISHED_STATES))}) AND finished < ?",
+                (*JOB_FINISHED_STATES, time.time() - retention_seconds)
+            ).rowcount
+            self._db.commit()
+        return removed
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def _remove_audio(self, job_id: str):
+        try:
+            os.remove(self.audio_path(job_id))
+        except FileNotFoundError:
+            pass
+
+
+# Signatur: handler(job, audio_bytes, report_progress(fraction, stage)) -> Ergebnis-Schritte
+JobHandler = Callable[[Dict[str, Any], bytes, Callable[[float, str], None]], List[str]]
+
+
+class JobWorkerPool:
+    """Fixed number of threads that pull jobs from a ``JobStore`` and run ``handler`` on them."""
+
+    def __init__(self, store: JobStore, handler: JobHandler, workers: int = JOB_WORKERS):
+        self.store = store
+        self.handler = handler
+        self.workers = max(1, workers)
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+        self._last_purge = 0.0
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"Job workers started: {self.workers}")
+
+    def notify(self):
+        """Wake an idle worker after a job was submitted."""
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop taking jobs; running jobs are requeued on the next start if they do not finish in time."""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _purge_if_due(self):
+        now = time.time()
+        if now - self._last_purge < JOB_PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        removed = self.store.purge_expired()
+        if removed:
+            print(f"Job store: {removed} expired jobs removed")
+
+    def _worker(self):
+        while not self._stopping:
+            self._purge_if_due()
+            job = self.store.claim_next()
+            if job is None:
+                with self._wakeup:
+                    if not self._stopping:
+                        self._wakeup.wait(timeout=5.0)
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        metrics = get_metrics()
+        start = time.perf_counter()
+        try:
+            with open(self.store.audio_path(job_id), "rb") as f:
+                audio_bytes = f.read()
+            result = self.handler(
+                job, audio_bytes, lambda progress, stage: self.store.update_progress(job_id, progress, stage)
+            )
+        except JobCancelled:
+            self.store.finish(job_id, JOB_CANCELLED)
+            metrics.increment("jobs.cancelled")
+            print(f"Job {job_id} cancelled")
+        except Exception as e:
+            self.store.finish(job_id, JOB_FAILED, error=str(e))
+            metrics.increment("jobs.failed")
+            print(f"Job {job_id} failed: {e}")
+        else:
+            self.store.finish(job_id, JOB_DONE, result=result)
+            metrics.increment("jobs.done")
+        metrics.observe("jobs.seconds", time.perf_counter() - start)
+        metrics.observe("jobs.wait_seconds", job["started"] - job["created"])
+
+
+# Global instance for reuse
+_job_store: Optional[JobStore] = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Get or open the process-wide job store."""
+    global _job_store
+    with _job_store_lock:
+        if _job_store is None:
+            _job_store = JobStore()
+        return _job_store
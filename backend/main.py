@@ -1,22 +1,41 @@
 from fastapi import FastAPI, UploadFile, File, Form, WebSocket, WebSocketDisconnect
-import shutil
 import uuid
 import json
 import asyncio
-import base64
-import io
-import wave
-import os
-import tempfile
 import time
 import numpy as np
-import torch
-import whisper
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from fastapi.middleware.cors import CORSMiddleware
-from backend.transcription import transcribe, transcribe_audio_chunk, multimed_model
-from backend.vosk_transcription import get_vosk_stream_transcriber, cleanup_vosk_resources
-from pydub import AudioSegment
+from fastapi.responses import JSONResponse, StreamingResponse
+from backend.transcription import (
+    USE_GRAMMAR, create_streaming_session, get_grammar_cache, postprocessing_config, transcribe,
+    transcribe_pcm_chunk, warmup_tasks
+)
+from backend.vosk_transcription import get_vosk_session_manager, cleanup_vosk_resources
+from backend.audio_decoding import (
+    AudioDecodeError, FFmpegStreamDecoder, decode_audio_bytes, float32_to_pcm16, pcm_to_float32, wav_bytes_to_pcm
+)
+from backend.audio_protocol import (
+    CODEC_NAMES, CODEC_PCM_F32LE, CODEC_PCM_S16LE, CODEC_WAV, CODEC_WEBM,
+    hello_response, legacy_audio_frame, receive_client_message
+)
+from backend.inference_executor import (
+    INFERENCE_RETRY_AFTER_SECONDS, MODEL_BACKENDS, InferenceBusyError, backend_for_model, run_inference,
+    get_inference_stats, shutdown_inference_executors
+)
+from backend.metrics import get_metrics
+from backend.memory import get_memory_manager
+from backend.model_registry import get_model_registry
+from backend.spellcheck import spellcheck_stats
+from backend.vad import VAD_ENABLED, VoiceActivityDetector
+from backend.warmup import WARMUP_MODELS, get_warmup_scheduler
+from backend.result_cache import CacheLookup, get_transcription_cache, result_cache_key
+from backend.segmented import shutdown_segment_pool
+from backend.ring_buffer import AudioRingBuffer
+from backend.model_host import close_model_host_client
+from backend.jobs import (
+    JOB_CANCELLED, JOB_DONE, JOB_FAILED, JobQueueFull, JobWorkerPool, get_job_store
+)
 
 
         
@@ -35,88 +54,390 @@ app.add_middleware(
 )
 
 
+async def lookup_cached_result(audio_bytes: bytes, model_name: str, start: float):
+    """
+    Gleiche Aufnahme + gleiches Modell + gleiche Nachbearbeitung -> gespeichertes Ergebnis.
+    
+    Returns:
+        (cache_key, steps): steps ist None bei einem Cache-Miss, cache_key None ohne Cache
+    """
+    cache = get_transcription_cache()
+    if cache is None:
+        return None, None
+    metrics = get_metrics()
+    cache_key = await asyncio.to_thread(result_cache_key, audio_bytes, model_name, postprocessing_config())
+    cached = await asyncio.to_thread(cache.get, cache_key)
+    if cached.steps is not None:
+        record_cache_hit(cached)
+        metrics.observe("transcribe.cached_seconds", time.perf_counter() - start)
+        return cache_key, cached.steps
+    metrics.increment("result_cache.misses")
+    return cache_key, None
+
+def record_cache_hit(cached: CacheLookup):
+    metrics = get_metrics()
+    metrics.increment("result_cache.hits")
+    metrics.increment(f"result_cache.hits.{cached.tier}")
+    # Ursprüngliche Verarbeitungsdauer, die dieser Treffer eingespart hat
+    metrics.increment("result_cache.time_saved_seconds", cached.seconds)
+
+async def store_result(cache_key: Optional[str], model_name: str, result: list, seconds: float):
+    # Nur erfolgreiche Transkriptionen cachen, Fehler sollen beim nächsten Versuch neu laufen
+    if cache_key is not None and result and result[-1].startswith("✅"):
+        await asyncio.to_thread(get_transcription_cache().put, cache_key, model_name, result, seconds)
+
+def warming_up_response(model_name: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Modell {model_name} wird noch geladen (warming up)", "warming_up": True},
+        headers={"Retry-After": str(INFERENCE_RETRY_AFTER_SECONDS)}
+    )
+
+def busy_response(e: InferenceBusyError) -> JSONResponse:
+    get_metrics().increment("transcribe.rejected")
+    return JSONResponse(
+        status_code=429,
+        content={"detail": f"Server ausgelastet ({e.backend}), bitte später erneut versuchen"},
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def unknown_model_response(e: ValueError) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"detail": str(e)})
+
 @app.post("/api/transcribe")
 async def transcribe_audio(model_name: str = Form(...), file: UploadFile = File(...)):
-    temp_path = f"/tmp/{uuid.uuid4()}.wav"
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    try:
+        backend_for_model(model_name)
+    except ValueError as e:
+        return unknown_model_response(e)
+    start = time.perf_counter()
+    audio_bytes = await file.read()
 
-    result = transcribe(model_name, temp_path)
-    return {"steps": result}
+    cache_key, cached_steps = await lookup_cached_result(audio_bytes, model_name, start)
+    if cached_steps is not None:
+        return {"steps": cached_steps, "cache": "hit"}
 
-@app.get("/api/models")
-def list_models():
+    # Frühe Requests warten kurz auf das Aufwärmen ihres Modells
+    if not await wait_for_warmup(model_name):
+        return warming_up_response(model_name)
+
+    # Upload wird im Speicher dekodiert und als PCM an die Modelle gegeben
+    try:
+        audio = await asyncio.to_thread(decode_audio_bytes, audio_bytes)
+    except AudioDecodeError as e:
+        return {"steps": [f"❌ Audio konnte nicht dekodiert werden: {str(e)}"], "cache": "miss"}
+
+    try:
+        # Inferenz läuft im Executor des Backends, damit der Event-Loop frei bleibt
+        result = await run_inference(model_name, transcribe, model_name, audio)
+    except InferenceBusyError as e:
+        return busy_response(e)
+
+    seconds = time.perf_counter() - start
+    await store_result(cache_key, model_name, result, seconds)
+    get_metrics().observe("transcribe.seconds", seconds)
+    return {"steps": result, "cache": "miss"}
+
+def ndjson_line(event: Dict[str, Any]) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+@app.post("/api/transcribe-stream")
+async def transcribe_audio_stream(model_name: str = Form(...), file: UploadFile = File(...)):
+    """
+    Wie /api/transcribe, aber als NDJSON-Stream (eine JSON-Zeile pro Event):
+    "segment" pro fertigem Segment langer Aufnahmen, dann "asr", "spellcheck" und
+    "grammar", sobald die jeweilige Stufe fertig ist (mit "step", "text" und "seconds"),
+    zum Schluss "final" mit allen Schritten wie bei /api/transcribe.
+    """
+    try:
+        backend_for_model(model_name)
+    except ValueError as e:
+        return unknown_model_response(e)
+    start = time.perf_counter()
+    audio_bytes = await file.read()
+
+    cache_key, cached_steps = await lookup_cached_result(audio_bytes, model_name, start)
+    if cached_steps is not None:
+        return StreamingResponse(
+            iter([ndjson_line({"stage": "final", "steps": cached_steps, "cache": "hit"})]),
+            media_type="application/x-ndjson"
+        )
+
+    if not await wait_for_warmup(model_name):
+        return warming_up_response(model_name)
+
+    try:
+        audio = await asyncio.to_thread(decode_audio_bytes, audio_bytes)
+    except AudioDecodeError as e:
+        steps = [f"❌ Audio konnte nicht dekodiert werden: {str(e)}"]
+        return StreamingResponse(
+            iter([ndjson_line({"stage": "final", "steps": steps, "cache": "miss"})]),
+            media_type="application/x-ndjson"
+        )
+
+    # Events kommen aus dem Inferenz-Thread und werden über die Queue in den Stream gereicht
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_stage(event: Dict[str, Any]):
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    async def run():
+        try:
+            return await run_inference(model_name, transcribe, model_name, audio, on_stage=on_stage)
+        finally:
+            # Nach allen Stufen-Events eingereiht (gleicher Thread, FIFO)
+            events.put_nowait(None)
+
+    inference = asyncio.create_task(run())
+    # Ein Schritt genügt, damit der Executor den Auftrag annimmt oder ablehnt:
+    # ein volles Backend soll wie bei /api/transcribe noch mit 429 antworten
+    await asyncio.sleep(0)
+    if inference.done() and isinstance(inference.exception(), InferenceBusyError):
+        return busy_response(inference.exception())
+
+    async def stream():
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield ndjson_line(event)
+        try:
+            result = await inference
+        except Exception as e:
+            yield ndjson_line({"stage": "error", "message": f"Fehler bei der Transkription: {str(e)}"})
+            return
+        seconds = time.perf_counter() - start
+        await store_result(cache_key, model_name, result, seconds)
+        get_metrics().observe("transcribe.seconds", seconds)
+        yield ndjson_line({"stage": "final", "steps": result, "cache": "miss"})
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+# Fortschritt eines Jobs nach jeder Stufe (ASR bei langen Aufnahmen anteilig pro Segment)
+JOB_STAGE_PROGRESS = {"decoded": 0.05, "asr": 0.8, "spellcheck": 0.9, "grammar": 1.0}
+
+def run_transcription_job(job: Dict[str, Any], audio_bytes: bytes, report_progress) -> list:
+    """Job-Handler: wie /api/transcribe, aber synchron im Job-Worker."""
+    model_name = job["model_name"]
+    cache = get_transcription_cache()
+    cache_key = None
+    if cache is not None:
+        cache_key = result_cache_key(audio_bytes, model_name, postprocessing_config())
+        cached = cache.get(cache_key)
+        if cached.steps is not None:
+            record_cache_hit(cached)
+            return cached.steps
+        get_metrics().increment("result_cache.misses")
+    start = time.perf_counter()
+    
+    # Jobs haben keine Eile: ohne Timeout auf das Aufwärmen warten
+    get_warmup_scheduler().wait_until_ready(model_name, timeout=None)
+    audio = decode_audio_bytes(audio_bytes)
+    report_progress(JOB_STAGE_PROGRESS["decoded"], "decoded")
+    
+    def on_stage(event: Dict[str, Any]):
+        if event["stage"] == "segment":
+            asr_start, asr_end = JOB_STAGE_PROGRESS["decoded"], JOB_STAGE_PROGRESS["asr"]
+            report_progress(asr_start + (asr_end - asr_start) * (event["index"] + 1) / event["count"], "asr")
+        else:
+            report_progress(JOB_STAGE_PROGRESS[event["stage"]], event["stage"])
+    
+    result = transcribe(model_name, audio, on_stage=on_stage)
+    # Abbruch auch erkennen, wenn transcribe() mit einem Fehler-Schritt zurückkehrt
+    report_progress(1.0, "done")
+    if cache_key is not None and result and result[-1].startswith("✅"):
+        cache.put(cache_key, model_name, result, time.perf_counter() - start)
+    return result
+
+job_workers: Optional[JobWorkerPool] = None
+
+@app.on_event("startup")
+def start_job_workers():
+    global job_workers
+    job_workers = JobWorkerPool(get_job_store(), run_transcription_job)
+    job_workers.start()
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job-Status für die API (ohne Ergebnis)."""
+    fields = ("model_name", "priority", "status", "progress", "stage", "created", "started",
+              "finished", "error", "position", "cancel_requested")
+    return {"job_id": job["id"], **{field: job[field] for field in fields if field in job}}
+
+@app.post("/api/jobs")
+async def submit_job(model_name: str = Form(...), file: UploadFile = File(...), priority: int = Form(0)):
+    """
+    Transkription als Job einreichen: antwortet sofort mit der Job-ID.
+    Status über GET /api/jobs/{id}, Ergebnis über GET /api/jobs/{id}/result.
+    """
+    try:
+        backend_for_model(model_name)
+    except ValueError as e:
+        return unknown_model_response(e)
+    audio_bytes = await file.read()
+    store = get_job_store()
+    try:
+        job_id = await asyncio.to_thread(store.submit, model_name, audio_bytes, priority)
+    except JobQueueFull:
+        get_metrics().increment("jobs.rejected")
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Zu viele wartende Jobs, bitte später erneut versuchen"},
+            headers={"Retry-After": str(INFERENCE_RETRY_AFTER_SECONDS)}
+        )
+    get_metrics().increment("jobs.submitted")
+    if job_workers is not None:
+        job_workers.notify()
+    job = await asyncio.to_thread(store.get, job_id)
+    return JSONResponse(status_code=202, content=public_job(job))
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(get_job_store().get, job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"detail": "Job nicht gefunden (oder abgelaufen)"})
+    return public_job(job)
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = await asyncio.to_thread(get_job_store().get, job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"detail": "Job nicht gefunden (oder abgelaufen)"})
+    if job["status"] == JOB_DONE:
+        return {"job_id": job_id, "steps": job["result"]}
+    if job["status"] in (JOB_FAILED, JOB_CANCELLED):
+        return JSONResponse(status_code=409, content=public_job(job))
+    # Noch nicht fertig
+    return JSONResponse(status_code=202, content=public_job(job))
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Wartende Jobs werden sofort abgebrochen, laufende nach ihrer aktuellen Stufe."""
+    status = await asyncio.to_thread(get_job_store().cancel, job_id)
+    if status is None:
+        return JSONResponse(status_code=404, content={"detail": "Job nicht gefunden (oder abgelaufen)"})
+    return {"job_id": job_id, "status": status}
+
+def result_cache_stats(cache) -> Dict[str, Any]:
+    """Cache-Größe plus Trefferquote und eingesparte Verarbeitungszeit."""
+    metrics = get_metrics()
+    hits = metrics.counter("result_cache.hits")
+    lookups = hits + metrics.counter("result_cache.misses")
     return {
-        "models": [
-            "Whisper tiny",
-            "Whisper base",
-            "Whisper medium",
-            "Whisper large-v3",
-            "SpeechBrain CRDNN",
-            "MultiMed Whisper",
-            "Vosk German"
-        ]
+        **cache.stats(),
+        "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        "time_saved_seconds": round(metrics.counter("result_cache.time_saved_seconds"), 3),
     }
 
+@app.get("/api/metrics")
+def metrics_snapshot():
+    """Zähler, Gauges und Laufzeiten des Prozesses plus Cache- und Executor-Status."""
+    snapshot = get_metrics().snapshot()
+    cache = get_transcription_cache()
+    snapshot["result_cache"] = result_cache_stats(cache) if cache is not None else None
+    snapshot["inference"] = get_inference_stats()
+    snapshot["models"] = get_model_registry().stats()
+    snapshot["spellcheck"] = spellcheck_stats()
+    snapshot["grammar_cache"] = get_grammar_cache().stats() if USE_GRAMMAR else None
+    snapshot["jobs"] = job_workers.store.counts() if job_workers is not None else None
+    snapshot["memory"] = get_memory_manager().stats()
+    snapshot["vosk_sessions"] = get_vosk_session_manager().session_stats()
+    return snapshot
+
+@app.get("/api/inference-status")
+def inference_status():
+    """Gibt die Auslastung der Inferenz-Executors zurück."""
+    return get_inference_stats()
+
+@app.on_event("startup")
+def start_warmup():
+    # Modelle laden im Hintergrund, der Server nimmt sofort Verbindungen an
+    get_warmup_scheduler().start(warmup_tasks(WARMUP_MODELS))
+
+async def wait_for_warmup(model_name: str) -> bool:
+    """Wartet (ohne den Event-Loop zu blockieren), bis das Modell aufgewärmt ist; False bei Timeout."""
+    scheduler = get_warmup_scheduler()
+    if not scheduler.is_warming(model_name):
+        return True
+    return await asyncio.to_thread(scheduler.wait_until_ready, model_name)
+
+def warming_up_message(model_name: str, chunk_id: Any = None) -> str:
+    """Antwort für Live-Chunks, deren Modell noch aufgewärmt wird (Chunk wird verworfen)."""
+    return json.dumps({
+        "type": "warming_up",
+        "model": model_name,
+        "chunk_id": chunk_id,
+        "retry_after": INFERENCE_RETRY_AFTER_SECONDS
+    })
+
+@app.get("/api/ready")
+def readiness():
+    """Bereitschaft des Servers: Warmup-Status und Ladezustand jedes Modells (503 bis alles aufgewärmt ist)."""
+    status = get_warmup_scheduler().status()
+    status["models"] = {name: model_status(name) for name in list_models()["models"]}
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    if job_workers is not None:
+        job_workers.stop()
+    shutdown_inference_executors()
+    shutdown_segment_pool()
+    close_model_host_client()
+
+@app.get("/api/models")
+def list_models():
+    return {"models": list(MODEL_BACKENDS)}
+
 # Dictionary für aktive WebSocket-Verbindungen
 active_connections: dict[str, WebSocket] = {}
 
-# Dictionary für Modell-Status
-model_status = {
-    "Whisper tiny": {"loaded": False, "loading": False},
-    "Whisper base": {"loaded": False, "loading": False},
-    "Whisper medium": {"loaded": False, "loading": False},
-    "Whisper large-v3": {"loaded": False, "loading": False},
-    "SpeechBrain CRDNN": {"loaded": True, "loading": False},  # Bereits geladen
-    "MultiMed Whisper": {"loaded": bool(multimed_model), "loading": False},
-    "Vosk German": {"loaded": False, "loading": False}
-}
+def model_status(model_name: str) -> Dict[str, Any]:
+    """Ladestatus eines Modells, direkt aus der Modell-Registry."""
+    return get_model_registry().status(model_name)
 
 @app.get("/api/model-status/{model_name}")
 def get_model_status(model_name: str):
     """Gibt den Ladestatus eines Modells zurück."""
-    status = model_status.get(model_name, {"loaded": False, "loading": False})
-    return status
+    return model_status(model_name)
+
+@app.get("/api/models/memory")
+def get_model_memory():
+    """Speicherbudget und Status aller registrierten Modelle."""
+    return get_model_registry().stats()
 
 @app.post("/api/preload-model")
 async def preload_model(request: dict):
     """Lädt ein Modell vor, um die erste Transkription zu beschleunigen."""
     model_name = request.get("model_name")
     
-    if model_name not in model_status:
+    if model_name not in list_models()["models"]:
         return {"success": False, "message": "Unbekanntes Modell"}
     
-    if model_status[model_name]["loaded"]:
+    status = model_status(model_name)
+    if not status["available"]:
+        return {"success": False, "message": "Modell nicht verfügbar"}
+    
+    if status["loaded"]:
         return {"success": True, "message": "Modell bereits geladen"}
     
-    if model_status[model_name]["loading"]:
+    if status["loading"]:
         return {"success": False, "message": "Modell wird bereits geladen"}
     
     try:
-        model_status[model_name]["loading"] = True
-        
-        if model_name.startswith("Whisper"):
-            from backend.transcription import loaded_whisper_models
-            model_id = model_name.split(" ")[1].lower()
-            if model_id not in loaded_whisper_models:
-                loaded_whisper_models[model_id] = whisper.load_model(model_id, device="cuda" if torch.cuda.is_available() else "cpu")
-            model_status[model_name]["loaded"] = True
-            
-        elif model_name == "Vosk German":
-            from backend.vosk_transcription import get_vosk_transcriber
-            get_vosk_transcriber()  # Lädt das Modell
-            model_status[model_name]["loaded"] = True
-            
-        model_status[model_name]["loading"] = False
+        # Laden im Thread, damit Pings und Status-Abfragen weiter beantwortet werden
+        await asyncio.to_thread(get_model_registry().load, model_name)
         return {"success": True, "message": "Modell erfolgreich geladen"}
         
     except Exception as e:
-        model_status[model_name]["loading"] = False
         return {"success": False, "message": f"Fehler beim Laden: {str(e)}"}
 
 # Dictionary für aktive WebSocket-Verbindungen
 active_connections: dict[str, WebSocket] = {}
 
+# Codecs, die der Live-Endpunkt als Binär-Frames annimmt (Container werden per ffmpeg dekodiert)
+LIVE_CONTAINER_CODECS = (CODEC_WEBM, CODEC_WAV)
+
 @app.websocket("/api/transcribe-live")
 async def transcribe_live(websocket: WebSocket):
     await websocket.accept()
@@ -124,42 +445,123 @@ async def transcribe_live(websocket: WebSocket):
     active_connections[connection_id] = websocket
     print(f"WebSocket connected: {connection_id}")
     
+    # Modell für Binär-Frames (Protokoll 2), gesetzt über die "hello"-Nachricht
+    session_model = None
+    vad = VoiceActivityDetector(name=connection_id)
+    # Streaming-Whisper (opt-in über "streaming": true): rollender Puffer statt unabhängiger Chunks
+    streaming_requested = False
+    whisper_stream = None
+    whisper_stream_model = None
+    
     try:
         while True:
-            # Empfange Nachricht vom Frontend
+            # Empfange Nachricht vom Frontend (JSON-Text oder Binär-Audio-Frame)
             print(f"Waiting for message...")
-            message = await websocket.receive_text()
-            data = json.loads(message)
-            print(f"Received message type: {data.get('type')}")
+            try:
+                data, frame = await receive_client_message(websocket)
+            except ValueError as e:
+                await websocket.send_text(json.dumps({
+                    "type": "error",
+                    "message": f"Ungültige Nachricht: {str(e)}"
+                }))
+                continue
             
-            if data["type"] == "audio_chunk":
-                # Dekodiere Base64-Audio
-                audio_data = base64.b64decode(data["audio"])
+            if frame is None and data.get("type") == "audio_chunk":
+                # Protokoll 1: Base64-Audio in JSON
+                frame = legacy_audio_frame(data)
                 model_name = data["model"]
+                chunk_id = data.get("chunk_id", "")
+                streaming_requested = bool(data.get("streaming", streaming_requested))
+            elif frame is not None:
+                model_name = session_model
+                chunk_id = frame.chunk_id
+                if model_name is None:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": "Kein Modell gewählt - zuerst 'hello' mit 'model' senden"
+                    }))
+                    continue
+                if frame.codec not in LIVE_CONTAINER_CODECS:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": f"Codec {CODEC_NAMES[frame.codec]} wird hier nicht unterstützt"
+                    }))
+                    continue
+            
+            if frame is not None:
+                audio_data = frame.payload
                 print(f"Processing audio chunk: {len(audio_data)} bytes, model: {model_name}")
                 
-                temp_files_to_cleanup = []
+                if get_warmup_scheduler().is_warming(model_name):
+                    await websocket.send_text(warming_up_message(model_name, chunk_id))
+                    continue
                 
                 try:
-                    # Verwende die robuste Audio-Verarbeitung
-                    processed_audio_path = process_audio_chunk_robust(audio_data, connection_id)
+                    # Dekodierung im Speicher (ffmpeg-Pipe blockiert, daher im Thread)
+                    audio = await asyncio.to_thread(decode_audio_chunk, audio_data, connection_id)
                     
-                    if processed_audio_path is None:
-                        raise Exception("Konnte Audio-Chunk nicht verarbeiten - alle Fallbacks fehlgeschlagen")
+                    if audio is None:
+                        raise Exception("Konnte Audio-Chunk nicht dekodieren")
                     
-                    temp_files_to_cleanup.append(processed_audio_path)
-                    print(f"Audio processing successful: {processed_audio_path}")
+                    streaming = streaming_requested and model_name.startswith("Whisper")
+                    if streaming and whisper_stream_model != model_name:
+                        whisper_stream = create_streaming_session(model_name)
+                        whisper_stream_model = model_name
+                    
+                    speech_ratio = None
+                    if VAD_ENABLED:
+                        # Stille gar nicht erst ans Modell geben, Sprache auf die Sprachanteile kürzen
+                        speech = vad.trim(audio)
+                        speech_ratio = round(speech.speech_ratio, 3)
+                        if not speech.has_speech:
+                            print(f"No speech in chunk {chunk_id}, skipping inference")
+                            # Pause = Ende der Äußerung: vorläufigen Text im Streaming-Modus bestätigen
+                            committed = whisper_stream.flush().committed if streaming else ""
+                            await websocket.send_text(json.dumps({
+                                "type": "transcription",
+                                "text": committed,
+                                "chunk_id": chunk_id,
+                                "silence": True,
+                                "speech_ratio": speech_ratio
+                            }))
+                            continue
+                        audio = speech.audio
+                    
+                    if streaming:
+                        update = await run_inference(model_name, whisper_stream.process_audio, audio)
+                        # "text" enthält nur neu bestätigten Text, damit Clients ihn einfach anhängen können
+                        await websocket.send_text(json.dumps({
+                            "type": "transcription",
+                            "text": update.committed,
+                            "tentative": update.tentative,
+                            "streaming": True,
+                            "chunk_id": chunk_id,
+                            "speech_ratio": speech_ratio
+                        }))
+                        continue
                     
                     # Transkribiere den Chunk
                     print(f"Starting transcription with model: {model_name}")
-                    transcription = transcribe_audio_chunk(model_name, processed_audio_path, quick_mode=True)
+                    transcription = await run_inference(
+                        model_name, transcribe_pcm_chunk, model_name, audio, quick_mode=True
+                    )
                     print(f"Transcription result: {transcription}")
                     
                     # Sende Ergebnis zurück
                     await websocket.send_text(json.dumps({
                         "type": "transcription",
                         "text": transcription,
-                        "chunk_id": data.get("chunk_id", "")
+                        "chunk_id": chunk_id,
+                        "speech_ratio": speech_ratio
+                    }))
+                    
+                except InferenceBusyError as e:
+                    # Backpressure: Chunk verwerfen statt Latenz aufzustauen
+                    print(f"Inference busy, dropping chunk {chunk_id}")
+                    await websocket.send_text(json.dumps({
+                        "type": "busy",
+                        "chunk_id": chunk_id,
+                        "retry_after": e.retry_after
                     }))
                     
                 except Exception as e:
@@ -170,14 +572,14 @@ async def transcribe_live(websocket: WebSocket):
                         "type": "error",
                         "message": f"Fehler bei der Transkription: {str(e)}"
                     }))
-                finally:
-                    # Temporäre Dateien löschen
-                    for path in temp_files_to_cleanup:
-                        if os.path.exists(path):
-                            try:
-                                os.remove(path)
-                            except:
-                                pass
+            
+            elif data["type"] == "hello":
+                # Client kündigt Protokoll 2 an und legt das Modell für Binär-Frames fest
+                session_model = data.get("model", session_model)
+                streaming_requested = bool(data.get("streaming", streaming_requested))
+                response = hello_response(LIVE_CONTAINER_CODECS)
+                response["streaming"] = streaming_requested and (session_model or "").startswith("Whisper")
+                await websocket.send_text(json.dumps(response))
             
             elif data["type"] == "ping":
                 await websocket.send_text(json.dumps({"type": "pong"}))
@@ -190,129 +592,107 @@ async def transcribe_live(websocket: WebSocket):
         # Verbindung aufräumen
         if connection_id in active_connections:
             del active_connections[connection_id]
+        if VAD_ENABLED:
+            print(f"VAD stats for {connection_id}: {vad.stats()}")
 
 # Lazy loading für Vosk-Modell
 def ensure_vosk_loaded():
     """Stelle sicher, dass das Vosk-Modell geladen ist."""
-    if not model_status["Vosk German"]["loaded"] and not model_status["Vosk German"]["loading"]:
-        model_status["Vosk German"]["loading"] = True
-        try:
-            from backend.vosk_transcription import get_vosk_transcriber
-            get_vosk_transcriber()  # Lädt das Modell
-            model_status["Vosk German"]["loaded"] = True
-        except Exception as e:
-            print(f"Fehler beim Laden des Vosk-Modells: {e}")
-        finally:
-            model_status["Vosk German"]["loading"] = False
+    try:
+        get_vosk_session_manager().load_model()  # Lädt das geteilte Modell über die Registry
+    except Exception as e:
+        print(f"Fehler beim Laden des Vosk-Modells: {e}")
 
-def process_audio_chunk_robust(audio_data: bytes, connection_id: str) -> str:
+def decode_audio_chunk(audio_data: bytes, connection_id: str) -> Optional[np.ndarray]:
     """
-    Robuste Audio-Chunk-Verarbeitung mit mehreren Fallback-Strategien
+    Dekodiert einen Live-Chunk (WebM, WAV, Ogg, ...) im Speicher zu float32 PCM (16kHz, mono).
+    Der Chunk berührt nie die Festplatte: WAV wird direkt geparst, alles andere per ffmpeg-Pipe.
     """
-    temp_files = []
-    
     try:
-        # Versuche verschiedene Ansätze für die Audio-Verarbeitung
-        timestamp = uuid.uuid4().hex[:8]
-        
-        # 1. Direkter Versuch als WebM
-        temp_webm = f"/tmp/live_{connection_id}_{timestamp}.webm"
-        temp_files.append(temp_webm)
-        
-        with open(temp_webm, "wb") as f:
-            f.write(audio_data)
-        
-        print(f"Wrote {len(audio_data)} bytes to {temp_webm}")
-        
-        # 2. Versuche mit pydub zu konvertieren
-        temp_wav = f"/tmp/live_{connection_id}_{timestamp}.wav"
-        temp_files.append(temp_wav)
-        
-        try:
-            print("Trying pydub conversion...")
-            audio_segment = AudioSegment.from_file(temp_webm)
-            # Konvertiere zu Mono, 16kHz
-            audio_segment = audio_segment.set_channels(1).set_frame_rate(16000)
-            audio_segment.export(temp_wav, format="wav")
-            print(f"Pydub conversion successful: {temp_wav}")
-            return temp_wav
-            
-        except Exception as pydub_error:
-            print(f"Pydub failed: {pydub_error}")
-            
-            # 3. Versuche direkten ffmpeg-Aufruf
-            try:
-                import subprocess
-                temp_wav_ffmpeg = f"/tmp/live_{connection_id}_{timestamp}_ffmpeg.wav"
-                temp_files.append(temp_wav_ffmpeg)
-                
-                print("Trying direct ffmpeg conversion...")
-                result = subprocess.run([
-                    'ffmpeg', '-y', '-f', 'webm', '-i', temp_webm,
-                    '-ar', '16000', '-ac', '1', '-f', 'wav', temp_wav_ffmpeg
-                ], capture_output=True, text=True, timeout=10)
-                
-                if result.returncode == 0 and os.path.exists(temp_wav_ffmpeg):
-                    print(f"FFmpeg conversion successful: {temp_wav_ffmpeg}")
-                    return temp_wav_ffmpeg
-                else:
-                    print(f"FFmpeg failed with return code {result.returncode}")
-                    print(f"FFmpeg stderr: {result.stderr}")
-                    
-            except Exception as ffmpeg_error:
-                print(f"Direct ffmpeg failed: {ffmpeg_error}")
-                
-                # 4. Fallback: Versuche als WAV zu interpretieren
-                try:
-                    print("Trying to treat as WAV directly...")
-                    temp_direct_wav = f"/tmp/live_{connection_id}_{timestamp}_direct.wav"
-                    temp_files.append(temp_direct_wav)
-                    
-                    with open(temp_direct_wav, "wb") as f:
-                        f.write(audio_data)
-                    
-                    # Prüfe ob es eine gültige WAV-Datei ist
-                    import wave
-                    with wave.open(temp_direct_wav, 'rb') as wav_file:
-                        # Wenn wir bis hier kommen, ist es eine gültige WAV-Datei
-                        print(f"Direct WAV interpretation successful: {temp_direct_wav}")
-                        return temp_direct_wav
-                        
-                except Exception as wav_error:
-                    print(f"Direct WAV interpretation failed: {wav_error}")
-                    
-                    # 5. Letzter Fallback: Erstelle stille WAV-Datei
-                    print("Creating silent WAV as last resort...")
-                    temp_silent = f"/tmp/live_{connection_id}_{timestamp}_silent.wav"
-                    temp_files.append(temp_silent)
-                    
-                    # Erstelle 3 Sekunden Stille
-                    import wave
-                    with wave.open(temp_silent, 'wb') as wav_file:
-                        wav_file.setnchannels(1)  # Mono
-                        wav_file.setsampwidth(2)  # 16-bit
-                        wav_file.setframerate(16000)  # 16kHz
-                        
-                        # 3 Sekunden Stille (16000 * 3 * 2 bytes)
-                        silence = b'\x00' * (16000 * 3 * 2)
-                        wav_file.writeframes(silence)
-                    
-                    return temp_silent
-        
+        audio = decode_audio_bytes(audio_data)
+        print(f"Decoded {len(audio_data)} bytes to {len(audio)} samples for {connection_id}")
+        return audio
+    except AudioDecodeError as e:
+        # Kein Stille-Ersatz: nicht dekodierbare Chunks werden als Fehler gemeldet
+        print(f"Audio decoding failed for {connection_id}: {e}")
+        return None
     except Exception as e:
         print(f"Critical error in audio processing: {e}")
         # Gebe None zurück wenn alles fehlschlägt
         return None
-    finally:
-        # Cleanup wird vom Aufrufer gemacht
-        pass
+
+def vad_filtered_feed(add_audio_chunk, vad: VoiceActivityDetector):
+    """
+    Wrap a Vosk session's ``add_audio_chunk`` so only speech (plus a short
+    trailing silence that lets the recognizer finish the utterance) is fed.
+    """
+    if not VAD_ENABLED:
+        return add_audio_chunk
+    
+    def feed(pcm_data: bytes):
+        speech = vad.filter_stream(pcm_to_float32(pcm_data, "s16le"))
+        if len(speech):
+            add_audio_chunk(float32_to_pcm16(speech))
+    
+    return feed
+
+async def feed_vosk_audio(stream_transcriber, feed_audio, pcm_data: bytes):
+    """
+    Feed PCM from the event loop. With the ``block`` queue policy the feed
+    waits in a thread, so a lagging recognizer stops the socket reads
+    (backpressure to the client) instead of the whole event loop.
+    """
+    if stream_transcriber.queue_policy == "block":
+        await asyncio.to_thread(feed_audio, pcm_data)
+    else:
+        feed_audio(pcm_data)
 
 # Dictionary für aktive Vosk-Streaming-Verbindungen
 active_vosk_streams: dict[str, any] = {}
-active_webm_buffers: dict[str, list] = {}  # Buffer für WebM-Chunks pro Connection
 webm_stream_state: dict[str, dict] = {}  # State für kontinuierliche WebM-Streams
 webm_headers: dict[str, bytes] = {}  # Gespeicherte WebM-Header pro Connection
 
+# Codecs, die der Vosk-Stream als Binär-Frames annimmt
+VOSK_STREAM_CODECS = (CODEC_WEBM, CODEC_WAV, CODEC_PCM_S16LE)
+
+async def vosk_result_worker(websocket: WebSocket, stream_transcriber):
+    """
+    Sendet die Ergebnisse einer Vosk-Session, sobald der Worker-Thread sie einreiht.
+    Kein Polling: die Session schiebt Ergebnisse per call_soon_threadsafe in ``results``.
+    """
+    print("Result worker started")
+    results = stream_transcriber.results
+    while True:
+        result = await results.get()
+        try:
+            if result is None:
+                # Session beendet
+                break
+            await websocket.send_text(json.dumps({
+                "type": "transcription",
+                "text": result['text'],
+                "partial": result['partial'],
+                "confidence": result['confidence'],
+                "timestamp": result['timestamp'],
+                # Rückstand gegenüber Echtzeit und wegen Überlast verworfenes Audio
+                "lag": result['lag'],
+                "dropped_seconds": result['dropped_seconds']
+            }))
+        except Exception as send_error:
+            print(f"Error sending to websocket: {send_error}")
+            break
+        finally:
+            results.task_done()
+    print("Result worker ended")
+
+async def flush_vosk_session(stream_transcriber, timeout: float = 3.0):
+    """Äußerung abschließen und warten, bis alle Ergebnisse an den Client gesendet sind."""
+    try:
+        await asyncio.wait_for(asyncio.wrap_future(stream_transcriber.flush()), timeout)
+        await asyncio.wait_for(stream_transcriber.results.join(), timeout)
+    except asyncio.TimeoutError:
+        print(f"Vosk flush timed out (session {stream_transcriber.session_id})")
+
 @app.websocket("/api/transcribe-vosk-stream")
 async def transcribe_vosk_stream(websocket: WebSocket):
     """
@@ -325,141 +705,140 @@ async def transcribe_vosk_stream(websocket: WebSocket):
     
     stream_transcriber = None
     result_task = None
+    vad = VoiceActivityDetector(name=connection_id)
     
     try:
-        # Initialisiere Vosk Stream Transcriber
-        stream_transcriber = get_vosk_stream_transcriber()
+        # Eigene Vosk-Session (Recognizer + Queues) für diese Verbindung, Modell wird geteilt
+        try:
+            stream_transcriber = await asyncio.to_thread(
+                get_vosk_session_manager().create_session, connection_id
+            )
+        except Exception as e:
+            print(f"Could not create Vosk session for {connection_id}: {e}")
+            await websocket.send_text(json.dumps({
+                "type": "error",
+                "message": f"Vosk-Session konnte nicht gestartet werden: {str(e)}"
+            }))
+            return
         active_vosk_streams[connection_id] = stream_transcriber
-        active_webm_buffers[connection_id] = []  # Buffer für WebM-Chunks
         webm_stream_state[connection_id] = {
             'header_received': False,
-            'full_stream': b'',
-            'last_process_time': time.time()
+            'decoder': None,  # Persistenter ffmpeg-Decoder (FFmpegStreamDecoder)
+            'last_chunk_time': time.time()
         }
         
         # Starte Streaming ohne Callback - wir holen die Ergebnisse in separater Task
-        stream_transcriber.start_streaming()
-        
-        # Task für das Abholen von Ergebnissen aus der Queue
-        async def result_worker():
-            print("Result worker started")
-            while True:
-                try:
-                    if not stream_transcriber or not stream_transcriber.is_running:
-                        print("Stream transcriber not running, stopping result worker")
-                        break
-                        
-                    result = stream_transcriber.get_result(timeout=0.1)
-                    if result:
-                        print(f"Sending Vosk result to frontend: {result}")
-                        try:
-                            await websocket.send_text(json.dumps({
-                                "type": "transcription",
-                                "text": result['text'],
-                                "partial": result['partial'],
-                                "confidence": result['confidence'],
-                                "timestamp": result['timestamp']
-                            }))
-                            print(f"Successfully sent result: {result['text'][:50]}...")
-                        except Exception as send_error:
-                            print(f"Error sending to websocket: {send_error}")
-                            break
-                except Exception as e:
-                    print(f"Error in result worker: {e}")
-                await asyncio.sleep(0.01)  # Kurze Pause
-            print("Result worker ended")
+        # (im Thread: lädt ggf. das Modell über die Registry und würde sonst alle Verbindungen blockieren)
+        await asyncio.to_thread(stream_transcriber.start_streaming, loop=asyncio.get_running_loop())
         
         # Starte Result Worker Task
-        result_task = asyncio.create_task(result_worker())
+        result_task = asyncio.create_task(vosk_result_worker(websocket, stream_transcriber))
         
+        # Stille wird vor dem Recognizer verworfen (auch aus dem ffmpeg-Reader-Thread)
+        feed_audio = vad_filtered_feed(stream_transcriber.add_audio_chunk, vad)
         chunk_counter = 0
         
         while True:
-            # Empfange Nachricht vom Frontend
-            message = await websocket.receive_text()
-            data = json.loads(message)
+            # Empfange Nachricht vom Frontend (JSON-Text oder Binär-Audio-Frame)
+            try:
+                data, frame = await receive_client_message(websocket)
+            except ValueError as e:
+                await websocket.send_text(json.dumps({
+                    "type": "error",
+                    "message": f"Ungültige Nachricht: {str(e)}"
+                }))
+                continue
+            
+            if frame is None and data.get("type") == "audio_chunk":
+                # Protokoll 1: Base64-Audio in JSON
+                frame = legacy_audio_frame(data)
+            
+            if frame is not None and frame.codec in (CODEC_PCM_S16LE, CODEC_WAV):
+                # Rohes PCM / WAV braucht keinen Container-Decoder
+                chunk_counter += 1
+                try:
+                    if frame.codec == CODEC_WAV:
+                        pcm_data, sample_rate = wav_bytes_to_pcm(frame.payload)
+                    else:
+                        pcm_data, sample_rate = frame.payload, frame.sample_rate
+                    if sample_rate != stream_transcriber.sample_rate:
+                        raise ValueError(f"Audio mit {sample_rate} Hz, erwartet {stream_transcriber.sample_rate} Hz")
+                except ValueError as e:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": f"Vosk Audio-Stream-Fehler: {str(e)}"
+                    }))
+                    continue
+                await feed_vosk_audio(stream_transcriber, feed_audio, pcm_data)
             
-            if data["type"] == "audio_chunk":
+            elif frame is not None:
                 chunk_counter += 1
-                # Dekodiere Base64-Audio
-                audio_data = base64.b64decode(data["audio"])
+                audio_data = frame.payload
+                if frame.codec not in VOSK_STREAM_CODECS:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": f"Codec {CODEC_NAMES[frame.codec]} wird hier nicht unterstützt"
+                    }))
+                    continue
                 print(f"Processing Vosk audio chunk {chunk_counter}: {len(audio_data)} bytes")
                 
                 # Debug-Analyse der Audio-Daten
                 analysis = analyze_audio_data(audio_data, connection_id)
                 
-                # Speichere WebM-Header vom ersten vollständigen Chunk
-                if analysis['is_webm'] and connection_id not in webm_headers:
+                # Speichere WebM-Header vom (neuesten) vollständigen Chunk für Decoder-Neustarts
+                if analysis['is_webm']:
                     webm_headers[connection_id] = extract_webm_header(audio_data)
                     print(f"Extracted and stored WebM header: {len(webm_headers[connection_id])} bytes")
                 
-                # Bessere WebM-Stream-Verarbeitung mit Header-Wiederverwendung
                 stream_state = webm_stream_state[connection_id]
-                current_time = time.time()
+                stream_state['last_chunk_time'] = time.time()
+                decoder = stream_state['decoder']
                 
                 # Prüfe ob es ein vollständiger WebM-Header ist
                 if audio_data.startswith(b'\x1a\x45\xdf\xa3'):
-                    # Neuer WebM-Stream startet
-                    print(f"New WebM stream detected, resetting buffer")
+                    # Neuer WebM-Stream startet (z.B. MediaRecorder neu gestartet) -> neuer Decoder
+                    print(f"New WebM stream detected, starting decoder")
                     stream_state['header_received'] = True
-                    stream_state['full_stream'] = audio_data
-                    stream_state['last_process_time'] = current_time
-                else:
-                    # Fragmentierter WebM-Chunk
-                    if stream_state['header_received']:
-                        stream_state['full_stream'] += audio_data
-                        stream_state['last_process_time'] = current_time
-                    else:
-                        print(f"Fragmentary chunk received without header, skipping")
-                        continue
-                
-                # Verarbeite Stream wenn genug Zeit vergangen oder Stream groß genug ist
-                time_since_last = current_time - stream_state['last_process_time']
-                stream_size = len(stream_state['full_stream'])
+                    if decoder is not None:
+                        await asyncio.to_thread(decoder.close)
+                        decoder = None
+                elif not stream_state['header_received']:
+                    print(f"Fragmentary chunk received without header, skipping")
+                    continue
+                elif decoder is not None and not decoder.is_alive:
+                    # ffmpeg ist abgestürzt: mit gespeichertem Header neu aufsetzen
+                    print(f"FFmpeg decoder died, restarting with saved WebM header")
+                    await asyncio.to_thread(decoder.close)
+                    decoder = None
+                    if webm_headers.get(connection_id):
+                        audio_data = webm_headers[connection_id] + audio_data
                 
-                if (stream_size > 16384 or time_since_last > 1.0 or chunk_counter % 8 == 0) and stream_size > 0:
-                    print(f"Processing WebM stream: {stream_size} bytes (time_delta: {time_since_last:.2f}s)")
+                try:
+                    if decoder is None:
+                        # Neues PCM geht direkt aus dem Reader-Thread in die Vosk-Session
+                        decoder = FFmpegStreamDecoder(
+                            feed_audio,
+                            input_format="webm",
+                            name=connection_id
+                        )
+                        decoder.start()
+                        stream_state['decoder'] = decoder
                     
-                    # Konvertiere den kontinuierlichen WebM-Stream
-                    try:
-                        # Verwende die neue kontinuierliche Stream-Konvertierung
-                        pcm_data = convert_continuous_webm_to_pcm(stream_state['full_stream'], connection_id)
-                        if pcm_data and stream_transcriber:
-                            print(f"Successfully converted {stream_size} bytes WebM stream to {len(pcm_data)} bytes PCM")
-                            stream_transcriber.add_audio_chunk(pcm_data)
-                            
-                            # Reset Stream für nächste Batch (aber behalte letzten Teil für Kontinuität)
-                            if stream_size > 32768:  # Nur bei großen Streams resetten
-                                # Behalte letzten Teil des Streams für Kontinuität
-                                keep_size = min(8192, stream_size // 4)
-                                stream_state['full_stream'] = stream_state['full_stream'][-keep_size:]
-                                print(f"Stream reset, keeping last {keep_size} bytes for continuity")
-                        else:
-                            print(f"Failed to convert WebM stream of {stream_size} bytes")
-                            # Bei Fehlern: Versuche mit gespeichertem Header zu rekonstruieren
-                            if connection_id in webm_headers and webm_headers[connection_id]:
-                                print("Attempting stream reconstruction with saved header...")
-                                # Teile Stream in Chunks und verwende Header-Rekonstruktion
-                                chunk_size = 16384
-                                stream_data = stream_state['full_stream']
-                                for i in range(0, len(stream_data), chunk_size):
-                                    chunk = stream_data[i:i+chunk_size]
-                                    reconstructed = build_continuous_webm_stream([chunk], webm_headers[connection_id], connection_id)
-                                    if reconstructed:
-                                        pcm_chunk = convert_continuous_webm_to_pcm(reconstructed, connection_id)
-                                        if pcm_chunk and stream_transcriber:
-                                            stream_transcriber.add_audio_chunk(pcm_chunk)
-                                            print(f"Successfully processed reconstructed chunk: {len(pcm_chunk)} bytes PCM")
-                        
-                    except Exception as e:
-                        print(f"Vosk stream processing error: {e}")
-                        # Reset bei Fehler
-                        stream_state['full_stream'] = b''
-                        stream_state['header_received'] = False
-                        await websocket.send_text(json.dumps({
-                            "type": "error",
-                            "message": f"Vosk Audio-Stream-Fehler: {str(e)}"
-                        }))
+                    # Jedes Fragment wird genau einmal an ffmpeg geschrieben
+                    decoder.feed(audio_data)
+                    
+                except Exception as e:
+                    print(f"Vosk stream processing error: {e}")
+                    # Reset bei Fehler
+                    stream_state['decoder'] = None
+                    stream_state['header_received'] = False
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": f"Vosk Audio-Stream-Fehler: {str(e)}"
+                    }))
+            
+            elif data["type"] == "hello":
+                await websocket.send_text(json.dumps(hello_response(VOSK_STREAM_CODECS)))
             
             elif data["type"] == "ping":
                 await websocket.send_text(json.dumps({"type": "pong"}))
@@ -473,6 +852,11 @@ async def transcribe_vosk_stream(websocket: WebSocket):
         print(f"Vosk WebSocket Fehler: {e}")
     finally:
         # Cleanup
+        # Decoder zuerst schließen, damit das restliche PCM noch in die Session fließt
+        decoder = webm_stream_state.get(connection_id, {}).get('decoder')
+        if decoder is not None:
+            await asyncio.to_thread(decoder.close)
+        
         if result_task:
             result_task.cancel()
             try:
@@ -482,20 +866,235 @@ async def transcribe_vosk_stream(websocket: WebSocket):
         
         if connection_id in active_vosk_streams:
             if stream_transcriber:
-                stream_transcriber.stop_streaming()
+                # Join des Worker-Threads nicht auf dem Event-Loop
+                await asyncio.to_thread(stream_transcriber.stop_streaming)
             del active_vosk_streams[connection_id]
             
-        if connection_id in active_webm_buffers:
-            del active_webm_buffers[connection_id]
-            
         if connection_id in webm_stream_state:
             del webm_stream_state[connection_id]
             
         if connection_id in webm_headers:
             del webm_headers[connection_id]
-            
+        
+        if VAD_ENABLED:
+            print(f"VAD stats for {connection_id}: {vad.stats()}")
         print(f"Vosk WebSocket disconnected: {connection_id}")
 
+# PCM-Streaming: 16kHz mono, s16le oder float32, ohne Container
+PCM_STREAM_SAMPLE_RATE = 16000
+PCM_STREAM_FORMATS = {"s16le": CODEC_PCM_S16LE, "f32le": CODEC_PCM_F32LE}
+# Sekunden Audio pro Inferenz für Whisper/SpeechBrain/MultiMed
+PCM_STREAM_WINDOW_SECONDS = 5.0
+# Kürzere Reste werden am Stream-Ende nicht mehr transkribiert
+PCM_STREAM_MIN_SECONDS = 0.3
+# Kapazität des Ringpuffers pro Verbindung, darüber wird das älteste Audio überschrieben
+PCM_STREAM_BUFFER_SECONDS = 60.0
+
+@app.websocket("/api/transcribe-pcm-stream")
+async def transcribe_pcm_stream(websocket: WebSocket):
+    """
+    WebSocket endpoint für rohes PCM (16kHz mono, s16le oder float32).
+    
+    Der Client sendet zuerst {"type": "start", "model": ..., "format": "s16le"|"f32le",
+    "framed": true|false} und danach Binär-Frames: mit Protokoll-2-Header (framed)
+    oder als reine PCM-Daten. Vosk bekommt das PCM direkt in den Recognizer,
+    andere Modelle transkribieren feste Fenster aus dem Puffer im Inferenz-Executor.
+    Kein Container-Parsing, keine temporären Dateien, keine Subprozesse.
+    """
+    await websocket.accept()
+    connection_id = str(uuid.uuid4())
+    print(f"PCM WebSocket connected: {connection_id}")
+    
+    model_name = None
+    raw_codec = None
+    stream_transcriber = None
+    feed_audio = None
+    result_task = None
+    window_task = None
+    vad = VoiceActivityDetector(sample_rate=PCM_STREAM_SAMPLE_RATE, name=connection_id)
+    window_counter = 0
+    pcm_buffer = AudioRingBuffer(int(PCM_STREAM_BUFFER_SECONDS * PCM_STREAM_SAMPLE_RATE))
+    
+    async def transcribe_window(audio: np.ndarray, window_id: int):
+        if not await wait_for_warmup(model_name):
+            await websocket.send_text(warming_up_message(model_name, window_id))
+            return
+        audio_seconds = round(len(audio) / PCM_STREAM_SAMPLE_RATE, 3)
+        try:
+            if VAD_ENABLED:
+                speech = vad.trim(audio)
+                if not speech.has_speech:
+                    await websocket.send_text(json.dumps({
+                        "type": "transcription",
+                        "text": "",
+                        "partial": False,
+                        "chunk_id": window_id,
+                        "silence": True,
+                        "audio_seconds": audio_seconds
+                    }))
+                    return
+                audio = speech.audio
+            start = time.perf_counter()
+            text = await run_inference(model_name, transcribe_pcm_chunk, model_name, audio, quick_mode=True)
+            await websocket.send_text(json.dumps({
+                "type": "transcription",
+                "text": text,
+                "partial": False,
+                "chunk_id": window_id,
+                "audio_seconds": audio_seconds,
+                "inference_seconds": round(time.perf_counter() - start, 3)
+            }))
+        except InferenceBusyError as e:
+            await websocket.send_text(json.dumps({
+                "type": "busy",
+                "chunk_id": window_id,
+                "retry_after": e.retry_after
+            }))
+        except Exception as e:
+            # Läuft als Task: ein Fehler darf weder verloren gehen noch beim Flush die Verbindung beenden
+            print(f"PCM stream window {window_id} failed: {e}")
+            import traceback
+            traceback.print_exc()
+            await websocket.send_text(json.dumps({
+                "type": "error",
+                "chunk_id": window_id,
+                "message": f"Fehler bei der Transkription: {str(e)}"
+            }))
+    
+    window_samples = int(PCM_STREAM_WINDOW_SECONDS * PCM_STREAM_SAMPLE_RATE)
+    
+    try:
+        while True:
+            try:
+                data, frame = await receive_client_message(websocket, raw_codec, PCM_STREAM_SAMPLE_RATE)
+            except ValueError as e:
+                await websocket.send_text(json.dumps({
+                    "type": "error",
+                    "message": f"Ungültige Nachricht: {str(e)}"
+                }))
+                continue
+            
+            if frame is not None:
+                if model_name is None:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": "Stream nicht gestartet - zuerst 'start' senden"
+                    }))
+                    continue
+                if frame.codec not in PCM_STREAM_FORMATS.values() or frame.sample_rate != PCM_STREAM_SAMPLE_RATE:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": f"Erwartet PCM mit {PCM_STREAM_SAMPLE_RATE} Hz, erhalten "
+                                   f"{CODEC_NAMES[frame.codec]} mit {frame.sample_rate} Hz"
+                    }))
+                    continue
+                sample_format = "s16le" if frame.codec == CODEC_PCM_S16LE else "f32le"
+                if len(frame.payload) % (2 if sample_format == "s16le" else 4):
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": f"PCM-Frame mit {len(frame.payload)} Bytes ist nicht sample-aligned"
+                    }))
+                    continue
+                
+                if stream_transcriber is not None:
+                    # Vosk: s16le (ohne Stille) in den Recognizer
+                    if frame.codec == CODEC_PCM_S16LE:
+                        pcm_data = frame.payload
+                    else:
+                        pcm_data = float32_to_pcm16(pcm_to_float32(frame.payload, "f32le"))
+                    await feed_vosk_audio(stream_transcriber, feed_audio, pcm_data)
+                    continue
+                
+                dropped = pcm_buffer.append(pcm_to_float32(frame.payload, sample_format))
+                if dropped:
+                    get_metrics().increment("pcm_stream.dropped_seconds", dropped / PCM_STREAM_SAMPLE_RATE)
+                
+                # Nur ein Fenster gleichzeitig in Inferenz, der Rest wartet im Puffer.
+                # Kopie, da die Inferenz-Task parallel zu weiteren Appends läuft
+                if len(pcm_buffer) >= window_samples and (window_task is None or window_task.done()):
+                    window_counter += 1
+                    window_task = asyncio.create_task(
+                        transcribe_window(pcm_buffer.take(window_samples), window_counter)
+                    )
+                continue
+            
+            if data["type"] in ("start", "hello"):
+                requested_model = data.get("model", "Vosk German")
+                sample_format = data.get("format", "s16le")
+                if sample_format not in PCM_STREAM_FORMATS or data.get("sample_rate", PCM_STREAM_SAMPLE_RATE) != PCM_STREAM_SAMPLE_RATE:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": f"Unterstützt werden nur {list(PCM_STREAM_FORMATS)} mit {PCM_STREAM_SAMPLE_RATE} Hz"
+                    }))
+                    continue
+                if model_name is not None and requested_model != model_name:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": "Modellwechsel während eines Streams wird nicht unterstützt"
+                    }))
+                    continue
+                
+                raw_codec = None if data.get("framed", True) else PCM_STREAM_FORMATS[sample_format]
+                if model_name is None and requested_model == "Vosk German":
+                    try:
+                        stream_transcriber = await asyncio.to_thread(
+                            get_vosk_session_manager().create_session, connection_id
+                        )
+                    except Exception as e:
+                        await websocket.send_text(json.dumps({
+                            "type": "error",
+                            "message": f"Vosk-Session konnte nicht gestartet werden: {str(e)}"
+                        }))
+                        continue
+                    await asyncio.to_thread(stream_transcriber.start_streaming, loop=asyncio.get_running_loop())
+                    feed_audio = vad_filtered_feed(stream_transcriber.add_audio_chunk, vad)
+                    result_task = asyncio.create_task(vosk_result_worker(websocket, stream_transcriber))
+                model_name = requested_model
+                
+                response = hello_response(tuple(PCM_STREAM_FORMATS.values()))
+                response.update({"model": model_name, "sample_rate": PCM_STREAM_SAMPLE_RATE})
+                await websocket.send_text(json.dumps(response))
+            
+            elif data["type"] == "ping":
+                await websocket.send_text(json.dumps({"type": "pong"}))
+            
+            elif data["type"] in ("flush", "stop_stream"):
+                if stream_transcriber is not None:
+                    await flush_vosk_session(stream_transcriber)
+                else:
+                    if window_task is not None:
+                        await window_task
+                    while len(pcm_buffer) >= int(PCM_STREAM_MIN_SECONDS * PCM_STREAM_SAMPLE_RATE):
+                        window_counter += 1
+                        await transcribe_window(pcm_buffer.take(window_samples), window_counter)
+                    pcm_buffer.clear()
+                
+                if data["type"] == "stop_stream":
+                    stopped = {"type": "stopped"}
+                    if VAD_ENABLED:
+                        stopped["vad"] = vad.stats()
+                    if stream_transcriber is not None:
+                        stopped["vosk"] = stream_transcriber.stats()
+                    await websocket.send_text(json.dumps(stopped))
+                    break
+                
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"PCM WebSocket Fehler: {e}")
+    finally:
+        if window_task is not None and not window_task.done():
+            window_task.cancel()
+        if result_task:
+            result_task.cancel()
+            try:
+                await result_task
+            except asyncio.CancelledError:
+                pass
+        if stream_transcriber:
+            await asyncio.to_thread(stream_transcriber.stop_streaming)
+        print(f"PCM WebSocket disconnected: {connection_id}")
+
 # Debug-Funktion für Audio-Analyse
 def analyze_audio_data(audio_data: bytes, connection_id: str) -> Dict[str, Any]:
     """Analysiere die eingehenden Audio-Daten für Debugging."""
@@ -526,264 +1125,6 @@ def analyze_audio_data(audio_data: bytes, connection_id: str) -> Dict[str, Any]:
     print(f"Audio analysis for {connection_id}: {analysis}")
     return analysis
 
-def convert_webm_to_pcm(audio_data: bytes, connection_id: str) -> bytes:
-    """
-    Konvertiert WebM/Opus Audio zu 16-bit PCM für Vosk.
-    Optimiert für niedrige Latenz mit verbesserter Fehlerbehandlung.
-    """
-    import subprocess
-    import tempfile
-    
-    timestamp = uuid.uuid4().hex[:8]
-    
-    # Prüfe Datengrößse - sehr kleine Chunks sind oft unvollständig
-    if len(audio_data) < 100:
-        print(f"Audio chunk too small ({len(audio_data)} bytes), skipping")
-        return b""
-    
-    # Temporäre Dateien
-    temp_webm = f"/tmp/vosk_{connection_id}_{timestamp}.webm"
-    temp_wav = f"/tmp/vosk_{connection_id}_{timestamp}.wav"
-    temp_raw = f"/tmp/vosk_{connection_id}_{timestamp}.raw"
-    
-    try:
-        # Schreibe WebM-Daten
-        with open(temp_webm, "wb") as f:
-            f.write(audio_data)
-        
-        print(f"Processing {len(audio_data)} bytes audio chunk")
-        
-        # Methode 1: WebM zu WAV mit ffmpeg (robusteste Methode)
-        try:
-            cmd = [
-                'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
-                '-i', temp_webm,
-                '-ar', '16000',  # 16kHz Sample Rate für Vosk
-                '-ac', '1',      # Mono
-                '-f', 'wav',     # WAV Format
-                '-acodec', 'pcm_s16le',  # 16-bit PCM
-                temp_wav
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode == 0 and os.path.exists(temp_wav) and os.path.getsize(temp_wav) > 44:
-                # Lese WAV-Datei und extrahiere PCM-Daten
-                with wave.open(temp_wav, 'rb') as wav_file:
-                    # Validiere WAV-Format
-                    sample_rate = wav_file.getframerate()
-                    channels = wav_file.getnchannels()
-                    sample_width = wav_file.getsampwidth()
-                    
-                    print(f"WAV file: {sample_rate}Hz, {channels} channels, {sample_width} bytes/sample")
-                    
-                    if sample_rate != 16000:
-                        print(f"Warning: Sample rate is {sample_rate}, expected 16000")
-                    if channels != 1:
-                        print(f"Warning: {channels} channels, expected 1 (mono)")
-                    if sample_width != 2:
-                        print(f"Warning: {sample_width} bytes/sample, expected 2 (16-bit)")
-                    
-                    pcm_data = wav_file.readframes(wav_file.getnframes())
-                    print(f"Successfully converted to {len(pcm_data)} bytes PCM")
-                    return pcm_data
-            else:
-                print(f"FFmpeg conversion failed: {result.stderr}")
-                    
-        except subprocess.TimeoutExpired:
-            print("FFmpeg timeout")
-        except Exception as e:
-            print(f"FFmpeg conversion failed: {e}")
-        
-        # Methode 2: Direct WebM to RAW PCM
-        try:
-            cmd = [
-                'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
-                '-i', temp_webm,
-                '-ar', '16000',
-                '-ac', '1',
-                '-f', 's16le',  # 16-bit little-endian PCM
-                temp_raw
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode == 0 and os.path.exists(temp_raw) and os.path.getsize(temp_raw) > 0:
-                with open(temp_raw, 'rb') as f:
-                    pcm_data = f.read()
-                    if len(pcm_data) > 0:
-                        print(f"RAW PCM conversion successful: {len(pcm_data)} bytes")
-                        return pcm_data
-            else:
-                print(f"RAW PCM conversion failed: {result.stderr}")
-                        
-        except Exception as e:
-            print(f"RAW PCM conversion failed: {e}")
-        
-        # Methode 3: Versuche verschiedene Input-Formate
-        for input_format in ['webm', 'ogg', 'opus']:
-            try:
-                cmd = [
-                    'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
-                    '-f', input_format, '-i', temp_webm,
-                    '-ar', '16000', '-ac', '1', '-f', 's16le',
-                    temp_raw
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-                
-                if result.returncode == 0 and os.path.exists(temp_raw) and os.path.getsize(temp_raw) > 0:
-                    with open(temp_raw, 'rb') as f:
-                        pcm_data = f.read()
-                        if len(pcm_data) > 0:
-                            print(f"Format {input_format} conversion successful: {len(pcm_data)} bytes PCM")
-                            return pcm_data
-                            
-            except Exception as e:
-                continue
-        
-        print(f"All conversion methods failed for {len(audio_data)} bytes")
-        return b""
-            
-    except Exception as e:
-        print(f"Critical audio conversion error: {e}")
-        return b""
-    finally:
-        # Cleanup temporäre Dateien
-        for temp_file in [temp_webm, temp_wav, temp_raw]:
-            if os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
-
-def convert_webm_to_pcm_buffered(audio_data: bytes, connection_id: str) -> bytes:
-    """
-    Konvertiert gesammelte WebM/Opus Audio-Chunks zu 16-bit PCM für Vosk.
-    Optimiert für WebM-Streaming mit fragmentierten Chunks.
-    """
-    import subprocess
-    import tempfile
-    
-    timestamp = uuid.uuid4().hex[:8]
-    
-    # Prüfe Datengrößse
-    if len(audio_data) < 200:
-        print(f"Combined audio chunk too small ({len(audio_data)} bytes), skipping")
-        return b""
-    
-    # Temporäre Dateien
-    temp_webm = f"/tmp/vosk_combined_{connection_id}_{timestamp}.webm"
-    temp_wav = f"/tmp/vosk_combined_{connection_id}_{timestamp}.wav"
-    temp_raw = f"/tmp/vosk_combined_{connection_id}_{timestamp}.raw"
-    
-    try:
-        # Schreibe kombinierte WebM-Daten
-        with open(temp_webm, "wb") as f:
-            f.write(audio_data)
-        
-        print(f"Processing combined audio chunk: {len(audio_data)} bytes")
-        
-        # Methode 1: WebM zu WAV mit ffmpeg (robusteste Methode für kombinierte Daten)
-        try:
-            cmd = [
-                'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
-                '-fflags', '+genpts',  # Generate PTS für fragmentierte Streams
-                '-i', temp_webm,
-                '-ar', '16000',  # 16kHz Sample Rate für Vosk
-                '-ac', '1',      # Mono
-                '-f', 'wav',     # WAV Format
-                '-acodec', 'pcm_s16le',  # 16-bit PCM
-                temp_wav
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
-            
-            if result.returncode == 0 and os.path.exists(temp_wav) and os.path.getsize(temp_wav) > 44:
-                # Lese WAV-Datei und extrahiere PCM-Daten
-                with wave.open(temp_wav, 'rb') as wav_file:
-                    # Validiere WAV-Format
-                    sample_rate = wav_file.getframerate()
-                    channels = wav_file.getnchannels()
-                    sample_width = wav_file.getsampwidth()
-                    
-                    print(f"Combined WAV: {sample_rate}Hz, {channels} channels, {sample_width} bytes/sample")
-                    
-                    pcm_data = wav_file.readframes(wav_file.getnframes())
-                    print(f"Successfully converted combined chunk to {len(pcm_data)} bytes PCM")
-                    return pcm_data
-            else:
-                print(f"Combined FFmpeg conversion failed: {result.stderr}")
-                    
-        except subprocess.TimeoutExpired:
-            print("Combined FFmpeg timeout")
-        except Exception as e:
-            print(f"Combined FFmpeg conversion failed: {e}")
-        
-        # Methode 2: Direct WebM to RAW PCM (für fragmentierte Streams)
-        try:
-            cmd = [
-                'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
-                '-fflags', '+genpts',  # Generate PTS
-                '-analyzeduration', '1000000',  # Analysiere länger für fragmentierte Streams
-                '-probesize', '1000000',
-                '-i', temp_webm,
-                '-ar', '16000',
-                '-ac', '1',
-                '-f', 's16le',  # 16-bit little-endian PCM
-                temp_raw
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
-            
-            if result.returncode == 0 and os.path.exists(temp_raw) and os.path.getsize(temp_raw) > 0:
-                with open(temp_raw, 'rb') as f:
-                    pcm_data = f.read()
-                    if len(pcm_data) > 0:
-                        print(f"Combined RAW PCM conversion successful: {len(pcm_data)} bytes")
-                        return pcm_data
-            else:
-                print(f"Combined RAW PCM conversion failed: {result.stderr}")
-                        
-        except Exception as e:
-            print(f"Combined RAW PCM conversion failed: {e}")
-        
-        # Methode 3: Versuche als concatenated WebM stream
-        try:
-            cmd = [
-                'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
-                '-f', 'matroska', '-i', temp_webm,  # Explizit Matroska/WebM format
-                '-ar', '16000', '-ac', '1', '-f', 's16le',
-                temp_raw
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode == 0 and os.path.exists(temp_raw) and os.path.getsize(temp_raw) > 0:
-                with open(temp_raw, 'rb') as f:
-                    pcm_data = f.read()
-                    if len(pcm_data) > 0:
-                        print(f"Matroska format conversion successful: {len(pcm_data)} bytes PCM")
-                        return pcm_data
-                        
-        except Exception as e:
-            print(f"Matroska conversion failed: {e}")
-        
-        print(f"All combined conversion methods failed for {len(audio_data)} bytes")
-        return b""
-            
-    except Exception as e:
-        print(f"Critical combined audio conversion error: {e}")
-        return b""
-    finally:
-        # Cleanup temporäre Dateien
-        for temp_file in [temp_webm, temp_wav, temp_raw]:
-            if os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
-
 def extract_webm_header(webm_data: bytes) -> bytes:
     """
     Extrahiert den WebM-Header aus vollständigen WebM-Daten.
@@ -845,114 +1186,6 @@ def build_continuous_webm_stream(chunks: list, header: bytes, connection_id: str
         print(f"Error building continuous WebM stream: {e}")
         return b''
 
-def convert_continuous_webm_to_pcm(webm_data: bytes, connection_id: str) -> bytes:
-    """
-    Konvertiert einen kontinuierlichen WebM-Stream zu 16-bit PCM für Vosk.
-    Optimiert für rekonstruierte WebM-Streams aus fragmentierten Chunks.
-    """
-    import subprocess
-    import tempfile
-    
-    timestamp = uuid.uuid4().hex[:8]
-    
-    if len(webm_data) < 500:
-        print(f"WebM stream too small ({len(webm_data)} bytes), skipping")
-        return b""
-    
-    # Temporäre Dateien
-    temp_webm = f"/tmp/vosk_continuous_{connection_id}_{timestamp}.webm"
-    temp_wav = f"/tmp/vosk_continuous_{connection_id}_{timestamp}.wav"
-    temp_raw = f"/tmp/vosk_continuous_{connection_id}_{timestamp}.raw"
-    
-    try:
-        # Schreibe kontinuierlichen WebM-Stream
-        with open(temp_webm, "wb") as f:
-            f.write(webm_data)
-        
-        print(f"Processing continuous WebM stream: {len(webm_data)} bytes")
-        
-        # Methode 1: WebM zu WAV mit erweiterten Parametern für rekonstruierte Streams
-        try:
-            cmd = [
-                'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
-                '-fflags', '+genpts+igndts',  # Generate PTS + ignore DTS für rekonstruierte Streams
-                '-analyzeduration', '2000000',  # Längere Analyse für fragmentierte Streams
-                '-probesize', '2000000',
-                '-err_detect', 'ignore_err',  # Ignoriere kleinere Fehler in rekonstruierten Streams
-                '-i', temp_webm,
-                '-ar', '16000',  # 16kHz Sample Rate für Vosk
-                '-ac', '1',      # Mono
-                '-f', 'wav',     # WAV Format
-                '-acodec', 'pcm_s16le',  # 16-bit PCM
-                temp_wav
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=20)
-            
-            if result.returncode == 0 and os.path.exists(temp_wav) and os.path.getsize(temp_wav) > 44:
-                # Lese WAV-Datei und extrahiere PCM-Daten
-                with wave.open(temp_wav, 'rb') as wav_file:
-                    sample_rate = wav_file.getframerate()
-                    channels = wav_file.getnchannels()
-                    sample_width = wav_file.getsampwidth()
-                    
-                    print(f"Continuous WAV: {sample_rate}Hz, {channels} channels, {sample_width} bytes/sample")
-                    
-                    pcm_data = wav_file.readframes(wav_file.getnframes())
-                    print(f"Successfully converted continuous stream to {len(pcm_data)} bytes PCM")
-                    return pcm_data
-            else:
-                print(f"Continuous FFmpeg conversion failed: {result.stderr}")
-                    
-        except subprocess.TimeoutExpired:
-            print("Continuous FFmpeg timeout")
-        except Exception as e:
-            print(f"Continuous FFmpeg conversion failed: {e}")
-        
-        # Methode 2: Direct WebM to RAW PCM mit Fehlertoleranz
-        try:
-            cmd = [
-                'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
-                '-fflags', '+genpts+igndts',
-                '-analyzeduration', '2000000',
-                '-probesize', '2000000',
-                '-err_detect', 'ignore_err',
-                '-i', temp_webm,
-                '-ar', '16000',
-                '-ac', '1',
-                '-f', 's16le',  # 16-bit little-endian PCM
-                temp_raw
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=20)
-            
-            if result.returncode == 0 and os.path.exists(temp_raw) and os.path.getsize(temp_raw) > 0:
-                with open(temp_raw, 'rb') as f:
-                    pcm_data = f.read()
-                    if len(pcm_data) > 0:
-                        print(f"Continuous RAW PCM conversion successful: {len(pcm_data)} bytes")
-                        return pcm_data
-            else:
-                print(f"Continuous RAW PCM conversion failed: {result.stderr}")
-                        
-        except Exception as e:
-            print(f"Continuous RAW PCM conversion failed: {e}")
-        
-        print(f"All continuous conversion methods failed for {len(webm_data)} bytes")
-        return b""
-            
-    except Exception as e:
-        print(f"Critical continuous audio conversion error: {e}")
-        return b""
-    finally:
-        # Cleanup temporäre Dateien
-        for temp_file in [temp_webm, temp_wav, temp_raw]:
-            if os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=7860)
@@ -0,0 +1,174 @@
+"""
+Memory-pressure driven garbage collection.
+
+``transcribe()`` and the live chunk path used to start every call with a
+full ``gc.collect()`` plus ``torch.cuda.empty_cache()``: tens of milliseconds
+per chunk during which every other thread is stalled by the GIL, even though
+there was almost never anything to free. ``MemoryManager`` collects only
+when it is worth it:
+
+  * after models were unloaded (called by the model registry),
+  * when the RSS grew by ``MEMORY_RSS_GROWTH_MB`` since the last collection
+    or is above ``MEMORY_RSS_HIGH_MB``,
+  * when the CUDA caching allocator holds more than ``MEMORY_CUDA_SLACK_MB``
+    reserved but unused memory (then only ``empty_cache`` runs).
+
+Forced and automatic full collections are timed and counted in the metrics
+registry (``memory.*``), so the time saved is visible in ``/api/metrics``.
+"""
+
+import gc
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from backend.metrics import get_metrics
+
+# === Konfiguration ===
+# Absolute RSS-Grenze in MB (0 = nur das Wachstum seit der letzten Collection zählt)
+MEMORY_RSS_HIGH_MB = float(os.environ.get("ASR_MEMORY_RSS_HIGH_MB", "0"))
+MEMORY_RSS_GROWTH_MB = float(os.environ.get("ASR_MEMORY_RSS_GROWTH_MB", "512"))
+# Reservierter, aber ungenutzter CUDA-Speicher, ab dem empty_cache() läuft
+MEMORY_CUDA_SLACK_MB = float(os.environ.get("ASR_MEMORY_CUDA_SLACK_MB", "1024"))
+# Mindestabstand zwischen zwei Prüfungen (Sekunden)
+MEMORY_CHECK_INTERVAL = 0.5
+
+MB = 1024 * 1024
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (Linux), 0 elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _cuda():
+    """``torch.cuda`` if torch is already imported and CUDA is initialized, else None."""
+    torch = sys.modules.get("torch")
+    if torch is None or not torch.cuda.is_available() or not torch.cuda.is_initialized():
+        return None
+    return torch.cuda
+
+
+class MemoryManager:
+    """Threshold-based ``gc.collect()`` / ``empty_cache()`` with timing metrics."""
+
+    def __init__(self, rss_high_mb: float = MEMORY_RSS_HIGH_MB, rss_growth_mb: float = MEMORY_RSS_GROWTH_MB,
+                 cuda_slack_mb: float = MEMORY_CUDA_SLACK_MB):
+        self.rss_high = rss_high_mb * MB
+        self.rss_growth = rss_growth_mb * MB
+        self.cuda_slack = cuda_slack_mb * MB
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._rss_after_collect = current_rss()
+        self._gc_start: Optional[float] = None
+
+    def install_gc_callbacks(self):
+        """Time the interpreter's own full (generation 2) collections as well."""
+        if self._gc_callback not in gc.callbacks:
+            gc.callbacks.append(self._gc_callback)
+
+    def _gc_callback(self, phase: str, info: Dict[str, Any]):
+        if info.get("generation") != 2:
+            return
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        elif self._gc_start is not None:
+            metrics = get_metrics()
+            metrics.increment("memory.gc_full_collections")
+            metrics.observe("memory.gc_full_seconds", time.perf_counter() - self._gc_start)
+            self._gc_start = None
+
+    def maybe_collect(self) -> bool:
+        """
+        Collect if a threshold is crossed; cheap enough to call before every inference.
+
+        Returns:
+            True if a collection ran
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_check < MEMORY_CHECK_INTERVAL:
+                return False
+            self._last_check = now
+            baseline = self._rss_after_collect
+
+        metrics = get_metrics()
+        metrics.increment("memory.checks")
+        rss = current_rss()
+        metrics.set_gauge("memory.rss_mb", round(rss / MB, 1))
+        if rss and (rss - baseline > self.rss_growth or (self.rss_high and rss > self.rss_high)):
+            self.collect("rss")
+            return True
+
+        cuda = _cuda()
+        if cuda is not None:
+            reserved = cuda.memory_reserved()
+            metrics.set_gauge("memory.cuda_reserved_mb", round(reserved / MB, 1))
+            if reserved - cuda.memory_allocated() > self.cuda_slack:
+                self._empty_cuda_cache(cuda)
+                return True
+        return False
+
+    def collect(self, reason: str):
+        """Full collection plus ``empty_cache`` now (e.g. after models were unloaded)."""
+        metrics = get_metrics()
+        start = time.perf_counter()
+        collected = gc.collect()
+        metrics.observe("memory.gc_seconds", time.perf_counter() - start)
+        metrics.increment("memory.gc_collections")
+        metrics.increment(f"memory.gc_collections.{reason}")
+        metrics.increment("memory.gc_collected_objects", collected)
+
+        cuda = _cuda()
+        if cuda is not None:
+            self._empty_cuda_cache(cuda)
+
+        rss = current_rss()
+        metrics.set_gauge("memory.rss_mb", round(rss / MB, 1))
+        with self._lock:
+            self._rss_after_collect = rss
+
+    def _empty_cuda_cache(self, cuda):
+        # Gibt reservierte, ungenutzte Blöcke des Caching-Allocators an den Treiber zurück
+        start = time.perf_counter()
+        cuda.empty_cache()
+        metrics = get_metrics()
+        metrics.observe("memory.cuda_empty_cache_seconds", time.perf_counter() - start)
+        metrics.set_gauge("memory.cuda_reserved_mb", round(cuda.memory_reserved() / MB, 1))
+
+    def stats(self) -> Dict[str, Any]:
+        """Collections, GC time and the memory figures the thresholds are compared against."""
+        metrics = get_metrics()
+        timings = metrics.snapshot()["timings"]
+        cuda = _cuda()
+        return {
+            "rss_mb": round(current_rss() / MB, 1),
+            "rss_after_last_collect_mb": round(self._rss_after_collect / MB, 1),
+            "cuda_reserved_mb": round(cuda.memory_reserved() / MB, 1) if cuda is not None else None,
+            "cuda_allocated_mb": round(cuda.memory_allocated() / MB, 1) if cuda is not None else None,
+            "checks": metrics.counter("memory.checks"),
+            "forced_collections": timings.get("memory.gc_seconds"),
+            "full_collections": timings.get("memory.gc_full_seconds"),
+            "cuda_empty_cache": timings.get("memory.cuda_empty_cache_seconds"),
+        }
+
+
+# Global instance for reuse
+_memory_manager: Optional[MemoryManager] = None
+_memory_manager_lock = threading.Lock()
+
+
+def get_memory_manager() -> MemoryManager:
+    """Get the process-wide memory manager (installs the GC timing callback on first use)."""
+    global _memory_manager
+    with _memory_manager_lock:
+        if _memory_manager is None:
+            _memory_manager = MemoryManager()
+            _memory_manager.install_gc_callbacks()
+        return _memory_manager
@@ -0,0 +1,78 @@
+"""
+In-process metrics for the ASR API.
+
+A small thread-safe registry of counters, gauges and timing summaries that
+the endpoints, executors and caches update. ``/api/metrics`` returns a JSON
+snapshot; there is no external metrics dependency.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and timing summaries keyed by name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+
+    def increment(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float):
+        """Record one duration (count, sum and max are kept)."""
+        with self._lock:
+            timing = self._timings.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+            timing["count"] += 1
+            timing["sum"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Measure the duration of a ``with`` block and record it under ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of all metrics, with derived averages for timings."""
+        with self._lock:
+            timings = {
+                name: {
+                    "count": t["count"],
+                    "sum": round(t["sum"], 4),
+                    "avg": round(t["sum"] / t["count"], 4) if t["count"] else 0.0,
+                    "max": round(t["max"], 4),
+                }
+                for name, t in self._timings.items()
+            }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": timings,
+            }
+
+
+# Global instance for reuse
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return _metrics
@@ -0,0 +1,390 @@
+"""
+Dedicated model-host processes.
+
+By default every API process owns its own copy of Whisper, SpeechBrain,
+MultiMed and the grammar model and runs inference on its own threads. With
+``ASR_MODEL_HOST`` set, one or more model-host processes own the models
+instead and the API processes only handle HTTP/WebSocket traffic:
+
+  * PCM goes through ``multiprocessing.shared_memory``: every client
+    connection owns one segment, the audio is written into it once and the
+    host reads it as a numpy view without copying or pickling it;
+  * requests and the resulting text travel over a unix socket
+    (``multiprocessing.connection``), which only carries small messages;
+  * the host runs the requests of all API processes through its own dynamic
+    batchers, so chunks from different workers share a forward pass; all
+    other requests are serialized per model, since every connection thread
+    uses the host's single instance of each model.
+
+Event-loop processes stay small and their number can be scaled
+independently of the inference capacity on one machine. Vosk and the
+spellchecker stay in the API process (streaming sessions need a local
+recognizer; the spellchecker is cheap).
+
+Start a host with ``python -m backend.model_host --socket PATH`` or via
+``run.py --prod --model-hosts N``.
+"""
+
+import argparse
+import contextlib
+import itertools
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import AuthenticationError, resource_tracker
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.metrics import get_metrics
+
+# === Konfiguration ===
+# Unix-Sockets der Model-Hosts (kommagetrennt, leer = Inferenz im eigenen Prozess)
+MODEL_HOST_SOCKETS = [
+    path.strip() for path in os.environ.get("ASR_MODEL_HOST", "").split(",") if path.strip()
+]
+# Optionaler gemeinsamer Schlüssel für die Verbindung (zusätzlich zu den Dateirechten des Sockets)
+MODEL_HOST_AUTHKEY = os.environ.get("ASR_MODEL_HOST_AUTHKEY", "").encode() or None
+# Wie lange ein Client auf einen (noch startenden) Host wartet
+MODEL_HOST_CONNECT_TIMEOUT = float(os.environ.get("ASR_MODEL_HOST_CONNECT_TIMEOUT", "60"))
+# Mindestgröße eines Shared-Memory-Segments: 30s float32 (ein Whisper-Fenster)
+MODEL_HOST_MIN_SEGMENT_BYTES = 30 * 16000 * 4
+# Verzeichnis der Sockets bei run.py --prod --model-hosts
+MODEL_HOST_SOCKET_DIR = os.environ.get("ASR_MODEL_HOST_DIR", "/tmp/ai-speech")
+
+# Gesetzt im Host-Prozess selbst: dort wird nie weitergeleitet
+_serving = False
+
+
+class ModelHostError(RuntimeError):
+    """Raised when a model host is unreachable or the request failed in the host."""
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    """Attach to a client's segment without registering it with this process' resource tracker."""
+    try:
+        return SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        shm = SharedMemory(name=name)
+        # Sonst löscht der Resource-Tracker des Hosts beim Beenden die Segmente der Clients
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+# === Client (API-Prozess) ===
+
+class _Channel:
+    """One connection to a host plus the shared-memory segment used for its audio."""
+
+    def __init__(self, address: str):
+        self.address = address
+        self.conn: Connection = self._connect(address)
+        self.shm: Optional[SharedMemory] = None
+
+    @staticmethod
+    def _connect(address: str) -> Connection:
+        deadline = time.monotonic() + MODEL_HOST_CONNECT_TIMEOUT
+        while True:
+            try:
+                return Client(address, family="AF_UNIX", authkey=MODEL_HOST_AUTHKEY)
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                if time.monotonic() > deadline:
+                    raise ModelHostError(f"Model host {address} not reachable: {e}")
+                time.sleep(0.5)
+
+    def write_audio(self, audio: np.ndarray) -> Tuple[str, int]:
+        """Copy the audio into the shared segment (growing it if needed)."""
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        if self.shm is None or self.shm.size < audio.nbytes:
+            self._release_shm()
+            size = max(MODEL_HOST_MIN_SEGMENT_BYTES, 1 << (audio.nbytes - 1).bit_length())
+            self.shm = SharedMemory(create=True, size=size)
+        np.ndarray(len(audio), dtype=np.float32, buffer=self.shm.buf)[:] = audio
+        return self.shm.name, len(audio)
+
+    def _release_shm(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def close(self):
+        try:
+            self.conn.close()
+        finally:
+            self._release_shm()
+
+
+class ModelHostClient:
+    """
+    Thread-safe client for the model hosts.
+
+    Every concurrent call uses its own channel (connection and segment);
+    idle channels are reused. New channels are spread over the hosts
+    round-robin.
+    """
+
+    def __init__(self, addresses: List[str]):
+        self.addresses = addresses
+        self._next_address = itertools.cycle(addresses)
+        self._idle: "queue.LifoQueue[_Channel]" = queue.LifoQueue()
+        self._channels: List[_Channel] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> _Channel:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            address = next(self._next_address)
+        channel = _Channel(address)
+        with self._lock:
+            self._channels.append(channel)
+        return channel
+
+    def _discard(self, channel: _Channel):
+        with self._lock:
+            if channel in self._channels:
+                self._channels.remove(channel)
+        try:
+            channel.close()
+        except OSError:
+            pass
+
+    def _call(self, op: str, args: Dict[str, Any], audio: Optional[np.ndarray] = None) -> Any:
+        metrics = get_metrics()
+        channel = self._acquire()
+        start = time.perf_counter()
+        try:
+            if audio is not None:
+                args["shm"], args["samples"] = channel.write_audio(audio)
+            channel.conn.send((op, args))
+            status, value = channel.conn.recv()
+        except (EOFError, OSError) as e:
+            # Host neu gestartet oder abgestürzt: Verbindung verwerfen, der nächste Aufruf verbindet neu
+            self._discard(channel)
+            metrics.increment("model_host.errors")
+            raise ModelHostError(f"Model host {channel.address} failed: {e}")
+        self._idle.put(channel)
+        metrics.observe(f"model_host.{op}_seconds", time.perf_counter() - start)
+        if status != "ok":
+            raise ModelHostError(value)
+        return value
+
+    def run_asr(self, model_name: str, audio, whisper_model_id: Optional[str] = None,
+                batched: bool = False) -> Optional[str]:
+        """``_run_asr`` in the host; PCM via shared memory, file paths as they are."""
+        args = {"model_name": model_name, "whisper_model_id": whisper_model_id, "batched": batched}
+        if isinstance(audio, np.ndarray):
+            return self._call("asr", args, audio)
+        args["path"] = audio
+        return self._call("asr", args)
+
+    def whisper_words(self, model_id: str, audio: np.ndarray, prompt: str) -> List[tuple]:
+        """Word timestamps for the streaming mode as ``(start, end, text)`` tuples."""
+        return self._call("words", {"model_id": model_id, "prompt": prompt}, audio)
+
+    def grammar(self, sentences: List[str]) -> List[str]:
+        return self._call("grammar", {"sentences": sentences})
+
+    def close(self):
+        with self._lock:
+            channels, self._channels = self._channels, []
+        for channel in channels:
+            try:
+                channel.close()
+            except OSError:
+                pass
+
+
+# Global instance for reuse
+_client: Optional[ModelHostClient] = None
+_client_lock = threading.Lock()
+
+
+def get_model_host_client() -> Optional[ModelHostClient]:
+    """Client for the configured model hosts, or None if inference runs in this process."""
+    global _client
+    if not MODEL_HOST_SOCKETS or _serving:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = ModelHostClient(MODEL_HOST_SOCKETS)
+        return _client
+
+
+def close_model_host_client():
+    """Close all channels and unlink their segments (used on application shutdown)."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+
+# === Host ===
+
+# Ein Lock pro Modell im Host: alle API-Worker teilen sich diese eine Modellinstanz
+_model_locks: Dict[str, threading.Lock] = {}
+_model_locks_lock = threading.Lock()
+
+
+def _model_lock(op: str, args: Dict[str, Any]):
+    """
+    Lock serializing a request on its model, or a no-op context.
+
+    Batched chunks, MultiMed and grammar requests end in a ``DynamicBatcher``,
+    whose single thread already dispatches them one forward pass at a time;
+    holding a lock there would only prevent requests from different
+    connections from sharing a batch.
+    """
+    if op == "words":
+        key = f"Whisper {args['model_id']}"
+    elif op == "asr" and not args["batched"] and args["model_name"] != "MultiMed Whisper":
+        model_name = args["model_name"]
+        if model_name.startswith("Whisper"):
+            key = f"Whisper {args['whisper_model_id'] or model_name.split(' ')[1].lower()}"
+        else:
+            key = model_name
+    else:
+        return contextlib.nullcontext()
+    with _model_locks_lock:
+        return _model_locks.setdefault(key, threading.Lock())
+
+
+def _handle_connection(conn: Connection):
+    from backend import transcription
+
+    shm: Optional[SharedMemory] = None
+    metrics = get_metrics()
+    try:
+        while True:
+            try:
+                op, args = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                audio = None
+                if "shm" in args:
+                    if shm is None or shm.name != args["shm"]:
+                        if shm is not None:
+                            shm.close()
+                        shm = _attach_shared_memory(args["shm"])
+                    # Sicht auf den Speicher des Clients, keine Kopie
+                    audio = np.ndarray(args["samples"], dtype=np.float32, buffer=shm.buf)
+
+                if op == "asr":
+                    with _model_lock(op, args):
+                        value = transcription._run_asr(
+                            args["model_name"], audio if audio is not None else args["path"],
+                            args["whisper_model_id"], args["batched"]
+                        )
+                elif op == "words":
+                    with _model_lock(op, args):
+                        value = [tuple(word) for word in transcription.whisper_words(args["model_id"], audio, args["prompt"])]
+                elif op == "grammar":
+                    value = transcription.grammar_batcher.submit_many(args["sentences"])
+                elif op == "ping":
+                    value = "pong"
+                else:
+                    raise ValueError(f"Unknown model host operation {op!r}")
+                # Sicht freigeben, bevor das Segment gewechselt oder geschlossen wird
+                audio = None
+                metrics.increment(f"model_host.requests.{op}")
+                conn.send(("ok", value))
+            except Exception as e:
+                audio = None
+                print(f"Model host request {op} failed: {e}")
+                conn.send(("error", str(e)))
+    finally:
+        if shm is not None:
+            shm.close()
+        conn.close()
+
+
+def _terminate(signum, frame):
+    raise SystemExit(0)
+
+
+def serve_model_host(address: str, warmup_models: Optional[List[str]] = None):
+    """Serve inference requests on a unix socket until the process is terminated."""
+    global _serving
+    _serving = True
+    from backend.transcription import warmup_tasks
+    from backend.warmup import WARMUP_MODELS, get_warmup_scheduler
+
+    os.makedirs(os.path.dirname(address) or ".", exist_ok=True)
+    if os.path.exists(address):
+        os.remove(address)  # Socket eines beendeten Hosts
+    listener = Listener(address, family="AF_UNIX", authkey=MODEL_HOST_AUTHKEY)
+    os.chmod(address, 0o600)
+    # SIGTERM beendet den Host regulär (Socket-Datei wird aufgeräumt)
+    signal.signal(signal.SIGTERM, _terminate)
+
+    # Modelle laden, während schon Verbindungen angenommen werden
+    get_warmup_scheduler().start(warmup_tasks(WARMUP_MODELS if warmup_models is None else warmup_models))
+    print(f"Model host listening on {address} (pid {os.getpid()})")
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, AuthenticationError) as e:
+                # z.B. falscher Authkey: nur diese Verbindung verwerfen
+                print(f"Model host: connection rejected: {e}")
+                continue
+            threading.Thread(target=_handle_connection, args=(conn,), name="model-host-conn", daemon=True).start()
+    finally:
+        listener.close()
+
+
+def start_model_hosts(count: int) -> List[subprocess.Popen]:
+    """
+    Start ``count`` host processes and route this process' inference to them.
+
+    Must run before the API workers are forked (``run.py --prod``), so they
+    inherit the socket list.
+    """
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sockets = [os.path.join(MODEL_HOST_SOCKET_DIR, f"model-host-{index}.sock") for index in range(count)]
+    hosts = [
+        subprocess.Popen([sys.executable, "-m", "backend.model_host", "--socket", address], cwd=project_dir)
+        for address in sockets
+    ]
+    MODEL_HOST_SOCKETS[:] = sockets
+    print(f"Started {count} model hosts: {', '.join(sockets)}")
+    return hosts
+
+
+def stop_model_hosts(hosts: List[subprocess.Popen], timeout: float = 10.0):
+    for host in hosts:
+        host.terminate()
+    for host in hosts:
+        try:
+            host.wait(timeout)
+        except subprocess.TimeoutExpired:
+            host.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI-Speech Model-Host")
+    parser.add_argument("--socket", default=MODEL_HOST_SOCKETS[0] if MODEL_HOST_SOCKETS else
+                        os.path.join(MODEL_HOST_SOCKET_DIR, "model-host-0.sock"))
+    parser.add_argument("--warmup", default=None, help="Kommagetrennte Modelle für den Warmup (Standard: ASR_WARMUP_MODELS)")
+    args = parser.parse_args()
+    serve_model_host(
+        args.socket,
+        [name.strip() for name in args.warmup.split(",") if name.strip()] if args.warmup is not None else None
+    )
+
+
+if __name__ == "__main__":
+    # Über den Paketnamen starten, damit backend.transcription dasselbe Modul (und _serving) sieht
+    from backend.model_host import main as run_host
+    run_host()
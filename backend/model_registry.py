@@ -0,0 +1,383 @@
+"""
+Central registry for all loaded ASR and post-processing models.
+
+Every model (Whisper sizes, SpeechBrain, MultiMed, the grammar corrector,
+Vosk) is registered with a loader. The registry loads models on first use,
+measures their resident size, keeps the total under a configurable memory
+budget by unloading the least recently used idle models, and unloads models
+that have not been used for longer than an idle TTL. Models currently used
+by a request or a streaming session (``acquire``/``release``) are never
+unloaded.
+
+The registry is also the single source of truth for the model status shown
+in the UI (``/api/model-status``).
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.memory import current_rss, get_memory_manager
+from backend.metrics import get_metrics
+
+# === Konfiguration ===
+# Speicherbudget für alle geladenen Modelle zusammen
+MODEL_MEMORY_BUDGET_BYTES = int(os.environ.get("ASR_MODEL_BUDGET_MB", "12288")) * 1024 * 1024
+# Modelle, die länger ungenutzt sind, werden entladen (0 = nie)
+MODEL_IDLE_TTL_SECONDS = float(os.environ.get("ASR_MODEL_IDLE_TTL", "1800"))
+# Wie oft der Hintergrund-Thread nach ungenutzten Modellen sucht
+MODEL_REAPER_INTERVAL_SECONDS = 60
+
+
+def estimate_model_bytes(model: Any) -> int:
+    """
+    Size of a model's weights in bytes, 0 if it cannot be determined.
+
+    Works for torch modules (Whisper, SpeechBrain, transformers models),
+    transformers pipelines (via ``.model``) and tuples of those.
+    """
+    if isinstance(model, (tuple, list)):
+        return sum(estimate_model_bytes(part) for part in model)
+    module = getattr(model, "model", None) if not hasattr(model, "parameters") else model
+    if module is None or not hasattr(module, "parameters"):
+        return 0
+    try:
+        total = sum(p.numel() * p.element_size() for p in module.parameters())
+        if hasattr(module, "buffers"):
+            total += sum(b.numel() * b.element_size() for b in module.buffers())
+        return int(total)
+    except Exception:
+        return 0
+
+
+class _ModelEntry:
+    """Bookkeeping for one registered model."""
+
+    def __init__(self, name: str, loader: Callable[[], Any], unloader: Optional[Callable[[Any], None]],
+                 expected_bytes: int, pinned: bool):
+        self.name = name
+        self.loader = loader
+        self.unloader = unloader
+        self.expected_bytes = expected_bytes
+        self.pinned = pinned
+        self.model = None
+        self.size_bytes = 0
+        self.loading = False
+        self.in_use = 0
+        self.last_used = 0.0
+        self.load_seconds = 0.0
+        self.error: Optional[str] = None
+        self.load_lock = threading.Lock()
+        # Serialisiert die Inferenz auf dieser einen Modellinstanz (siehe ``use(exclusive=True)``)
+        self.inference_lock = threading.RLock()
+
+
+class ModelRegistry:
+    """
+    Loads, tracks and unloads models under a memory budget.
+
+    Typical use::
+
+        with registry.use("Whisper base") as model:
+            model.transcribe(audio)
+    """
+
+    def __init__(self, budget_bytes: int = MODEL_MEMORY_BUDGET_BYTES,
+                 idle_ttl: float = MODEL_IDLE_TTL_SECONDS):
+        self.budget_bytes = budget_bytes
+        self.idle_ttl = idle_ttl
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._lock = threading.Lock()
+        self._reaper_thread = None
+        self._release_hooks: List[Callable[[], None]] = []
+
+    def register(self, name: str, loader: Callable[[], Any], unloader: Optional[Callable[[Any], None]] = None,
+                 expected_bytes: int = 0, pinned: bool = False):
+        """
+        Register a model under its UI name.
+
+        Args:
+            name: Model name (e.g. "Whisper base")
+            loader: Loads and returns the model
+            unloader: Optional cleanup called with the model after it was dropped
+            expected_bytes: Size estimate used to make room before the first load
+            pinned: Never unload this model automatically
+        """
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _ModelEntry(name, loader, unloader, expected_bytes, pinned)
+
+    def pin(self, name: str):
+        """Never unload ``name`` automatically (e.g. weights shared with forked workers)."""
+        self._entry(name).pinned = True
+
+    def _reset_after_fork(self):
+        # Threads überleben fork() nicht: Locks neu anlegen, Reaper im Kind bei Bedarf neu starten
+        self._lock = threading.Lock()
+        self._reaper_thread = None
+        for entry in self._entries.values():
+            entry.load_lock = threading.Lock()
+            entry.inference_lock = threading.RLock()
+        if any(entry.model is not None for entry in self._entries.values()):
+            self._start_reaper()
+
+    def add_release_hook(self, hook: Callable[[], None]):
+        """Call ``hook`` after models were unloaded and garbage-collected."""
+        self._release_hooks.append(hook)
+
+    def _after_unload(self):
+        # Gezielte Collection (inkl. CUDA-Cache) nur nach dem Entladen
+        get_memory_manager().collect("model_unload")
+        for hook in self._release_hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"Error in model release hook: {e}")
+        self._update_gauges()
+
+    def is_registered(self, name: str) -> bool:
+        with self._lock:
+            return name in self._entries
+
+    def _entry(self, name: str) -> _ModelEntry:
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Model '{name}' is not registered")
+        return entry
+
+    def _ensure_loaded(self, entry: _ModelEntry, hold: bool) -> Any:
+        """Return the loaded model, loading it first if needed; ``hold`` also marks it in use."""
+        with self._lock:
+            if entry.model is not None:
+                entry.last_used = time.time()
+                entry.in_use += hold
+                return entry.model
+
+        with entry.load_lock:
+            with self._lock:
+                if entry.model is not None:
+                    entry.last_used = time.time()
+                    entry.in_use += hold
+                    return entry.model
+                entry.loading = True
+
+            try:
+                self._make_room(entry.expected_bytes or entry.size_bytes, exclude=entry.name)
+                print(f"Loading model {entry.name}")
+                rss_before = current_rss()
+                start = time.perf_counter()
+                model = entry.loader()
+                load_seconds = time.perf_counter() - start
+                size = estimate_model_bytes(model) or max(0, current_rss() - rss_before) or entry.expected_bytes
+            except Exception as e:
+                with self._lock:
+                    entry.loading = False
+                    entry.error = str(e)
+                get_metrics().increment("model_registry.load_errors")
+                raise
+
+            with self._lock:
+                entry.model = model
+                entry.size_bytes = size
+                entry.load_seconds = load_seconds
+                entry.last_used = time.time()
+                entry.loading = False
+                entry.error = None
+                entry.in_use += hold
+
+        print(f"Model {entry.name} loaded in {load_seconds:.1f}s ({size / 1024 / 1024:.0f} MB)")
+        metrics = get_metrics()
+        metrics.increment("model_registry.loads")
+        metrics.observe(f"model_registry.load_seconds.{entry.name}", load_seconds)
+        # Erst jetzt ist die tatsächliche Größe bekannt
+        self._make_room(0, exclude=entry.name)
+        self._update_gauges()
+        self._start_reaper()
+        return model
+
+    def load(self, name: str) -> Any:
+        """Load a model (if needed) and return it without marking it in use."""
+        return self._ensure_loaded(self._entry(name), hold=False)
+
+    def acquire(self, name: str) -> Any:
+        """Load a model (if needed) and mark it in use until ``release()``."""
+        return self._ensure_loaded(self._entry(name), hold=True)
+
+    def release(self, name: str):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.in_use > 0:
+                entry.in_use -= 1
+                entry.last_used = time.time()
+
+    def inference_lock(self, name: str) -> threading.RLock:
+        """Lock that serializes inference on the shared instance of ``name``."""
+        return self._entry(name).inference_lock
+
+    @contextmanager
+    def use(self, name: str, exclusive: bool = False):
+        """
+        Context manager around ``acquire``/``release``.
+
+        With ``exclusive`` the model's inference lock is held as well. Whisper
+        installs kv-cache and cross-attention hooks on the model for every
+        decode, so two threads must never run inference on the same instance
+        at the same time.
+        """
+        model = self.acquire(name)
+        try:
+            if not exclusive:
+                yield model
+                return
+            lock = self.inference_lock(name)
+            start = time.perf_counter()
+            with lock:
+                get_metrics().observe("model_registry.lock_wait_seconds", time.perf_counter() - start)
+                yield model
+        finally:
+            self.release(name)
+
+    def _resident_bytes(self) -> int:
+        return sum(e.size_bytes for e in self._entries.values() if e.model is not None)
+
+    def _make_room(self, needed_bytes: int, exclude: str):
+        """Unload least recently used idle models until ``needed_bytes`` fit into the budget."""
+        victims = []
+        with self._lock:
+            resident = self._resident_bytes()
+            candidates = sorted(
+                (e for e in self._entries.values()
+                 if e.model is not None and e.in_use == 0 and not e.pinned and e.name != exclude),
+                key=lambda e: e.last_used
+            )
+            for entry in candidates:
+                if resident + needed_bytes <= self.budget_bytes:
+                    break
+                resident -= entry.size_bytes
+                victims.append((entry, entry.model))
+                entry.model = None
+            over_budget = resident + needed_bytes > self.budget_bytes
+
+        evicted = len(victims)
+        for entry, model in victims:
+            print(f"Evicting model {entry.name} ({entry.size_bytes / 1024 / 1024:.0f} MB) to stay within memory budget")
+            get_metrics().increment("model_registry.evictions")
+            self._finish_unload(entry, model)
+            del model
+        # Letzte Referenzen loslassen, bevor gc und Release-Hooks laufen
+        victims.clear()
+        if over_budget:
+            print(f"Warning: models in use exceed the memory budget of {self.budget_bytes / 1024 / 1024:.0f} MB")
+            get_metrics().increment("model_registry.over_budget")
+        if evicted:
+            self._after_unload()
+
+    def _finish_unload(self, entry: _ModelEntry, model: Any):
+        if entry.unloader is not None:
+            try:
+                entry.unloader(model)
+            except Exception as e:
+                print(f"Error unloading model {entry.name}: {e}")
+
+    def unload(self, name: str, force: bool = False) -> bool:
+        """
+        Unload a model now.
+
+        Returns:
+            True if the model was unloaded, False if it was not loaded or is in use
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.model is None or (entry.in_use and not force):
+                return False
+            model = entry.model
+            entry.model = None
+        print(f"Unloading model {name}")
+        self._finish_unload(entry, model)
+        del model
+        self._after_unload()
+        return True
+
+    def reap_idle(self) -> List[str]:
+        """Unload every idle, unpinned model unused for longer than the TTL."""
+        if self.idle_ttl <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            idle = [
+                e.name for e in self._entries.values()
+                if e.model is not None and e.in_use == 0 and not e.pinned and now - e.last_used > self.idle_ttl
+            ]
+        unloaded = [name for name in idle if self.unload(name)]
+        if unloaded:
+            get_metrics().increment("model_registry.idle_unloads", len(unloaded))
+        return unloaded
+
+    def _start_reaper(self):
+        if self.idle_ttl <= 0 or self._reaper_thread is not None:
+            return
+        with self._lock:
+            if self._reaper_thread is not None:
+                return
+            self._reaper_thread = threading.Thread(target=self._reaper, name="model-reaper", daemon=True)
+        self._reaper_thread.start()
+
+    def _reaper(self):
+        interval = min(MODEL_REAPER_INTERVAL_SECONDS, self.idle_ttl)
+        while True:
+            time.sleep(interval)
+            try:
+                self.reap_idle()
+            except Exception as e:
+                print(f"Error in model reaper: {e}")
+
+    def _update_gauges(self):
+        with self._lock:
+            resident = self._resident_bytes()
+            loaded = sum(1 for e in self._entries.values() if e.model is not None)
+        metrics = get_metrics()
+        metrics.set_gauge("model_registry.resident_mb", round(resident / 1024 / 1024, 1))
+        metrics.set_gauge("model_registry.loaded_models", loaded)
+
+    def status(self, name: str) -> Dict[str, Any]:
+        """Status of one model as shown by ``/api/model-status``."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return {"loaded": False, "loading": False, "available": False}
+            return {
+                "loaded": entry.model is not None,
+                "loading": entry.loading,
+                "available": True,
+                "in_use": entry.in_use,
+                "memory_mb": round(entry.size_bytes / 1024 / 1024, 1) if entry.model is not None else 0,
+                "idle_seconds": round(time.time() - entry.last_used, 1) if entry.model is not None else None,
+                "pinned": entry.pinned,
+                "error": entry.error,
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Budget usage plus the status of every registered model."""
+        with self._lock:
+            names = list(self._entries)
+            resident = self._resident_bytes()
+        return {
+            "budget_mb": round(self.budget_bytes / 1024 / 1024, 1),
+            "resident_mb": round(resident / 1024 / 1024, 1),
+            "idle_ttl_seconds": self.idle_ttl,
+            "models": {name: self.status(name) for name in names},
+        }
+
+
+# Global instance for reuse
+_model_registry = ModelRegistry()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_model_registry._reset_after_fork)
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry."""
+    return _model_registry
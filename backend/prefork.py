@@ -0,0 +1,176 @@
+"""
+Pre-fork production server (``run.py --prod``).
+
+``uvicorn --reload`` runs the whole API in one process, so all inference
+shares one GIL and one core pool. In production mode the parent process
+instead:
+
+  1. imports the app and loads the models once (weights only, no inference,
+     so no thread pools exist yet),
+  2. moves every object into the permanent GC generation (``gc.freeze``),
+     so collections in the workers do not write to the shared pages,
+  3. binds the listening socket and forks ``PREFORK_WORKERS`` uvicorn
+     workers on it; the kernel distributes new connections among them.
+
+The model weights are shared copy-on-write by all workers instead of being
+loaded N times. A WebSocket is one TCP connection and stays on the worker
+that accepted it, so all streaming state of a session (Vosk recognizer,
+ring buffers, streaming Whisper) lives in one process. Jobs are shared
+through the SQLite job store. Metrics, caches in memory and
+``/api/model-status`` are per worker.
+
+Only for CPU inference: CUDA cannot be used in a process forked after it
+was initialized, so with a GPU the models are loaded by each worker.
+"""
+
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+# === Konfiguration ===
+PREFORK_WORKERS = int(os.environ.get("ASR_WORKERS", str(max(1, (os.cpu_count() or 1) // 4))))
+# Vor dem fork geladene Modelle (kommagetrennt, Standard: die Warmup-Modelle)
+PREFORK_PRELOAD_MODELS = os.environ.get("ASR_PRELOAD_MODELS")
+# Wartezeit, bevor ein abgestürzter Worker neu gestartet wird
+PREFORK_RESTART_DELAY = 1.0
+PREFORK_BACKLOG = 2048
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Listening socket that is inherited by the forked workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(PREFORK_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _cuda_available() -> bool:
+    torch = sys.modules.get("torch")
+    return torch is not None and torch.cuda.is_available()
+
+
+def _set_torch_threads(threads: int):
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+
+
+def preload(model_names: List[str]) -> List[str]:
+    """Load the models in the parent process; returns the names that were loaded."""
+    from backend.transcription import preload_models
+
+    if _cuda_available():
+        print("Preload skipped: CUDA is available, every worker loads its models itself")
+        return []
+    # Eine OpenMP-Thread-Pool-Instanz im Elternprozess würde den fork nicht überleben
+    _set_torch_threads(1)
+    start = time.perf_counter()
+    loaded = preload_models(model_names)
+    print(f"Preloaded {len(loaded)} models in {time.perf_counter() - start:.1f}s: {', '.join(loaded) or '-'}")
+    return loaded
+
+
+def _run_worker(app, sock: socket.socket, index: int, threads: int, log_level: str):
+    import uvicorn
+
+    # Signal-Handler des Supervisors gelten nicht für den Worker
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    gc.enable()
+    _set_torch_threads(threads)
+    print(f"Worker {index} started (pid {os.getpid()}, {threads} threads)")
+
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def serve_prefork(app_path: str = "backend.main:app", host: str = "0.0.0.0", port: int = 7860,
+                  workers: int = PREFORK_WORKERS, preload_names: Optional[List[str]] = None,
+                  log_level: str = "info"):
+    """
+    Preload, freeze and fork ``workers`` uvicorn workers on one socket.
+
+    Crashed workers are restarted from the preloaded parent. SIGTERM/SIGINT
+    stop all workers.
+    """
+    # Jobs, die beim letzten Beenden liefen, nur einmal hier neu einreihen, nicht in jedem Worker
+    os.environ["ASR_JOB_REQUEUE"] = "0"
+    # Bis zum freeze keine Collections: sie würden gemeinsam genutzte Seiten beschreiben
+    gc.disable()
+
+    from backend.jobs import JobStore
+    from backend.warmup import WARMUP_MODELS
+    import uvicorn.importer
+
+    JobStore(requeue=True).close()
+    app = uvicorn.importer.import_from_string(app_path)
+    if preload_names is None:
+        preload_names = (
+            [name.strip() for name in PREFORK_PRELOAD_MODELS.split(",") if name.strip()]
+            if PREFORK_PRELOAD_MODELS is not None else WARMUP_MODELS
+        )
+    preload(preload_names)
+
+    gc.collect()
+    gc.freeze()
+    sock = bind_socket(host, port)
+    workers = max(1, workers)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"Serving on {host}:{port} with {workers} workers")
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(index: int):
+        # Sonst gibt jeder Worker den gepufferten Output des Elternprozesses noch einmal aus
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                _run_worker(app, sock, index, threads, log_level)
+            except BaseException as e:
+                print(f"Worker {index} failed: {e}")
+                exit_code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(exit_code)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(workers):
+        spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        print(f"Worker {index} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        time.sleep(PREFORK_RESTART_DELAY)
+        if not stopping:
+            spawn(index)
+
+    sock.close()
+    print("All workers stopped")
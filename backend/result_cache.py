@@ -0,0 +1,231 @@
+"""
+Content-addressed cache for complete transcription results.
+
+The same recording is often submitted more than once (model comparisons in
+the UI, retries, re-opened cases). Results are keyed by the SHA-256 of the
+uploaded bytes, the model name and the post-processing configuration, so a
+repeated request returns the stored ``steps`` without decoding or inference.
+
+Two tiers:
+  * an in-memory LRU of recent results
+  * a directory of small JSON files with size-based eviction (oldest access first)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional
+
+# === Konfiguration ===
+RESULT_CACHE_ENABLED = os.environ.get("ASR_RESULT_CACHE", "1") != "0"
+RESULT_CACHE_MEMORY_ENTRIES = int(os.environ.get("ASR_RESULT_CACHE_ENTRIES", "256"))
+RESULT_CACHE_DIR = os.environ.get("ASR_RESULT_CACHE_DIR", "cache/transcriptions")
+RESULT_CACHE_DISK_BYTES = int(os.environ.get("ASR_RESULT_CACHE_DISK_MB", "256")) * 1024 * 1024
+# Erhöhen, wenn sich das Format der gespeicherten Ergebnisse ändert
+RESULT_CACHE_FORMAT = 1
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU mapping with a fixed number of entries."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(0, max_entries)
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class DiskCache:
+    """
+    JSON files in one directory, bounded by total size.
+
+    The index (key -> size, ordered by last access) is rebuilt from the file
+    mtimes on first use; hits refresh the mtime so eviction order survives
+    restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load_index(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.isdir(self.directory):
+            return
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                return None
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError) as e:
+                print(f"Dropping unreadable cache entry {key}: {e}")
+                self._remove(key)
+                return None
+            self._index.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._load_index()
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(temp_path, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except OSError as e:
+                print(f"Could not write cache entry {key}: {e}")
+                return
+            self._total_bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            while self._total_bytes > self.max_bytes and self._index:
+                oldest = next(iter(self._index))
+                self._remove(oldest)
+
+    def _remove(self, key: str):
+        self._total_bytes -= self._index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._load_index()
+            return {"entries": len(self._index), "bytes": self._total_bytes, "max_bytes": self.max_bytes}
+
+
+class CacheLookup(NamedTuple):
+    """Result of ``TranscriptionCache.get``; ``steps`` is None on a miss."""
+    steps: Optional[List[str]]
+    tier: Optional[str]
+    # Dauer der ursprünglichen Verarbeitung, also die bei einem Treffer gesparte Zeit
+    seconds: float = 0.0
+
+
+class TranscriptionCache:
+    """Memory tier in front of a disk tier; disk hits are promoted to memory."""
+
+    def __init__(self, memory_entries: int = RESULT_CACHE_MEMORY_ENTRIES,
+                 directory: str = RESULT_CACHE_DIR, max_disk_bytes: int = RESULT_CACHE_DISK_BYTES):
+        self.memory = LRUCache(memory_entries)
+        self.disk = DiskCache(directory, max_disk_bytes) if max_disk_bytes > 0 else None
+
+    def get(self, key: str) -> CacheLookup:
+        """
+        Look up a result.
+
+        Returns:
+            ``CacheLookup`` with tier "memory" or "disk", or with ``steps`` None on a miss
+        """
+        cached = self.memory.get(key)
+        if cached is not None:
+            return CacheLookup(cached[0], "memory", cached[1])
+        if self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                # Einträge älterer Versionen haben keine Dauer
+                seconds = entry.get("seconds", 0.0)
+                self.memory.put(key, (entry["steps"], seconds))
+                return CacheLookup(entry["steps"], "disk", seconds)
+        return CacheLookup(None, None)
+
+    def put(self, key: str, model_name: str, steps: List[str], seconds: float = 0.0):
+        """Store ``steps`` together with the ``seconds`` it took to produce them."""
+        self.memory.put(key, (steps, seconds))
+        if self.disk is not None:
+            self.disk.put(key, {"model": model_name, "steps": steps, "seconds": seconds, "created": time.time()})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory_entries": len(self.memory),
+            "disk": self.disk.stats() if self.disk is not None else None,
+        }
+
+
+def result_cache_key(audio_bytes: bytes, model_name: str, config: Dict[str, Any]) -> str:
+    """
+    Key for one request: hash of the uploaded bytes, the model and the post-processing config.
+
+    ``config`` must contain everything that changes the produced steps
+    (spellcheck/grammar switches, dictionary version, ...).
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{RESULT_CACHE_FORMAT}\0{model_name}\0".encode("utf-8"))
+    digest.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(audio_bytes)
+    return digest.hexdigest()
+
+
+# Global instance for reuse
+_transcription_cache = None
+_transcription_cache_lock = threading.Lock()
+
+
+def get_transcription_cache() -> Optional[TranscriptionCache]:
+    """Get the shared result cache, or None if disabled via ASR_RESULT_CACHE=0."""
+    global _transcription_cache
+    if not RESULT_CACHE_ENABLED:
+        return None
+    with _transcription_cache_lock:
+        if _transcription_cache is None:
+            _transcription_cache = TranscriptionCache()
+        return _transcription_cache
@@ -0,0 +1,103 @@
+"""
+Fixed-capacity audio ring buffer for streaming sessions.
+
+Per-connection audio used to be kept in growing containers: a list of
+chunks that was concatenated for every window, and a numpy buffer that was
+re-concatenated on every chunk and sliced again when trimmed. Over a long
+dictation that is repeated copying of the whole buffer and constant
+allocator churn.
+
+``AudioRingBuffer`` preallocates its storage once. Every sample is written
+twice, at ``i`` and ``i + capacity`` (a mirrored ring), so any window of at
+most ``capacity`` samples is contiguous in memory: appends cost O(chunk),
+dropping the oldest samples is O(1), and the readable audio is returned as a
+numpy view (or ``memoryview``) without copying.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Mirrored ring buffer of audio samples with zero-copy reads.
+
+    Views returned by ``view``/``memoryview`` alias the internal storage: they
+    stay valid until the next ``append`` and must not be modified. Use
+    ``take`` to get a copy that may outlive further appends (e.g. when the
+    audio is handed to another task).
+    """
+
+    def __init__(self, capacity: int, dtype=np.float32):
+        if capacity <= 0:
+            raise ValueError(f"Ring buffer capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=dtype)
+        # Position des ältesten Samples (0 <= _start < capacity) und Füllstand
+        self._start = 0
+        self._size = 0
+        # Wegen Überlauf überschriebene Samples (seit Erzeugung)
+        self.overwritten = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self._size
+
+    def append(self, samples: np.ndarray) -> int:
+        """
+        Append samples; on overflow the oldest samples are overwritten.
+
+        Returns:
+            Number of samples that were overwritten
+        """
+        samples = np.asarray(samples, dtype=self._data.dtype).reshape(-1)
+        if len(samples) > self.capacity:
+            # Nur das Ende passt überhaupt hinein
+            dropped = self._size + len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+            self._start, self._size = 0, 0
+        else:
+            dropped = max(0, self._size + len(samples) - self.capacity)
+            self.consume(dropped)
+
+        end = (self._start + self._size) % self.capacity
+        first = min(len(samples), self.capacity - end)
+        self._write(end, samples[:first])
+        self._write(0, samples[first:])
+        self._size += len(samples)
+        self.overwritten += dropped
+        return dropped
+
+    def _write(self, offset: int, samples: np.ndarray):
+        if len(samples):
+            self._data[offset:offset + len(samples)] = samples
+            self._data[offset + self.capacity:offset + self.capacity + len(samples)] = samples
+
+    def view(self, count: Optional[int] = None) -> np.ndarray:
+        """Oldest ``count`` samples (all if None) as a contiguous view, no copy."""
+        count = self._size if count is None else min(count, self._size)
+        return self._data[self._start:self._start + count]
+
+    def memoryview(self, count: Optional[int] = None) -> memoryview:
+        """Oldest ``count`` samples as a read-only ``memoryview``, no copy."""
+        return memoryview(self.view(count)).toreadonly()
+
+    def consume(self, count: int):
+        """Drop the oldest ``count`` samples (O(1))."""
+        count = min(max(count, 0), self._size)
+        self._start = (self._start + count) % self.capacity
+        self._size -= count
+
+    def take(self, count: Optional[int] = None) -> np.ndarray:
+        """Copy of the oldest ``count`` samples, which are removed from the buffer."""
+        audio = self.view(count).copy()
+        self.consume(len(audio))
+        return audio
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
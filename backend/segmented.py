@@ -0,0 +1,194 @@
+"""
+Segmented transcription of long recordings.
+
+``model.transcribe()`` / ``transcribe_file()`` on a 45-minute ward round runs
+serially on one core for many minutes. Long recordings are therefore cut at
+pauses into segments of at most ``SEGMENT_MAX_SECONDS`` (so every segment
+fits into one Whisper window) and the segments are transcribed in parallel:
+
+  * on CPU in a pool of worker processes, each with its own copy of the model
+    and ``cpu_count / workers`` threads, so wall-clock time drops roughly
+    linearly with the number of workers;
+  * on GPU in-process, where the segments are handed to the ASR batcher and
+    run as batched forward passes instead of competing for the device from
+    several processes.
+
+The segment texts are stitched back together in order, with start/end times.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backend.metrics import get_metrics
+from backend.vad import VAD_FRAME_MS, frame_features
+
+# === Konfiguration ===
+# Ab dieser Länge (Sekunden) wird eine Aufnahme segmentiert transkribiert
+SEGMENTED_MIN_SECONDS = float(os.environ.get("ASR_SEGMENTED_MIN_SECONDS", "90"))
+# Segmentlänge: Schnitt in der leisesten Pause zwischen Ziel- und Maximallänge
+SEGMENT_TARGET_SECONDS = 20.0
+SEGMENT_MAX_SECONDS = 30.0
+# Pausen werden über ~300ms geglättet gesucht, damit nicht mitten im Wort geschnitten wird
+SEGMENT_PAUSE_FRAMES = 10
+# Worker-Prozesse für CPU-Inferenz (jeder lädt das Modell selbst)
+SEGMENT_WORKERS = int(os.environ.get("ASR_SEGMENT_WORKERS", str(max(1, (os.cpu_count() or 1) // 4))))
+# Gleichzeitige Segmente im Prozess (GPU), werden im ASR-Batcher zusammengefasst
+SEGMENT_IN_PROCESS_CONCURRENCY = int(os.environ.get("ASR_SEGMENT_CONCURRENCY", "8"))
+
+
+class Segment(NamedTuple):
+    """One transcribed piece of a long recording (times in seconds)."""
+    index: int
+    start: float
+    end: float
+    text: str
+
+
+def split_at_silence(audio: np.ndarray, sample_rate: int = 16000,
+                     target_seconds: float = SEGMENT_TARGET_SECONDS,
+                     max_seconds: float = SEGMENT_MAX_SECONDS) -> List[Tuple[int, int]]:
+    """
+    Cut audio into ``(start, end)`` sample ranges of at most ``max_seconds``.
+
+    Each cut is placed in the quietest stretch between ``target_seconds`` and
+    ``max_seconds`` after the previous cut.
+    """
+    frame_size = sample_rate * VAD_FRAME_MS // 1000
+    max_samples = int(max_seconds * sample_rate)
+    if len(audio) <= max_samples:
+        return [(0, len(audio))]
+
+    energy_db, _ = frame_features(audio, frame_size)
+    # Gleitender Mittelwert: Pausen statt einzelner leiser Frames finden
+    smoothed = np.convolve(energy_db, np.ones(SEGMENT_PAUSE_FRAMES) / SEGMENT_PAUSE_FRAMES, mode="same")
+    target_frames = int(target_seconds * sample_rate) // frame_size
+    max_frames = max_samples // frame_size
+
+    ranges = []
+    start_frame = 0
+    while (len(audio) - start_frame * frame_size) > max_samples:
+        window = smoothed[start_frame + target_frames:start_frame + max_frames]
+        cut_frame = start_frame + target_frames + int(np.argmin(window))
+        ranges.append((start_frame * frame_size, cut_frame * frame_size))
+        start_frame = cut_frame
+    ranges.append((start_frame * frame_size, len(audio)))
+    return ranges
+
+
+def format_timestamp(seconds: float) -> str:
+    """``MM:SS`` or ``H:MM:SS`` for segment headers."""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+def join_segments(segments: List[Segment]) -> str:
+    """Full transcript of the segments in order."""
+    return " ".join(segment.text.strip() for segment in segments if segment.text and segment.text.strip())
+
+
+def _init_worker(threads: int):
+    # Vor dem (lazy) torch-Import im Worker setzen, sonst nutzt jeder Prozess alle Kerne
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+
+
+# Global instance for reuse
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_segment_pool() -> ProcessPoolExecutor:
+    """Get or start the worker processes for CPU segment inference."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            threads = max(1, (os.cpu_count() or 1) // SEGMENT_WORKERS)
+            # spawn statt fork: der Server hat laufende Threads und ggf. CUDA initialisiert
+            _pool = ProcessPoolExecutor(
+                max_workers=SEGMENT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(threads,)
+            )
+            print(f"Segment pool started: {SEGMENT_WORKERS} workers x {threads} threads")
+        return _pool
+
+
+def shutdown_segment_pool():
+    """Stop the worker processes (used on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def transcribe_segmented(asr_fn: Callable, model_name: str, audio: np.ndarray,
+                         sample_rate: int = 16000, in_process: bool = False,
+                         on_segment: Optional[Callable[[Segment, int], None]] = None) -> Optional[List[Segment]]:
+    """
+    Transcribe a long recording segment by segment, in parallel.
+
+    Args:
+        asr_fn: ``_run_asr(model_name, audio, whisper_model_id, batched)``; must be
+            importable by name, since it is sent to the worker processes
+        model_name: Name des Modells aus /api/models
+        audio: float32-Array (16kHz, mono)
+        in_process: Segmente im Prozess über den ASR-Batcher statt im Prozess-Pool (GPU)
+        on_segment: Optionaler Callback für jedes fertige Segment (in Reihenfolge),
+            bekommt das Segment und die Gesamtzahl der Segmente
+
+    Returns:
+        Segments in order, or None if the model is not available
+    """
+    global _pool
+    ranges = split_at_silence(audio, sample_rate)
+    pieces = [np.ascontiguousarray(audio[start:end]) for start, end in ranges]
+    metrics = get_metrics()
+    start_time = time.perf_counter()
+
+    def collect(texts) -> Optional[List[Segment]]:
+        # map() liefert in Reihenfolge, sobald das jeweils nächste Segment fertig ist
+        segments = []
+        for index, ((start, end), text) in enumerate(zip(ranges, texts)):
+            if text is None:
+                return None
+            segment = Segment(index, start / sample_rate, end / sample_rate, text)
+            segments.append(segment)
+            if on_segment is not None:
+                on_segment(segment, len(ranges))
+        return segments
+
+    if in_process or SEGMENT_WORKERS <= 1:
+        with ThreadPoolExecutor(max_workers=max(1, SEGMENT_IN_PROCESS_CONCURRENCY),
+                                thread_name_prefix="segment") as executor:
+            segments = collect(executor.map(lambda piece: asr_fn(model_name, piece, None, True), pieces))
+    else:
+        pool = get_segment_pool()
+        try:
+            segments = collect(pool.map(asr_fn, [model_name] * len(pieces), pieces))
+        except BrokenProcessPool:
+            # Ein Worker ist abgestürzt (z.B. OOM): Pool beim nächsten Aufruf neu starten
+            with _pool_lock:
+                if _pool is pool:
+                    _pool = None
+            raise
+
+    if segments is None:
+        return None
+
+    elapsed = time.perf_counter() - start_time
+    metrics.increment("segmented.files")
+    metrics.increment("segmented.segments", len(pieces))
+    metrics.observe("segmented.seconds", elapsed)
+    print(f"Segmented transcription: {len(pieces)} segments, "
+          f"{len(audio) / sample_rate:.0f}s audio in {elapsed:.1f}s")
+    return segments
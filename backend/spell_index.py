@@ -0,0 +1,136 @@
+"""
+Precompiled SymSpell index for the medical frequency dictionary.
+
+Building the SymSpell deletes index from the 100k-line text dictionary takes
+several seconds per process. The built index is stored once as an
+uncompressed pickle next to the dictionary, versioned by a hash of the
+dictionary contents and the SymSpell parameters. Workers load the pickle
+instead; the file is read through the page cache, so every further process
+on the machine gets it from memory. When the text dictionary changes, the
+hash changes and the index is rebuilt automatically on the next load.
+
+Build step (e.g. in deployment, before starting the workers)::
+
+    python -m backend.spell_index [--force]
+"""
+
+import argparse
+import gc
+import glob
+import hashlib
+import os
+import time
+import warnings
+
+from symspellpy.symspellpy import SymSpell
+
+# === Konfiguration ===
+SPELL_DICTIONARY_PATH = os.environ.get(
+    "ASR_SPELL_DICTIONARY",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "frequency_dictionary_med_de.txt")
+)
+# Verzeichnis für die kompilierten Indizes (Standard: neben dem Wörterbuch)
+SPELL_INDEX_DIR = os.environ.get("ASR_SPELL_INDEX_DIR", os.path.dirname(SPELL_DICTIONARY_PATH))
+SPELL_MAX_EDIT_DISTANCE = 2
+SPELL_PREFIX_LENGTH = 7
+# Erhöhen, wenn sich das Index-Format ändert
+SPELL_INDEX_FORMAT = 1
+
+
+def dictionary_hash(dictionary_path: str = SPELL_DICTIONARY_PATH) -> str:
+    """Version of the index: hash of the dictionary contents and the SymSpell parameters."""
+    digest = hashlib.sha256(
+        f"v{SPELL_INDEX_FORMAT}:{SPELL_MAX_EDIT_DISTANCE}:{SPELL_PREFIX_LENGTH}\0".encode()
+    )
+    with open(dictionary_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def index_path_for(dictionary_path: str = SPELL_DICTIONARY_PATH, version: str = None) -> str:
+    """Path of the compiled index for a dictionary version."""
+    name = os.path.splitext(os.path.basename(dictionary_path))[0]
+    return os.path.join(SPELL_INDEX_DIR, f"{name}.{version or dictionary_hash(dictionary_path)}.symspell.pickle")
+
+
+def _new_sym_spell() -> SymSpell:
+    return SymSpell(max_dictionary_edit_distance=SPELL_MAX_EDIT_DISTANCE, prefix_length=SPELL_PREFIX_LENGTH)
+
+
+def build_spell_index(dictionary_path: str = SPELL_DICTIONARY_PATH) -> SymSpell:
+    """
+    Build the SymSpell index from the text dictionary and store it for later loads.
+
+    Older index versions of the same dictionary are removed.
+    """
+    version = dictionary_hash(dictionary_path)
+    index_path = index_path_for(dictionary_path, version)
+
+    start = time.perf_counter()
+    sym_spell = _new_sym_spell()
+    with warnings.catch_warnings():
+        # Einzelne Einträge mit zu großen Häufigkeiten werden von symspellpy übersprungen
+        warnings.simplefilter("ignore", UserWarning)
+        sym_spell.load_dictionary(dictionary_path, term_index=0, count_index=1)
+    print(f"SymSpell index built from {dictionary_path} in {time.perf_counter() - start:.2f}s")
+
+    try:
+        os.makedirs(SPELL_INDEX_DIR, exist_ok=True)
+        # Erst in eine temporäre Datei schreiben: parallel startende Worker sehen nie eine halbe Datei
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        sym_spell.save_pickle(temp_path, compressed=False)
+        os.replace(temp_path, index_path)
+        print(f"SymSpell index saved to {index_path}")
+    except OSError as e:
+        print(f"Could not save SymSpell index to {index_path}: {e}")
+        return sym_spell
+
+    for old_index in glob.glob(index_path_for(dictionary_path, "*")):
+        if old_index != index_path:
+            try:
+                os.remove(old_index)
+            except OSError:
+                pass
+    return sym_spell
+
+
+def load_spell_index(dictionary_path: str = SPELL_DICTIONARY_PATH) -> SymSpell:
+    """
+    Load the compiled index for the current dictionary, building it first if needed.
+    """
+    index_path = index_path_for(dictionary_path)
+    if not os.path.exists(index_path):
+        return build_spell_index(dictionary_path)
+
+    start = time.perf_counter()
+    sym_spell = _new_sym_spell()
+    # Der Index besteht aus ~500k kleinen Objekten; ohne GC-Läufe während des Unpicklings
+    # lädt er um ein Vielfaches schneller
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loaded = sym_spell.load_pickle(index_path, compressed=False)
+    except Exception as e:
+        print(f"Could not load SymSpell index {index_path}: {e}")
+        loaded = False
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    if not loaded:
+        return build_spell_index(dictionary_path)
+    print(f"SymSpell index loaded from {index_path} in {time.perf_counter() - start:.2f}s")
+    return sym_spell
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the SymSpell dictionary into a binary index")
+    parser.add_argument("--dictionary", default=SPELL_DICTIONARY_PATH, help="Text frequency dictionary")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if an up-to-date index exists")
+    args = parser.parse_args()
+
+    if args.force or not os.path.exists(index_path_for(args.dictionary)):
+        build_spell_index(args.dictionary)
+    else:
+        print(f"SymSpell index is up to date: {index_path_for(args.dictionary)}")
@@ -0,0 +1,128 @@
+"""
+Memoized spellcheck on top of SymSpell.
+
+``lookup_compound`` on the full transcript costs time proportional to the
+transcript length, even though most tokens are dictionary words and live
+dictation repeats the same phrases constantly. ``MemoizedSpellChecker``
+therefore
+
+  * returns whole transcripts it has corrected before from a phrase memo,
+  * passes tokens that are exact dictionary words through unchanged, and
+  * runs ``lookup_compound`` only on spans around unknown tokens (with one
+    known neighbour on each side, so split/merge corrections still work),
+    memoized per span.
+
+The cost of a correction therefore grows with the number of unknown words,
+not with the transcript length.
+"""
+
+import os
+import time
+from typing import List, Tuple
+
+from symspellpy import helpers
+from symspellpy.symspellpy import SymSpell
+
+from backend.metrics import get_metrics
+from backend.result_cache import LRUCache
+
+# === Konfiguration ===
+SPELL_MEMO_ENTRIES = int(os.environ.get("ASR_SPELL_MEMO_ENTRIES", "20000"))
+SPELL_MAX_EDIT_DISTANCE = 2
+
+
+class MemoizedSpellChecker:
+    """SymSpell compound correction with a phrase/span memo and an in-vocabulary bypass."""
+
+    def __init__(self, sym_spell: SymSpell, memo_entries: int = SPELL_MEMO_ENTRIES,
+                 max_edit_distance: int = SPELL_MAX_EDIT_DISTANCE):
+        self.sym_spell = sym_spell
+        self.max_edit_distance = max_edit_distance
+        # Wert: (Korrektur, Sekunden, die die Berechnung gekostet hat)
+        self._memo = LRUCache(memo_entries)
+
+    def _lookup(self, phrase: str) -> str:
+        """``lookup_compound`` for one span, memoized."""
+        cached = self._memo.get(phrase)
+        metrics = get_metrics()
+        if cached is not None:
+            corrected, cost = cached
+            metrics.increment("spellcheck.memo_hits")
+            metrics.increment("spellcheck.saved_seconds", cost)
+            return corrected
+
+        start = time.perf_counter()
+        suggestions = self.sym_spell.lookup_compound(phrase, max_edit_distance=self.max_edit_distance)
+        corrected = suggestions[0].term if suggestions else phrase
+        cost = time.perf_counter() - start
+        self._memo.put(phrase, (corrected, cost))
+        metrics.increment("spellcheck.memo_misses")
+        metrics.observe("spellcheck.lookup_seconds", cost)
+        return corrected
+
+    def _unknown_spans(self, tokens: List[str]) -> List[Tuple[int, int]]:
+        """Token ranges around unknown words, each widened by one known neighbour and merged."""
+        words = self.sym_spell.words
+        spans: List[Tuple[int, int]] = []
+        for i, token in enumerate(tokens):
+            if token in words:
+                continue
+            start, end = max(i - 1, 0), min(i + 2, len(tokens))
+            if spans and start <= spans[-1][1]:
+                spans[-1] = (spans[-1][0], end)
+            else:
+                spans.append((start, end))
+        return spans
+
+    def correct(self, text: str) -> str:
+        """Return the corrected transcript (lower-case words, as ``lookup_compound`` produces)."""
+        phrase_key = "\0" + text
+        cached = self._memo.get(phrase_key)
+        metrics = get_metrics()
+        if cached is not None:
+            corrected, cost = cached
+            metrics.increment("spellcheck.phrase_hits")
+            metrics.increment("spellcheck.saved_seconds", cost)
+            return corrected
+
+        start = time.perf_counter()
+        tokens = helpers.parse_words(text)
+        spans = self._unknown_spans(tokens)
+        unknown = sum(1 for token in tokens if token not in self.sym_spell.words)
+        metrics.increment("spellcheck.tokens", len(tokens))
+        metrics.increment("spellcheck.unknown_tokens", unknown)
+
+        if not tokens:
+            corrected = text
+        elif not spans:
+            # Alles bekannte Wörter: kein lookup_compound nötig
+            corrected = " ".join(tokens)
+        else:
+            pieces = []
+            position = 0
+            for span_start, span_end in spans:
+                pieces.extend(tokens[position:span_start])
+                pieces.append(self._lookup(" ".join(tokens[span_start:span_end])))
+                position = span_end
+            pieces.extend(tokens[position:])
+            corrected = " ".join(pieces)
+
+        self._memo.put(phrase_key, (corrected, time.perf_counter() - start))
+        metrics.increment("spellcheck.phrase_misses")
+        return corrected
+
+
+def spellcheck_stats() -> dict:
+    """Memo hit rates, in-vocabulary share and time saved, derived from the metrics counters."""
+    metrics = get_metrics()
+    phrase_hits = metrics.counter("spellcheck.phrase_hits")
+    phrase_total = phrase_hits + metrics.counter("spellcheck.phrase_misses")
+    span_hits = metrics.counter("spellcheck.memo_hits")
+    span_total = span_hits + metrics.counter("spellcheck.memo_misses")
+    tokens = metrics.counter("spellcheck.tokens")
+    return {
+        "phrase_hit_rate": round(phrase_hits / phrase_total, 3) if phrase_total else None,
+        "span_hit_rate": round(span_hits / span_total, 3) if span_total else None,
+        "in_vocabulary_rate": round(1 - metrics.counter("spellcheck.unknown_tokens") / tokens, 3) if tokens else None,
+        "saved_seconds": round(metrics.counter("spellcheck.saved_seconds"), 3),
+    }
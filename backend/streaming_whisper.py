@@ -0,0 +1,172 @@
+"""
+Incremental streaming transcription for Whisper.
+
+The live endpoint used to transcribe every chunk on its own: words at chunk
+boundaries were cut or duplicated and Whisper saw no context.
+``StreamingWhisperSession`` keeps a rolling buffer of the not yet committed
+audio of one connection instead. Every new chunk is appended and the buffer
+is re-decoded with the committed text as prompt. Words are committed with a
+local-agreement policy (LocalAgreement-2): a word is final once two
+consecutive decodes agree on it, everything after that is tentative and may
+still change. Committed audio is cut from the buffer, so the work per chunk
+is bounded by the buffer length, not by the length of the session. The
+buffer is a preallocated ``AudioRingBuffer``: appending and trimming do not
+copy the buffered audio, and Whisper reads it as a view.
+"""
+
+import os
+import re
+from typing import Callable, List, NamedTuple, Optional
+
+import numpy as np
+
+from backend.metrics import get_metrics
+from backend.ring_buffer import AudioRingBuffer
+
+# === Konfiguration ===
+# Whisper-Modell für den Streaming-Modus (leer = das gewählte Modell)
+STREAMING_WHISPER_MODEL = os.environ.get("ASR_STREAMING_WHISPER_MODEL", "")
+# Puffer wird ab dieser Länge bis zum letzten bestätigten Wort gekürzt
+STREAMING_BUFFER_TRIM_SECONDS = 12.0
+# Darüber wird die Hypothese ohne Bestätigung übernommen (Whisper-Fenster: 30s)
+STREAMING_BUFFER_MAX_SECONDS = 25.0
+# Kapazität des Ringpuffers: Maximallänge plus Platz für einen Chunk
+STREAMING_BUFFER_CAPACITY_SECONDS = STREAMING_BUFFER_MAX_SECONDS + 5.0
+# Kürzere Puffer werden noch nicht dekodiert
+STREAMING_MIN_SECONDS = 1.0
+# Länge des Prompts aus bestätigtem Text
+STREAMING_PROMPT_CHARS = 200
+# Wie viele bestätigte Wörter am Anfang einer neuen Hypothese als Duplikat erkannt werden
+STREAMING_MAX_OVERLAP_WORDS = 5
+
+_WORD_CHARS = re.compile(r"[^\w]+")
+
+
+class Word(NamedTuple):
+    """A recognized word with start/end time in seconds."""
+    start: float
+    end: float
+    text: str
+
+
+class StreamingUpdate(NamedTuple):
+    """Result of one step: newly committed text and the current tentative tail."""
+    committed: str
+    tentative: str
+
+
+def _normalize(word: Word) -> str:
+    return _WORD_CHARS.sub("", word.text.lower())
+
+
+def _join(words: List[Word]) -> str:
+    return " ".join(word.text.strip() for word in words).strip()
+
+
+class StreamingWhisperSession:
+    """
+    Rolling-buffer streaming transcription for one connection.
+
+    ``transcribe_words(audio, prompt)`` decodes a float32 buffer (16kHz) and
+    returns its words with times relative to the buffer start. The optional
+    ``postprocess`` (e.g. spellcheck) is applied to newly committed text
+    before it is returned; the prompt keeps the raw recognizer output.
+    """
+
+    def __init__(self, transcribe_words: Callable[[np.ndarray, str], List[Word]], sample_rate: int = 16000,
+                 postprocess: Optional[Callable[[str], str]] = None):
+        self.transcribe_words = transcribe_words
+        self.postprocess = postprocess
+        self.sample_rate = sample_rate
+        self.buffer = AudioRingBuffer(int(STREAMING_BUFFER_CAPACITY_SECONDS * sample_rate))
+        # Sitzungszeit (Sekunden) des ersten Samples im Puffer
+        self.buffer_start = 0.0
+        self.committed: List[Word] = []
+        # Unbestätigter Teil der letzten Hypothese (Sitzungszeiten)
+        self.tentative: List[Word] = []
+
+    @property
+    def committed_text(self) -> str:
+        return _join(self.committed)
+
+    @property
+    def committed_until(self) -> float:
+        return self.committed[-1].end if self.committed else self.buffer_start
+
+    def _prompt(self) -> str:
+        return self.committed_text[-STREAMING_PROMPT_CHARS:]
+
+    def _drop_committed(self, hypothesis: List[Word]) -> List[Word]:
+        """Remove words of the hypothesis that belong to already committed audio."""
+        cutoff = self.committed_until
+        hypothesis = [word for word in hypothesis if (word.start + word.end) / 2 > cutoff]
+        # Zeitstempel schwanken: am Rand doppelt erkannte Wörter über den Text entfernen
+        overlap = min(STREAMING_MAX_OVERLAP_WORDS, len(self.committed), len(hypothesis))
+        for n in range(overlap, 0, -1):
+            if [_normalize(w) for w in self.committed[-n:]] == [_normalize(w) for w in hypothesis[:n]]:
+                return hypothesis[n:]
+        return hypothesis
+
+    def _committed_update(self, new_words: List[Word], tentative: str) -> StreamingUpdate:
+        text = _join(new_words)
+        if text and self.postprocess is not None:
+            text = self.postprocess(text)
+        return StreamingUpdate(text, tentative)
+
+    def _trim_buffer(self, until: float):
+        samples = min(int((until - self.buffer_start) * self.sample_rate), len(self.buffer))
+        if samples > 0:
+            self.buffer.consume(samples)
+            self.buffer_start += samples / self.sample_rate
+
+    def process_audio(self, audio: np.ndarray) -> StreamingUpdate:
+        """Append a chunk, re-decode the buffer and commit the words two decodes agree on."""
+        dropped = self.buffer.append(audio)
+        if dropped:
+            # Überlauf (sehr großer Chunk): älteste Samples sind überschrieben
+            self.buffer_start += dropped / self.sample_rate
+            get_metrics().increment("streaming_whisper.dropped_seconds", dropped / self.sample_rate)
+        if len(self.buffer) < STREAMING_MIN_SECONDS * self.sample_rate:
+            return StreamingUpdate("", _join(self.tentative))
+
+        words = self.transcribe_words(self.buffer.view(), self._prompt())
+        hypothesis = self._drop_committed([
+            Word(word.start + self.buffer_start, word.end + self.buffer_start, word.text) for word in words
+        ])
+
+        # LocalAgreement-2: längster gemeinsamer Anfang der letzten beiden Hypothesen
+        agreed = 0
+        while (agreed < min(len(self.tentative), len(hypothesis))
+               and _normalize(self.tentative[agreed]) == _normalize(hypothesis[agreed])):
+            agreed += 1
+        new_words = hypothesis[:agreed]
+        self.tentative = hypothesis[agreed:]
+        self.committed.extend(new_words)
+
+        metrics = get_metrics()
+        buffer_seconds = len(self.buffer) / self.sample_rate
+        if buffer_seconds > STREAMING_BUFFER_MAX_SECONDS:
+            # Keine Einigung in Sicht: Hypothese übernehmen, damit der Puffer ins Whisper-Fenster passt
+            new_words = new_words + self.tentative
+            self.committed.extend(self.tentative)
+            self.tentative = []
+            metrics.increment("streaming_whisper.forced_commits")
+            # Auch ohne erkannte Wörter (Rauschen) darf der Puffer nicht weiter wachsen
+            buffer_end = self.buffer_start + buffer_seconds
+            self._trim_buffer(max(self.committed_until, buffer_end - STREAMING_MIN_SECONDS))
+        elif buffer_seconds > STREAMING_BUFFER_TRIM_SECONDS and self.committed:
+            self._trim_buffer(self.committed_until)
+
+        metrics.increment("streaming_whisper.committed_words", len(new_words))
+        metrics.observe("streaming_whisper.buffer_seconds", len(self.buffer) / self.sample_rate)
+        return self._committed_update(new_words, _join(self.tentative))
+
+    def flush(self) -> StreamingUpdate:
+        """Commit the tentative tail (end of utterance or stream) and empty the buffer."""
+        new_words = self.tentative
+        self.committed.extend(new_words)
+        self.tentative = []
+        self.buffer_start += len(self.buffer) / self.sample_rate
+        self.buffer.clear()
+        get_metrics().increment("streaming_whisper.committed_words", len(new_words))
+        return self._committed_update(new_words, "")
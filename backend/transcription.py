@@ -1,17 +1,27 @@
 import os
-import torch
-import gc
-import whisper
 import warnings
-import librosa
-from speechbrain.inference.ASR import EncoderDecoderASR
-from transformers import WhisperProcessor, WhisperForConditionalGeneration, pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
-from pydub import AudioSegment
-import subprocess
-import tempfile
+import numpy as np
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Optional
 
-from symspellpy.symspellpy import SymSpell
-from backend.vosk_transcription import get_vosk_transcriber
+from backend.vosk_transcription import VOSK_MODEL_NAME, get_vosk_transcriber
+from backend.model_registry import get_model_registry
+from backend.audio_decoding import AudioDecodeError, decode_audio_file, float32_to_pcm16
+from backend.spell_index import SPELL_DICTIONARY_PATH, dictionary_hash, load_spell_index
+from backend.spellcheck import MemoizedSpellChecker
+from backend.metrics import get_metrics
+from backend.memory import get_memory_manager
+from backend.batching import DynamicBatcher
+from backend.grammar_cache import GrammarCache, normalize_sentence
+from backend.segmented import SEGMENTED_MIN_SECONDS, format_timestamp, join_segments, transcribe_segmented
+from backend.streaming_whisper import STREAMING_WHISPER_MODEL, StreamingWhisperSession, Word
+from backend.model_host import get_model_host_client
+
+# torch, whisper, librosa, speechbrain und transformers werden erst in den Loadern
+# importiert: der Import allein dauert mehrere Sekunden und blockiert sonst den Serverstart
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
@@ -20,111 +30,399 @@ USE_SPELLCHECK = True
 USE_GRAMMAR = True
 
 # === Initialisierung ===
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+@lru_cache(maxsize=1)
+def get_device() -> str:
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+registry = get_model_registry()
+
+# SpeechBrain (wird beim ersten Gebrauch geladen)
+def _load_speechbrain():
+    from speechbrain.inference.ASR import EncoderDecoderASR
+    return EncoderDecoderASR.from_hparams(
+        source="speechbrain/asr-crdnn-commonvoice-de",
+        savedir="sb_model"
+    )
+
+registry.register("SpeechBrain CRDNN", _load_speechbrain, expected_bytes=500 * 1024 * 1024)
+
+# Whisper-Modelle: Größe der fp32-Gewichte als Schätzung vor dem ersten Laden
+WHISPER_EXPECTED_MB = {"tiny": 150, "base": 290, "small": 970, "medium": 3060, "large-v3": 6180}
+
+def _whisper_registry_name(model_id: str) -> str:
+    return f"Whisper {model_id}"
+
+def _load_whisper(model_id: str):
+    import whisper
+    return whisper.load_model(model_id, device=get_device())
 
-# SpeechBrain laden
-speechbrain_model = EncoderDecoderASR.from_hparams(
-    source="speechbrain/asr-crdnn-commonvoice-de",
-    savedir="sb_model"
-)
+def _register_whisper(model_id: str):
+    registry.register(
+        _whisper_registry_name(model_id),
+        lambda: _load_whisper(model_id),
+        expected_bytes=WHISPER_EXPECTED_MB.get(model_id, 0) * 1024 * 1024
+    )
 
-# Whisper Cache
-loaded_whisper_models = {}
+for _model_id in ("tiny", "base", "medium", "large-v3"):
+    _register_whisper(_model_id)
 
 # MultiMed Whisper vorbereiten
 multimed_model_path = "MultiMed-ST/asr/whisper-small-german"
+
+def _load_multimed():
+    from transformers import WhisperProcessor, WhisperForConditionalGeneration
+    processor = WhisperProcessor.from_pretrained(multimed_model_path)
+    model = WhisperForConditionalGeneration.from_pretrained(multimed_model_path).to(get_device()).eval()
+    return processor, model
+
 if os.path.exists(multimed_model_path):
-    multimed_processor = WhisperProcessor.from_pretrained(multimed_model_path)
-    multimed_model = WhisperForConditionalGeneration.from_pretrained(multimed_model_path).to(DEVICE).eval()
-else:
-    multimed_model = None
-    multimed_processor = None
+    registry.register("MultiMed Whisper", _load_multimed, expected_bytes=970 * 1024 * 1024)
 
-# Spellcheck vorbereiten
-sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
-dictionary_path = "frequency_dictionary_med_de.txt"
+# Spellcheck vorbereiten (kompilierter Index wird im Hintergrund bzw. beim ersten Gebrauch geladen)
+dictionary_path = SPELL_DICTIONARY_PATH
+dictionary_version = None
+_spell_checker = None
+_spell_checker_lock = threading.Lock()
 if USE_SPELLCHECK and os.path.exists(dictionary_path):
-    sym_spell.load_dictionary(dictionary_path, term_index=0, count_index=1)
+    # Inhalts-Hash, damit gecachte Ergebnisse und der Index nach Wörterbuch-Updates ungültig werden
+    dictionary_version = dictionary_hash(dictionary_path)
 else:
     USE_SPELLCHECK = False
 
-# Grammatik-Modell vorbereiten
-grammar_corrector = None
+def get_spell_checker() -> MemoizedSpellChecker:
+    """Lädt den SymSpell-Index einmalig (thread-sicher) und legt den Memo-Cache davor."""
+    global _spell_checker
+    if _spell_checker is None:
+        with _spell_checker_lock:
+            if _spell_checker is None:
+                _spell_checker = MemoizedSpellChecker(load_spell_index(dictionary_path))
+    return _spell_checker
+
+# Grammatik-Modell vorbereiten (wird beim ersten Gebrauch geladen)
+GRAMMAR_MODEL_NAME = "Grammar Corrector"
 grammar_model_path = "local_models/grammar-correction-de"
-if USE_GRAMMAR and os.path.isdir(grammar_model_path):
+
+def _load_grammar_corrector():
+    from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
     grammar_tokenizer = AutoTokenizer.from_pretrained(grammar_model_path)
     grammar_model = AutoModelForSeq2SeqLM.from_pretrained(grammar_model_path)
-    grammar_corrector = pipeline("text2text-generation", model=grammar_model, tokenizer=grammar_tokenizer, max_new_tokens=256)
+    return pipeline("text2text-generation", model=grammar_model, tokenizer=grammar_tokenizer, max_new_tokens=256)
+
+if USE_GRAMMAR and os.path.isdir(grammar_model_path):
+    registry.register(GRAMMAR_MODEL_NAME, _load_grammar_corrector, expected_bytes=900 * 1024 * 1024)
 else:
     USE_GRAMMAR = False
 
+def postprocessing_config() -> dict:
+    """Alle Einstellungen, die das Ergebnis von transcribe() über die ASR hinaus beeinflussen."""
+    return {
+        "spellcheck": USE_SPELLCHECK,
+        "dictionary": dictionary_version if USE_SPELLCHECK else None,
+        "grammar": USE_GRAMMAR,
+        "grammar_model": grammar_model_path if USE_GRAMMAR else None,
+    }
+
 def spellcheck(text):
     if not USE_SPELLCHECK:
         return text, []
-    suggestions = sym_spell.lookup_compound(text, max_edit_distance=2)
-    if suggestions:
-        corrected = suggestions[0].term
-        changes = [(w1, w2) for w1, w2 in zip(text.split(), corrected.split()) if w1 != w2]
-        return corrected, changes
-    return text, []
+    corrected = get_spell_checker().correct(text)
+    changes = [(w1, w2) for w1, w2 in zip(text.split(), corrected.split()) if w1 != w2]
+    return corrected, changes
+
+# Satzweise Grammatikkorrektur: Sätze mehrerer Requests laufen gemeinsam in einem Batch
+GRAMMAR_BATCH_SIZE = int(os.environ.get("ASR_GRAMMAR_BATCH_SIZE", "8"))
+GRAMMAR_BATCH_WAIT_MS = float(os.environ.get("ASR_GRAMMAR_BATCH_WAIT_MS", "10"))
+# Nach dem Spellcheck fehlt die Interpunktion, lange Texte werden dann nach Wortzahl geteilt
+GRAMMAR_MAX_SENTENCE_WORDS = 40
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def split_sentences(text: str) -> list[str]:
+    """Teilt Text an Satzgrenzen; zu lange Sätze werden in Stücke von max. GRAMMAR_MAX_SENTENCE_WORDS Wörtern geteilt."""
+    sentences = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        words = sentence.split()
+        for start in range(0, len(words), GRAMMAR_MAX_SENTENCE_WORDS):
+            sentences.append(" ".join(words[start:start + GRAMMAR_MAX_SENTENCE_WORDS]))
+    return sentences
+
+def _grammar_batch(sentences: list[str]) -> list[str]:
+    """Ein Forward-Pass des Grammatik-Modells über einen gepaddeten Batch von Sätzen."""
+    with registry.use(GRAMMAR_MODEL_NAME) as grammar_corrector:
+        outputs = grammar_corrector(sentences, batch_size=len(sentences))
+    # Die Pipeline liefert pro Eingabe ein Dict (oder eine Liste mit einem Dict)
+    return [(output[0] if isinstance(output, list) else output)['generated_text'] for output in outputs]
+
+grammar_batcher = DynamicBatcher("grammar", _grammar_batch, GRAMMAR_BATCH_SIZE, GRAMMAR_BATCH_WAIT_MS)
+
+_grammar_cache = None
+_grammar_cache_lock = threading.Lock()
+
+def get_grammar_cache() -> GrammarCache:
+    """Satz-Cache für Grammatikkorrekturen, versioniert über den Modellpfad."""
+    global _grammar_cache
+    if _grammar_cache is None:
+        with _grammar_cache_lock:
+            if _grammar_cache is None:
+                _grammar_cache = GrammarCache(os.path.abspath(grammar_model_path))
+    return _grammar_cache
+
+def grammar_fix_sentences(text: str) -> list[tuple[str, str, list]]:
+    """
+    Grammatikkorrektur Satz für Satz.
+    
+    Returns:
+        Liste von (Originalsatz, korrigierter Satz, Änderungen im Satz)
+    """
+    sentences = [normalize_sentence(sentence) for sentence in split_sentences(text)]
+    cache = get_grammar_cache()
+    corrected = cache.get_many(sentences)
+    # Nur unbekannte Sätze (jeder nur einmal) gehen durch das Modell
+    missing = list(dict.fromkeys(sentence for sentence in sentences if sentence not in corrected))
+    if missing:
+        host = get_model_host_client()
+        fixed = host.grammar(missing) if host is not None else grammar_batcher.submit_many(missing)
+        new_corrections = dict(zip(missing, fixed))
+        cache.put_many(new_corrections)
+        corrected.update(new_corrections)
+    return [
+        (sentence, corrected[sentence],
+         [(w1, w2) for w1, w2 in zip(sentence.split(), corrected[sentence].split()) if w1 != w2])
+        for sentence in sentences
+    ]
 
 def grammar_fix(text):
     if not USE_GRAMMAR:
         return text, []
     try:
-        result = grammar_corrector(text)[0]['generated_text']
-        changes = [(w1, w2) for w1, w2 in zip(text.split(), result.split()) if w1 != w2]
-        return result, changes
-    except:
+        sentences = grammar_fix_sentences(text)
+    except Exception as e:
+        print(f"Grammar correction failed: {e}")
         return text, []
+    result = " ".join(fixed for _, fixed, _ in sentences)
+    changes = [change for _, _, sentence_changes in sentences for change in sentence_changes]
+    return result, changes
 
-def transcribe(model_name: str, audio_path: str) -> list[str]:
-    gc.collect()
-    torch.cuda.empty_cache()
-    
-    result_steps = []
+# Für Live-Transkription nutzen wir kleinere Modelle für Geschwindigkeit
+QUICK_MODE_WHISPER_MODELS = {"Whisper large-v3": "base", "Whisper medium": "base"}
 
-    if model_name.startswith("Whisper"):
-        model_id = model_name.split(" ")[1].lower()
-        if model_id not in loaded_whisper_models:
-            loaded_whisper_models[model_id] = whisper.load_model(model_id, device=DEVICE)
-        model = loaded_whisper_models[model_id]
-        raw_result = model.transcribe(audio_path, language="de")
-        raw_text = raw_result["text"]
-
-    elif model_name == "SpeechBrain CRDNN":
-        raw_text = speechbrain_model.transcribe_file(audio_path)
-
-    elif model_name == "MultiMed Whisper" and multimed_model:
-        audio, _ = librosa.load(audio_path, sr=16000)
-        input_values = multimed_processor(audio, return_tensors="pt").input_features.to(DEVICE)
+def quick_whisper_model_id(model_name: str) -> Optional[str]:
+    """Whisper-Modell für Live-/Quick-Mode-Transkription, None = das gewählte Modell."""
+    return QUICK_MODE_WHISPER_MODELS.get(model_name)
+
+def get_whisper_model(model_id: str):
+    """Lädt ein Whisper-Modell über die Modell-Registry (thread-sicher) oder gibt das geladene zurück."""
+    _register_whisper(model_id)
+    return registry.load(_whisper_registry_name(model_id))
+
+def whisper_words(model_id: str, audio: np.ndarray, prompt: str) -> list:
+    """Whisper mit Wort-Zeitstempeln (relativ zu ``audio``) für den Streaming-Modus."""
+    host = get_model_host_client()
+    if host is not None:
+        return [Word(*word) for word in host.whisper_words(model_id, audio, prompt)]
+    _register_whisper(model_id)
+    with get_metrics().timer("stage.asr_streaming"):
+        # Wort-Zeitstempel hängen Cross-Attention-Hooks ans Modell: nie parallel auf derselben Instanz
+        with registry.use(_whisper_registry_name(model_id), exclusive=True) as model:
+            result = model.transcribe(
+                audio, language="de", initial_prompt=prompt or None,
+                word_timestamps=True, condition_on_previous_text=False
+            )
+    return [
+        Word(word["start"], word["end"], word["word"])
+        for segment in result["segments"] for word in segment.get("words", [])
+    ]
+
+def create_streaming_session(model_name: str) -> StreamingWhisperSession:
+    """
+    Streaming-Session mit rollendem Puffer für ein Whisper-Modell aus /api/models.
+
+    Wie bei den Live-Chunks laufen große Modelle im Quick-Mode-Modell (jedes Update
+    dekodiert den ganzen Puffer neu); bestätigter Text bekommt den Spellcheck.
+    """
+    model_id = STREAMING_WHISPER_MODEL or quick_whisper_model_id(model_name) or model_name.split(" ")[1].lower()
+    return StreamingWhisperSession(
+        lambda audio, prompt: whisper_words(model_id, audio, prompt),
+        postprocess=lambda text: spellcheck(text)[0]
+    )
+
+# Dynamisches Batching für Whisper und MultiMed: Fenster gleichzeitiger Requests in einem Forward-Pass
+ASR_BATCH_SIZE = int(os.environ.get("ASR_BATCH_SIZE", "8"))
+ASR_BATCH_WAIT_MS = float(os.environ.get("ASR_BATCH_WAIT_MS", "15"))
+# Whisper verarbeitet 30-Sekunden-Fenster; nur kürzere Chunks werden gebatcht
+WHISPER_WINDOW_SAMPLES = 30 * 16000
+
+_asr_batchers = {}
+_asr_batchers_lock = threading.Lock()
+
+def _whisper_batch(registry_name: str, audios: list) -> list[str]:
+    """Gepaddete 30s-Mel-Fenster aller Chunks in einem Encode/Decode-Durchlauf."""
+    import torch
+    import whisper
+    with registry.use(registry_name, exclusive=True) as model:
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=model.dims.n_mels)
+            for audio in audios
+        ]).to(model.device)
+        options = whisper.DecodingOptions(language="de", without_timestamps=True, fp16=model.device.type == "cuda")
+        results = whisper.decode(model, mels, options)
+    return [result.text for result in results]
+
+def _multimed_batch(registry_name: str, audios: list) -> list[str]:
+    """Ein generate()-Aufruf über die Features aller Chunks."""
+    import torch
+    with registry.use(registry_name, exclusive=True) as (multimed_processor, multimed_model):
+        input_values = multimed_processor(audios, sampling_rate=16000, return_tensors="pt").input_features.to(get_device())
         with torch.no_grad():
             predicted_ids = multimed_model.generate(input_values)
-        raw_text = multimed_processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
+        return multimed_processor.batch_decode(predicted_ids, skip_special_tokens=True)
 
-    elif model_name == "Vosk German":
-        try:
-            vosk_transcriber = get_vosk_transcriber()
-            raw_text = vosk_transcriber.transcribe_file(audio_path)
-        except Exception as e:
-            return [f"❌ Vosk Fehler: {str(e)}"]
+def get_asr_batcher(registry_name: str) -> DynamicBatcher:
+    """Batcher pro Modell (Whisper-Größe bzw. MultiMed), wird beim ersten Gebrauch angelegt."""
+    batcher = _asr_batchers.get(registry_name)
+    if batcher is None:
+        with _asr_batchers_lock:
+            batcher = _asr_batchers.get(registry_name)
+            if batcher is None:
+                batch_fn = _multimed_batch if registry_name == "MultiMed Whisper" else _whisper_batch
+                batcher = DynamicBatcher(
+                    registry_name,
+                    lambda audios, name=registry_name, fn=batch_fn: fn(name, audios),
+                    ASR_BATCH_SIZE,
+                    ASR_BATCH_WAIT_MS
+                )
+                _asr_batchers[registry_name] = batcher
+    return batcher
 
-    else:
+def _run_asr(model_name: str, audio, whisper_model_id: str = None, batched: bool = False):
+    """
+    Führt nur die Spracherkennung aus.
+    
+    Args:
+        model_name: Name des Modells aus /api/models
+        audio: Dateipfad oder float32-Array (16kHz, mono)
+        whisper_model_id: Optional abweichendes Whisper-Modell (z.B. "base" im Quick-Mode)
+        batched: Kurze Whisper-Chunks über den Batcher mit anderen Requests zusammenfassen
+        
+    Returns:
+        Rohtext oder None, wenn das Modell nicht verfügbar ist
+    """
+    host = get_model_host_client()
+    if host is not None and model_name != VOSK_MODEL_NAME:
+        # Modelle liegen im Model-Host, PCM geht über Shared Memory
+        return host.run_asr(model_name, audio, whisper_model_id, batched)
+    
+    is_pcm = isinstance(audio, np.ndarray)
+    
+    if model_name.startswith("Whisper"):
+        model_id = whisper_model_id or model_name.split(" ")[1].lower()
+        _register_whisper(model_id)
+        if batched and is_pcm and len(audio) <= WHISPER_WINDOW_SAMPLES:
+            return get_asr_batcher(_whisper_registry_name(model_id)).submit(audio)
+        with registry.use(_whisper_registry_name(model_id), exclusive=True) as model:
+            # Whisper akzeptiert Pfade und float32-Arrays (16kHz)
+            raw_result = model.transcribe(audio, language="de")
+        return raw_result["text"]
+
+    if model_name == "SpeechBrain CRDNN":
+        with registry.use(model_name, exclusive=True) as speechbrain_model:
+            if is_pcm:
+                import torch
+                wavs = torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32)).unsqueeze(0)
+                return speechbrain_model.transcribe_batch(wavs, torch.tensor([1.0]))[0][0]
+            return speechbrain_model.transcribe_file(audio)
+
+    if model_name == "MultiMed Whisper" and registry.is_registered(model_name):
+        if not is_pcm:
+            # Verwende die robuste Audio-Lade-Funktion
+            audio, _ = load_audio_robust(audio)
+        # Der Processor schneidet ohnehin auf 30s zu, daher läuft MultiMed immer über den Batcher
+        return get_asr_batcher(model_name).submit(audio)
+
+    if model_name == "Vosk German":
+        vosk_transcriber = get_vosk_transcriber()
+        with registry.use(VOSK_MODEL_NAME):
+            if is_pcm:
+                return vosk_transcriber.transcribe_pcm(float32_to_pcm16(audio))
+            return vosk_transcriber.transcribe_file(audio)
+
+    return None
+
+def transcribe(model_name: str, audio, on_stage: Optional[Callable[[dict], None]] = None) -> list[str]:
+    """
+    Vollständige Transkription mit Rechtschreib- und Grammatikkorrektur.
+    
+    Args:
+        model_name: Name des Modells aus /api/models
+        audio: Dateipfad oder float32-Array (16kHz, mono) aus backend.audio_decoding
+        on_stage: Optionaler Callback für Streaming: bekommt nach jeder fertigen Stufe
+            ein Event ``{"stage", "step", "text", "seconds", ...}``, bei langen Aufnahmen
+            zusätzlich ``{"stage": "segment", ...}`` pro Segment
+    """
+    # Aufräumen nur bei Speicherdruck statt vor jedem Aufruf
+    get_memory_manager().maybe_collect()
+    
+    result_steps = []
+    metrics = get_metrics()
+
+    def emit(stage: str, **event):
+        if on_stage is not None:
+            on_stage({"stage": stage, **event})
+
+    def add_step(stage: str, step: str, started: float, **event):
+        result_steps.append(step)
+        emit(stage, step=step, seconds=round(time.perf_counter() - started, 3), **event)
+
+    def segment_done(segment, count: int):
+        emit("segment", index=segment.index, count=count, start=round(segment.start, 2),
+             end=round(segment.end, 2), text=segment.text.strip())
+
+    segments = None
+    started = time.perf_counter()
+    try:
+        with metrics.timer("stage.asr"):
+            if isinstance(audio, np.ndarray) and len(audio) >= SEGMENTED_MIN_SECONDS * 16000:
+                # Lange Aufnahmen: an Pausen schneiden und Segmente parallel transkribieren
+                # Mit Model-Host gehen die Segmente parallel an den Host statt in den Prozess-Pool
+                in_process = get_model_host_client() is not None or get_device() != "cpu"
+                segments = transcribe_segmented(
+                    _run_asr, model_name, audio, in_process=in_process, on_segment=segment_done
+                )
+                raw_text = join_segments(segments) if segments is not None else None
+            else:
+                raw_text = _run_asr(model_name, audio)
+    except Exception as e:
+        if model_name == "Vosk German":
+            return [f"❌ Vosk Fehler: {str(e)}"]
+        raise
+    if raw_text is None:
         return ["❌ Modell nicht verfügbar"]
 
-    result_steps.append(f"🗣 Ursprünglich: {raw_text}")
+    if segments is not None:
+        timeline = "\n".join(
+            f"[{format_timestamp(segment.start)}-{format_timestamp(segment.end)}] {segment.text.strip()}"
+            for segment in segments
+        )
+        result_steps.append(f"⏱ Segmente ({len(segments)}):\n{timeline}")
+    add_step("asr", f"🗣 Ursprünglich: {raw_text}", started, text=raw_text)
 
-    corrected, spell_changes = spellcheck(raw_text)
+    started = time.perf_counter()
+    with metrics.timer("stage.spellcheck"):
+        corrected, spell_changes = spellcheck(raw_text)
     if spell_changes:
-        result_steps.append(f"🪄 Rechtschreibkorrektur: {corrected}\nÄnderungen: {spell_changes}")
+        step = f"🪄 Rechtschreibkorrektur: {corrected}\nÄnderungen: {spell_changes}"
     else:
-        result_steps.append("🪄 Keine Rechtschreibkorrekturen nötig")
+        step = "🪄 Keine Rechtschreibkorrekturen nötig"
+    add_step("spellcheck", step, started, text=corrected, changes=spell_changes)
 
-    final_text, grammar_changes = grammar_fix(corrected)
+    started = time.perf_counter()
+    with metrics.timer("stage.grammar"):
+        final_text, grammar_changes = grammar_fix(corrected)
     if grammar_changes:
-        result_steps.append(f"🧠 Grammatik-Korrektur: {final_text}\nÄnderungen: {grammar_changes}")
+        step = f"🧠 Grammatik-Korrektur: {final_text}\nÄnderungen: {grammar_changes}"
     else:
-        result_steps.append("🧠 Keine Grammatikänderungen nötig")
+        step = "🧠 Keine Grammatikänderungen nötig"
+    add_step("grammar", step, started, text=final_text, changes=grammar_changes)
 
     result_steps.append(f"✅ Final: {final_text}")
     return result_steps
@@ -134,111 +432,123 @@ def transcribe_audio_chunk(model_name: str, audio_path: str, quick_mode: bool =
     Transkribiert einen Audio-Chunk für Live-Transkription.
     Verwendet weniger Post-Processing für schnellere Ergebnisse.
     """
-    gc.collect()
-    torch.cuda.empty_cache()
-    
-    raw_text = ""
-    
-    try:
-        if model_name.startswith("Whisper"):
-            model_id = model_name.split(" ")[1].lower()
-            if model_id not in loaded_whisper_models:
-                loaded_whisper_models[model_id] = whisper.load_model(model_id, device=DEVICE)
-            model = loaded_whisper_models[model_id]
-            
-            # Für Live-Transkription nutzen wir kleinere Modelle für Geschwindigkeit
-            if quick_mode and model_id in ["large-v3", "medium"]:
-                if "base" not in loaded_whisper_models:
-                    loaded_whisper_models["base"] = whisper.load_model("base", device=DEVICE)
-                model = loaded_whisper_models["base"]
-            
-            raw_result = model.transcribe(audio_path, language="de")
-            raw_text = raw_result["text"]
+    return _transcribe_chunk(model_name, audio_path, quick_mode)
 
-        elif model_name == "SpeechBrain CRDNN":
-            raw_text = speechbrain_model.transcribe_file(audio_path)
+def transcribe_pcm_chunk(model_name: str, audio: np.ndarray, quick_mode: bool = True) -> str:
+    """
+    Transkribiert einen PCM-Block (float32, 16kHz, mono) direkt aus dem Speicher.
+    Kein Container-Parsing, keine temporären Dateien, keine Subprozesse.
+    """
+    return _transcribe_chunk(model_name, audio, quick_mode)
 
-        elif model_name == "MultiMed Whisper" and multimed_model:
-            # Verwende die robuste Audio-Lade-Funktion
-            audio, sr = load_audio_robust(audio_path)
-            input_values = multimed_processor(audio, return_tensors="pt").input_features.to(DEVICE)
-            with torch.no_grad():
-                predicted_ids = multimed_model.generate(input_values)
-            raw_text = multimed_processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
-
-        elif model_name == "Vosk German":
-            try:
-                vosk_transcriber = get_vosk_transcriber()
-                raw_text = vosk_transcriber.transcribe_wav_chunk(audio_path)
-            except Exception as e:
+def _transcribe_chunk(model_name: str, audio, quick_mode: bool) -> str:
+    """Gemeinsame Chunk-Transkription für Dateipfade und float32-Arrays."""
+    get_memory_manager().maybe_collect()
+    
+    try:
+        whisper_model_id = quick_whisper_model_id(model_name) if quick_mode else None
+        
+        metrics = get_metrics()
+        try:
+            with metrics.timer("stage.asr_chunk"):
+                raw_text = _run_asr(model_name, audio, whisper_model_id, batched=True)
+        except Exception as e:
+            if model_name == "Vosk German":
                 return f"❌ Vosk Chunk Fehler: {str(e)}"
-
-        else:
+            raise
+        
+        if raw_text is None:
             return "❌ Modell nicht verfügbar"
 
+        with metrics.timer("stage.spellcheck"):
+            corrected, _ = spellcheck(raw_text)
+
         # Im Quick-Mode nur minimale Korrektur
         if quick_mode:
             # Nur Spellcheck, keine Grammatikkorrektur für Geschwindigkeit
-            corrected, _ = spellcheck(raw_text)
             return corrected.strip()
         else:
             # Vollständige Verarbeitung
-            corrected, _ = spellcheck(raw_text)
-            final_text, _ = grammar_fix(corrected)
+            with metrics.timer("stage.grammar"):
+                final_text, _ = grammar_fix(corrected)
             return final_text.strip()
             
     except Exception as e:
         print(f"Transcription error in transcribe_audio_chunk: {e}")
         return f"❌ Fehler bei der Transkription: {str(e)}"
 
-def convert_audio_to_wav(input_path: str, output_path: str) -> bool:
+# Name des Spellcheck-Wörterbuchs in der Warmup-Liste
+SPELLCHECK_WARMUP_NAME = "Spellcheck"
+
+def warmup_model(model_name: str):
+    """Lädt ein Modell und führt eine kurze Dummy-Inferenz aus (1s Stille bzw. ein Testsatz)."""
+    if model_name == SPELLCHECK_WARMUP_NAME:
+        spellcheck("Der Patient hat Fieber")
+    elif model_name == GRAMMAR_MODEL_NAME:
+        grammar_fix("Der Patient hat Fieber.")
+    else:
+        _run_asr(model_name, np.zeros(16000, dtype=np.float32))
+
+def warmup_tasks(model_names: list) -> list:
+    """Warmup-Tasks (Name, Funktion) für alle verfügbaren Modelle aus ``model_names``."""
+    tasks = []
+    for name in model_names:
+        if name.startswith("Whisper "):
+            _register_whisper(name.split(" ", 1)[1])
+        available = USE_SPELLCHECK if name == SPELLCHECK_WARMUP_NAME else registry.is_registered(name)
+        if available:
+            tasks.append((name, lambda name=name: warmup_model(name)))
+        else:
+            print(f"Warmup: {name} nicht verfügbar, übersprungen")
+    return tasks
+
+def preload_models(model_names: list) -> list:
     """
-    Konvertiert Audio-Dateien zu WAV-Format für bessere Kompatibilität
+    Lädt Modelle ohne Dummy-Inferenz und pinnt sie (Prefork-Start, ``run.py --prod``).
+
+    Die Gewichte werden nach dem fork() von allen Workern copy-on-write geteilt;
+    gepinnte Modelle entlädt kein Worker, sonst würde er sie später als eigene Kopie neu laden.
     """
-    try:
-        # Versuche zuerst mit pydub
-        audio = AudioSegment.from_file(input_path)
-        audio = audio.set_frame_rate(16000).set_channels(1)  # Mono, 16kHz
-        audio.export(output_path, format="wav")
-        return True
-    except Exception as e:
-        print(f"pydub conversion failed: {e}")
+    loaded = []
+    for name in model_names:
+        if name.startswith("Whisper "):
+            _register_whisper(name.split(" ", 1)[1])
         try:
-            # Fallback mit ffmpeg direkt
-            subprocess.run([
-                'ffmpeg', '-i', input_path, 
-                '-ar', '16000', '-ac', '1', 
-                '-y', output_path
-            ], check=True, capture_output=True)
-            return True
-        except Exception as e2:
-            print(f"ffmpeg conversion failed: {e2}")
-            return False
+            if name == SPELLCHECK_WARMUP_NAME:
+                if not USE_SPELLCHECK:
+                    continue
+                # Reines Python, keine Threads: Wörterbuch vor dem fork laden
+                warmup_model(name)
+            elif get_model_host_client() is not None and name != VOSK_MODEL_NAME:
+                print(f"Preload: {name} liegt im Model-Host, übersprungen")
+                continue
+            elif registry.is_registered(name):
+                registry.load(name)
+                registry.pin(name)
+            else:
+                print(f"Preload: {name} nicht verfügbar, übersprungen")
+                continue
+            loaded.append(name)
+        except Exception as e:
+            print(f"Preload: {name} fehlgeschlagen: {e}")
+    return loaded
 
 def load_audio_robust(audio_path: str):
     """
-    Lädt Audio-Dateien robust mit mehreren Fallbacks
+    Lädt Audio-Dateien robust mit mehreren Fallbacks, ohne temporäre Dateien
     """
     try:
         # Versuche direktes Laden mit librosa
+        import librosa
         audio, sr = librosa.load(audio_path, sr=16000)
         return audio, sr
     except Exception as e:
         print(f"Direct librosa load failed: {e}")
         
-        # Erstelle temporäre WAV-Datei
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
-            temp_wav = tmp.name
-        
+        # Fallback: ffmpeg dekodiert direkt in den Speicher
         try:
-            if convert_audio_to_wav(audio_path, temp_wav):
-                audio, sr = librosa.load(temp_wav, sr=16000)
-                os.unlink(temp_wav)  # Lösche temporäre Datei
-                return audio, sr
-        except Exception as e2:
-            print(f"Conversion and load failed: {e2}")
-        finally:
-            if os.path.exists(temp_wav):
-                os.unlink(temp_wav)
+            return decode_audio_file(audio_path), 16000
+        except AudioDecodeError as e2:
+            print(f"FFmpeg pipe decoding failed: {e2}")
         
         raise Exception(f"Could not load audio file: {audio_path}")
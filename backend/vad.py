@@ -0,0 +1,192 @@
+"""
+Voice activity detection in front of the ASR models.
+
+A vectorized frame-energy / zero-crossing-rate detector (numpy only, no
+model): audio is cut into 30 ms frames, frames clearly above the adaptive
+noise floor count as speech, quiet frames with a high zero-crossing rate
+(hiss, fan noise) do not. Speech regions are padded by a short hangover so
+word onsets and endings are not clipped.
+
+One ``VoiceActivityDetector`` is kept per connection; it tracks the noise
+floor across chunks and the speech ratio of the session. Idle microphones
+therefore cost only this numpy pass instead of a model forward pass.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, NamedTuple
+
+import numpy as np
+
+from backend.metrics import get_metrics
+
+# === Konfiguration ===
+VAD_ENABLED = os.environ.get("ASR_VAD", "1") != "0"
+VAD_FRAME_MS = 30
+# Frames unter diesem Pegel (dBFS) sind immer Stille
+VAD_MIN_ENERGY_DB = float(os.environ.get("ASR_VAD_MIN_DB", "-50"))
+# Sprache muss so weit über dem Grundrauschen liegen
+VAD_NOISE_MARGIN_DB = float(os.environ.get("ASR_VAD_MARGIN_DB", "10"))
+# Leise Frames mit mehr Nulldurchgängen sind Rauschen, keine Sprache
+VAD_MAX_ZCR = 0.4
+# Anpassung des Grundrauschens pro Aufruf: schnell nach unten, langsam und begrenzt nach oben
+VAD_FLOOR_FALL_RATE = 0.5
+VAD_FLOOR_RISE_RATE = 0.05
+VAD_FLOOR_MAX_RISE_DB = 0.5
+# Aufgefüllte Frames vor/nach Sprache (Wortanfänge und -enden nicht abschneiden)
+VAD_HANGOVER_FRAMES = 8
+# Chunks mit weniger Sprache werden gar nicht transkribiert
+VAD_MIN_SPEECH_SECONDS = float(os.environ.get("ASR_VAD_MIN_SPEECH_SECONDS", "0.25"))
+# Stille nach einer Äußerung, die Vosk noch bekommt, damit der Recognizer die Äußerung abschließt
+VAD_STREAM_TRAILING_SILENCE_SECONDS = 0.6
+
+
+class VadResult(NamedTuple):
+    """Speech-only audio of one chunk plus its speech statistics."""
+    audio: np.ndarray
+    speech_seconds: float
+    total_seconds: float
+
+    @property
+    def has_speech(self) -> bool:
+        return self.speech_seconds >= VAD_MIN_SPEECH_SECONDS
+
+    @property
+    def speech_ratio(self) -> float:
+        return self.speech_seconds / self.total_seconds if self.total_seconds else 0.0
+
+
+def frame_features(audio: np.ndarray, frame_size: int):
+    """Per-frame energy in dBFS and zero-crossing rate (trailing partial frame ignored)."""
+    frame_count = len(audio) // frame_size
+    frames = audio[:frame_count * frame_size].reshape(frame_count, frame_size)
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    zcr = np.mean(np.abs(np.diff(np.signbit(frames), axis=1)), axis=1)
+    return energy_db, zcr
+
+
+class VoiceActivityDetector:
+    """Energy/ZCR VAD with an adaptive noise floor and per-session statistics."""
+
+    def __init__(self, sample_rate: int = 16000, name: str = ""):
+        self.sample_rate = sample_rate
+        self.name = name
+        self.frame_size = sample_rate * VAD_FRAME_MS // 1000
+        self.noise_floor_db = VAD_MIN_ENERGY_DB
+        self.total_seconds = 0.0
+        self.speech_seconds = 0.0
+        self.dropped_chunks = 0
+        # Zustand für den Stream-Filter
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._trailing_frames = int(VAD_STREAM_TRAILING_SILENCE_SECONDS * 1000 / VAD_FRAME_MS)
+        self._silent_frames = self._trailing_frames + 1
+        self._preroll = deque(maxlen=VAD_HANGOVER_FRAMES)
+        self._lock = threading.Lock()
+
+    def _speech_mask(self, audio: np.ndarray) -> np.ndarray:
+        energy_db, zcr = frame_features(audio, self.frame_size)
+        if len(energy_db) == 0:
+            return np.zeros(0, dtype=bool)
+
+        threshold = max(VAD_MIN_ENERGY_DB, self.noise_floor_db + VAD_NOISE_MARGIN_DB)
+        loud = energy_db > threshold
+        noisy = (zcr > VAD_MAX_ZCR) & (energy_db < threshold + VAD_NOISE_MARGIN_DB)
+        speech = loud & ~noisy
+        self._update_noise_floor(energy_db[~speech])
+        return speech
+
+    def _update_noise_floor(self, background_db: np.ndarray):
+        # Nur Frames ohne Sprache: sonst wandert das Grundrauschen bei langen Äußerungen
+        # Richtung Sprachpegel und trim() schneidet echte Sprache ab
+        if len(background_db) == 0:
+            return
+        delta = np.percentile(background_db, 10) - self.noise_floor_db
+        if delta < 0:
+            step = VAD_FLOOR_FALL_RATE * delta
+        else:
+            step = min(VAD_FLOOR_RISE_RATE * delta, VAD_FLOOR_MAX_RISE_DB)
+        self.noise_floor_db = max(VAD_MIN_ENERGY_DB, self.noise_floor_db + float(step))
+
+    def _record(self, total_frames: int, speech_frames: int):
+        frame_seconds = self.frame_size / self.sample_rate
+        self.total_seconds += total_frames * frame_seconds
+        self.speech_seconds += speech_frames * frame_seconds
+        metrics = get_metrics()
+        metrics.increment("vad.audio_seconds", total_frames * frame_seconds)
+        metrics.increment("vad.speech_seconds", speech_frames * frame_seconds)
+
+    def trim(self, audio: np.ndarray) -> VadResult:
+        """
+        Keep only the speech regions (with hangover) of a complete chunk.
+
+        Returns:
+            ``VadResult`` whose ``has_speech`` is False for silent chunks
+        """
+        with self._lock:
+            speech = self._speech_mask(audio)
+            if len(speech) == 0:
+                # Kürzer als ein Frame: nichts zu transkribieren
+                self.dropped_chunks += 1
+                get_metrics().increment("vad.dropped_chunks")
+                return VadResult(audio[:0], 0.0, len(audio) / self.sample_rate)
+            self._record(len(speech), int(speech.sum()))
+            # Hangover um jeden Sprach-Frame; "same" liefert bei kurzen Chunks mehr Werte als Frames
+            hangover = np.ones(2 * VAD_HANGOVER_FRAMES + 1)
+            keep = np.convolve(np.pad(speech, VAD_HANGOVER_FRAMES), hangover, mode="valid") > 0
+            frames = audio[:len(keep) * self.frame_size].reshape(-1, self.frame_size)
+            result = VadResult(
+                frames[keep].reshape(-1),
+                int(speech.sum()) * self.frame_size / self.sample_rate,
+                len(audio) / self.sample_rate
+            )
+            if not result.has_speech:
+                self.dropped_chunks += 1
+                get_metrics().increment("vad.dropped_chunks")
+            return result
+
+    def filter_stream(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Filter continuous audio for a streaming recognizer.
+
+        Speech passes through, preceded by the last few dropped frames (so onsets
+        are not clipped) and followed by up to
+        ``VAD_STREAM_TRAILING_SILENCE_SECONDS`` of silence so the recognizer can
+        close the utterance; longer silence is dropped. Samples that do not fill
+        a whole frame are kept for the next call.
+        """
+        with self._lock:
+            if len(self._remainder):
+                audio = np.concatenate((self._remainder, audio))
+            usable = len(audio) - len(audio) % self.frame_size
+            self._remainder = audio[usable:].copy()
+            if usable == 0:
+                return audio[:0]
+
+            speech = self._speech_mask(audio[:usable])
+            self._record(len(speech), int(speech.sum()))
+
+            frames = audio[:usable].reshape(-1, self.frame_size)
+            kept = []
+            for frame, is_speech in zip(frames, speech):
+                if is_speech:
+                    kept.extend(self._preroll)
+                    self._preroll.clear()
+                    self._silent_frames = 0
+                    kept.append(frame)
+                else:
+                    self._silent_frames += 1
+                    if self._silent_frames <= self._trailing_frames:
+                        kept.append(frame)
+                    else:
+                        self._preroll.append(frame)
+            return np.concatenate(kept) if kept else audio[:0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "speech_ratio": round(self.speech_seconds / self.total_seconds, 3) if self.total_seconds else 0.0,
+                "speech_seconds": round(self.speech_seconds, 2),
+                "audio_seconds": round(self.total_seconds, 2),
+                "dropped_chunks": self.dropped_chunks,
+            }
@@ -3,6 +3,7 @@ Vosk-based real-time speech-to-text transcription module.
 Optimized for continuous/streaming recognition of German speech.
 """
 
+import asyncio
 import json
 import os
 import wave
@@ -10,12 +11,61 @@ import vosk
 import queue
 import threading
 import time
-from typing import Optional, Callable, Dict, Any
+import uuid
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional, Callable, Dict, Any, List, Tuple, Union
 import gc
 
+from backend.metrics import get_metrics
+from backend.model_registry import get_model_registry
+
 # Model path configuration
 VOSK_MODEL_PATH = "/home/paul-schaefer/Dokumente/Klinikum_Fulda/Spech_to_Text_Demo/vosk-model-de-tuda-0.6-900k"
 
+# Maximale Anzahl gleichzeitiger Streaming-Sessions pro Prozess
+VOSK_MAX_SESSIONS = int(os.environ.get("VOSK_MAX_SESSIONS", "64"))
+
+# Name des Standard-Modells in der Modell-Registry (wie in /api/models)
+VOSK_MODEL_NAME = "Vosk German"
+
+# Obergrenze der noch nicht erkannten Audiodaten pro Session (Sekunden)
+VOSK_QUEUE_MAX_SECONDS = float(os.environ.get("ASR_VOSK_QUEUE_SECONDS", "5"))
+# Verhalten bei voller Queue: block, drop_oldest, coalesce
+VOSK_QUEUE_POLICIES = ("block", "drop_oldest", "coalesce")
+VOSK_QUEUE_POLICY = os.environ.get("ASR_VOSK_QUEUE_POLICY", "coalesce")
+# Längste Wartezeit des Produzenten bei "block", danach wird doch das älteste Audio verworfen
+VOSK_QUEUE_BLOCK_TIMEOUT = 2.0
+
+def _vosk_registry_name(model_path: str) -> str:
+    return VOSK_MODEL_NAME if model_path == VOSK_MODEL_PATH else f"Vosk {model_path}"
+
+def _load_vosk_model(model_path: str) -> vosk.Model:
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Vosk model not found at {model_path}")
+    
+    print(f"Loading Vosk model from {model_path}")
+    model = vosk.Model(model_path)
+    print("Vosk model loaded successfully")
+    return model
+
+def _register_vosk_model(model_path: str) -> str:
+    name = _vosk_registry_name(model_path)
+    get_model_registry().register(name, lambda: _load_vosk_model(model_path))
+    return name
+
+_register_vosk_model(VOSK_MODEL_PATH)
+
+def load_shared_vosk_model(model_path: str = VOSK_MODEL_PATH) -> vosk.Model:
+    """
+    Load a Vosk model once per process and return the shared instance.
+
+    ``vosk.Model`` is read-only after loading and can back any number of
+    ``KaldiRecognizer`` objects, so all transcribers and streaming sessions
+    share one copy from the model registry instead of loading it again.
+    """
+    return get_model_registry().load(_register_vosk_model(model_path))
+
 class VoskTranscriber:
     """
     Real-time transcriber using Vosk for German speech recognition.
@@ -25,28 +75,17 @@ class VoskTranscriber:
     def __init__(self, model_path: str = VOSK_MODEL_PATH, sample_rate: int = 16000):
         self.model_path = model_path
         self.sample_rate = sample_rate
-        self.model = None
-        self.recognizer = None
         # Lazy loading - Modell wird erst beim ersten Gebrauch geladen
     
-    def _load_model(self):
-        """Load the Vosk model."""
-        if self.model is not None:
-            return  # Bereits geladen
-            
+    def _load_model(self) -> vosk.Model:
+        """
+        Return the shared Vosk model.
+        
+        The model is fetched from the registry on every call and not kept on
+        the instance, so the registry can unload it while it is idle.
+        """
         try:
-            if not os.path.exists(self.model_path):
-                raise FileNotFoundError(f"Vosk model not found at {self.model_path}")
-            
-            print(f"Loading Vosk model from {self.model_path}")
-            self.model = vosk.Model(self.model_path)
-            self.recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate)
-            
-            # Enable word-level timestamps and confidence scores
-            self.recognizer.SetWords(True)
-            
-            print("Vosk model loaded successfully")
-            
+            return load_shared_vosk_model(self.model_path)
         except Exception as e:
             print(f"Error loading Vosk model: {e}")
             raise
@@ -61,7 +100,7 @@ class VoskTranscriber:
         Returns:
             Transcribed text
         """
-        self._load_model()  # Lazy loading
+        model = self._load_model()  # Lazy loading
         
         try:
             # Open wave file
@@ -74,7 +113,7 @@ class VoskTranscriber:
                     print(f"Warning: Audio has {wf.getnchannels()} channels, expected 1 (mono)")
                 
                 # Create a new recognizer for this transcription
-                rec = vosk.KaldiRecognizer(self.model, wf.getframerate())
+                rec = vosk.KaldiRecognizer(model, wf.getframerate())
                 rec.SetWords(True)
                 
                 # Process audio in chunks
@@ -112,11 +151,11 @@ class VoskTranscriber:
         Returns:
             Dictionary with transcription result and metadata
         """
-        self._load_model()  # Lazy loading
+        model = self._load_model()  # Lazy loading
         
         try:
             # Create a new recognizer for this chunk
-            rec = vosk.KaldiRecognizer(self.model, self.sample_rate)
+            rec = vosk.KaldiRecognizer(model, self.sample_rate)
             rec.SetWords(True)
             
             # Process the audio data
@@ -147,6 +186,39 @@ class VoskTranscriber:
                 'partial': False
             }
     
+    def transcribe_pcm(self, audio_data: bytes) -> str:
+        """
+        Transcribe a complete block of raw 16-bit mono PCM at ``sample_rate``.
+        
+        Args:
+            audio_data: Raw audio bytes (16-bit PCM)
+            
+        Returns:
+            Transcribed text
+        """
+        model = self._load_model()  # Lazy loading
+        
+        try:
+            rec = vosk.KaldiRecognizer(model, self.sample_rate)
+            
+            # In Blöcken füttern, damit bei langen Aufnahmen keine Äußerung verloren geht
+            results = []
+            block_size = 8000  # 4000 Frames à 2 Bytes, wie in transcribe_file
+            for offset in range(0, len(audio_data), block_size):
+                if rec.AcceptWaveform(audio_data[offset:offset + block_size]):
+                    result = json.loads(rec.Result())
+                    if result.get('text'):
+                        results.append(result['text'])
+            
+            final_result = json.loads(rec.FinalResult())
+            if final_result.get('text'):
+                results.append(final_result['text'])
+            return ' '.join(results).strip()
+            
+        except Exception as e:
+            print(f"Error transcribing PCM block: {e}")
+            return ""
+    
     def transcribe_wav_chunk(self, wav_path: str) -> str:
         """
         Transcribe a WAV file chunk for real-time processing.
@@ -158,7 +230,7 @@ class VoskTranscriber:
         Returns:
             Transcribed text
         """
-        self._load_model()  # Lazy loading
+        model = self._load_model()  # Lazy loading
         
         try:
             with wave.open(wav_path, 'rb') as wf:
@@ -166,7 +238,7 @@ class VoskTranscriber:
                 audio_data = wf.readframes(wf.getnframes())
                 
                 # Create a new recognizer for this chunk
-                rec = vosk.KaldiRecognizer(self.model, wf.getframerate())
+                rec = vosk.KaldiRecognizer(model, wf.getframerate())
                 
                 # Process the entire chunk at once
                 if rec.AcceptWaveform(audio_data):
@@ -184,78 +256,266 @@ class VoskTranscriber:
             print(f"Error transcribing WAV chunk {wav_path}: {e}")
             return ""
 
+class AudioQueue:
+    """
+    Bounded audio queue of one streaming session.
+    
+    Holds 16-bit PCM chunks (with their arrival time) and ``Future`` flush
+    markers. At most ``max_seconds`` of audio are kept; when a new chunk does
+    not fit, ``policy`` decides:
+    
+      * ``block``: the producer waits until the worker has caught up (at most
+        ``VOSK_QUEUE_BLOCK_TIMEOUT``), which pushes back on the client;
+      * ``drop_oldest``: the oldest queued audio is dropped;
+      * ``coalesce``: like ``drop_oldest``, but the worker also takes all
+        queued audio in one piece, so a backlog costs one recognizer call and
+        one partial result instead of one per chunk.
+    
+    Flush markers are never dropped or merged.
+    """
+    
+    def __init__(self, sample_rate: int = 16000, max_seconds: float = VOSK_QUEUE_MAX_SECONDS,
+                 policy: str = VOSK_QUEUE_POLICY):
+        if policy not in VOSK_QUEUE_POLICIES:
+            raise ValueError(f"Unknown Vosk queue policy {policy!r} (expected one of {VOSK_QUEUE_POLICIES})")
+        self.policy = policy
+        self.bytes_per_second = sample_rate * 2
+        self.max_bytes = int(max_seconds * self.bytes_per_second)
+        self._items: deque = deque()
+        self._queued_bytes = 0
+        self._cond = threading.Condition()
+        self.dropped_bytes = 0
+        self.dropped_chunks = 0
+    
+    @property
+    def backlog_seconds(self) -> float:
+        return self._queued_bytes / self.bytes_per_second
+    
+    @property
+    def dropped_seconds(self) -> float:
+        return self.dropped_bytes / self.bytes_per_second
+    
+    def put_marker(self, marker: Future):
+        with self._cond:
+            self._items.append(marker)
+            self._cond.notify()
+    
+    def put_audio(self, audio_data: bytes):
+        """Queue a chunk, applying the overflow policy if it does not fit."""
+        size = len(audio_data)
+        metrics = get_metrics()
+        with self._cond:
+            if self.policy == "block" and self._queued_bytes and self._queued_bytes + size > self.max_bytes:
+                start = time.perf_counter()
+                self._cond.wait_for(
+                    lambda: not self._queued_bytes or self._queued_bytes + size <= self.max_bytes,
+                    timeout=VOSK_QUEUE_BLOCK_TIMEOUT
+                )
+                metrics.observe("vosk.queue_blocked_seconds", time.perf_counter() - start)
+            
+            # Ältestes Audio verwerfen, bis der neue Chunk passt (ein einzelner zu großer Chunk bleibt)
+            dropped_bytes = dropped_chunks = 0
+            index = 0
+            while self._queued_bytes and self._queued_bytes + size > self.max_bytes and index < len(self._items):
+                item = self._items[index]
+                if isinstance(item, Future):
+                    index += 1
+                    continue
+                del self._items[index]
+                self._queued_bytes -= len(item[0])
+                dropped_bytes += len(item[0])
+                dropped_chunks += 1
+            
+            self._items.append((audio_data, time.monotonic()))
+            self._queued_bytes += size
+            self.dropped_bytes += dropped_bytes
+            self.dropped_chunks += dropped_chunks
+            self._cond.notify_all()
+        
+        if dropped_chunks:
+            metrics.increment("vosk.dropped_chunks", dropped_chunks)
+            metrics.increment("vosk.dropped_seconds", dropped_bytes / self.bytes_per_second)
+    
+    def get(self, timeout: float) -> Union[Future, Tuple[bytes, float], None]:
+        """
+        Next flush marker or ``(audio, arrival_time)``, or None after ``timeout``.
+        
+        With ``coalesce`` all audio up to the next marker is returned as one
+        chunk; the arrival time is that of its oldest part.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout=timeout):
+                return None
+            item = self._items.popleft()
+            if isinstance(item, Future):
+                return item
+            parts: List[bytes] = [item[0]]
+            if self.policy == "coalesce":
+                while self._items and not isinstance(self._items[0], Future):
+                    parts.append(self._items.popleft()[0])
+            self._queued_bytes -= sum(len(part) for part in parts)
+            self._cond.notify_all()
+        
+        if len(parts) > 1:
+            get_metrics().increment("vosk.coalesced_chunks", len(parts) - 1)
+            return b"".join(parts), item[1]
+        return item
+    
+    def clear(self):
+        """Drop everything and release a producer waiting in ``block`` mode."""
+        with self._cond:
+            for item in self._items:
+                if isinstance(item, Future) and not item.done():
+                    item.set_result(None)
+            self._items.clear()
+            self._queued_bytes = 0
+            self._cond.notify_all()
+
 class VoskStreamTranscriber:
     """
     Streaming transcriber for continuous real-time recognition.
+    
+    Each instance is one session: it owns its recognizer, queues and worker
+    thread, while the underlying ``vosk.Model`` is shared process-wide.
+    Use ``VoskSessionManager`` to create one instance per connection.
+    
+    Results are delivered either to ``result_queue`` (``get_result``) or, when
+    streaming was started with an event loop, pushed into the asyncio queue
+    ``results`` via ``call_soon_threadsafe``: the loop awaits them without
+    polling or blocking calls, and ``None`` marks the end of the session.
+    
+    Audio waits in a bounded ``AudioQueue``. Every result carries ``lag``:
+    how far the recognizer is behind real time, i.e. the seconds between the
+    arrival of the audio and the end of its recognition.
     """
     
-    def __init__(self, model_path: str = VOSK_MODEL_PATH, sample_rate: int = 16000):
+    def __init__(self, model_path: str = VOSK_MODEL_PATH, sample_rate: int = 16000,
+                 session_id: Optional[str] = None, on_close: Optional[Callable[[str], None]] = None,
+                 queue_policy: str = VOSK_QUEUE_POLICY, queue_max_seconds: float = VOSK_QUEUE_MAX_SECONDS):
         self.model_path = model_path
         self.sample_rate = sample_rate
+        self.session_id = session_id
         self.model = None
         self.recognizer = None
-        self.audio_queue = queue.Queue()
+        self.audio_queue = AudioQueue(sample_rate, queue_max_seconds, queue_policy)
+        # Rückstand der Erkennung gegenüber Echtzeit (Sekunden)
+        self.lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
         self.result_queue = queue.Queue()
+        self.results: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         self.is_running = False
         self.worker_thread = None
+        self._on_close = on_close
         # Lazy loading - Modell wird erst beim ersten Start geladen
     
     def _load_model(self):
-        """Load the Vosk model."""
-        if self.model is not None:
+        """Create this session's recognizer on top of the shared Vosk model."""
+        if self.recognizer is not None:
             return  # Bereits geladen
             
         try:
-            if not os.path.exists(self.model_path):
-                raise FileNotFoundError(f"Vosk model not found at {self.model_path}")
-            
-            print(f"Loading Vosk streaming model from {self.model_path}")
-            self.model = vosk.Model(self.model_path)
+            self.model = load_shared_vosk_model(self.model_path)
             self.recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate)
             self.recognizer.SetWords(True)
             
-            print("Vosk streaming model loaded successfully")
-            
         except Exception as e:
             print(f"Error loading Vosk streaming model: {e}")
             raise
     
-    def start_streaming(self, result_callback: Optional[Callable] = None):
+    def start_streaming(self, result_callback: Optional[Callable] = None,
+                        loop: Optional[asyncio.AbstractEventLoop] = None):
         """
         Start the streaming transcription worker.
         
         Args:
             result_callback: Optional callback function for results
+            loop: Event loop that receives the results in ``results`` (instead of ``result_queue``)
         """
         if self.is_running:
             return
         
         self._load_model()  # Lazy loading beim ersten Start
         
+        if loop is not None:
+            self._loop = loop
+            self.results = asyncio.Queue()
         self.is_running = True
         self.worker_thread = threading.Thread(
             target=self._stream_worker,
-            args=(result_callback,)
+            args=(result_callback,),
+            name=f"vosk-session-{self.session_id}",
+            daemon=True
         )
         self.worker_thread.start()
-        print("Vosk streaming started")
+        print(f"Vosk streaming started (session {self.session_id})")
     
     def stop_streaming(self):
-        """Stop the streaming transcription worker."""
+        """Stop the streaming transcription worker and release the session."""
+        was_running = self.is_running
         self.is_running = False
-        if self.worker_thread:
+        if self.worker_thread and self.worker_thread is not threading.current_thread():
             self.worker_thread.join(timeout=2.0)
-        print("Vosk streaming stopped")
+        self.worker_thread = None
+        self.audio_queue.clear()
+        if was_running and self._loop is not None:
+            # Ende der Ergebnisse für den Empfänger im Event-Loop
+            self._push(None)
+        # Recognizer und Modell-Referenz freigeben, damit die Registry das Modell entladen kann
+        self.recognizer = None
+        self.model = None
+        
+        if self._on_close:
+            on_close, self._on_close = self._on_close, None
+            on_close(self.session_id)
+        
+        if was_running:
+            print(f"Vosk streaming stopped (session {self.session_id})")
+    
+    @property
+    def queue_policy(self) -> str:
+        return self.audio_queue.policy
     
     def add_audio_chunk(self, audio_data: bytes):
         """
         Add audio data to the processing queue.
         
+        May block (policy ``block``) or drop older audio when the queue is full.
+        
         Args:
             audio_data: Raw audio bytes (16-bit PCM)
         """
         if self.is_running:
-            self.audio_queue.put(audio_data)
+            self.audio_queue.put_audio(audio_data)
+    
+    def flush(self) -> Future:
+        """
+        Mark the end of the current utterance.
+        
+        The worker finalizes the recognizer after all queued audio and emits
+        the remaining text as a final result.
+        
+        Returns:
+            Future that completes once the final result has been emitted
+        """
+        done = Future()
+        if self.is_running:
+            self.audio_queue.put_marker(done)
+        else:
+            done.set_result(None)
+        return done
+    
+    def stats(self) -> Dict[str, Any]:
+        """Lag, backlog and dropped audio of this session."""
+        return {
+            "session_id": self.session_id,
+            "policy": self.audio_queue.policy,
+            "lag_seconds": round(self.lag_seconds, 3),
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+            "backlog_seconds": round(self.audio_queue.backlog_seconds, 3),
+            "dropped_seconds": round(self.audio_queue.dropped_seconds, 3),
+            "dropped_chunks": self.audio_queue.dropped_chunks,
+        }
     
     def get_result(self, timeout: float = 0.1) -> Optional[Dict[str, Any]]:
         """
@@ -272,6 +532,33 @@ class VoskStreamTranscriber:
         except queue.Empty:
             return None
     
+    def _push(self, result: Optional[Dict[str, Any]]):
+        """Hand a result to the event loop (thread-safe, never blocks)."""
+        try:
+            self._loop.call_soon_threadsafe(self.results.put_nowait, result)
+        except RuntimeError:
+            # Event-Loop bereits geschlossen: niemand wartet mehr auf Ergebnisse
+            pass
+    
+    def _emit(self, result_dict: Dict[str, Any], result_callback: Optional[Callable]):
+        result_dict['lag'] = round(self.lag_seconds, 3)
+        result_dict['dropped_seconds'] = round(self.audio_queue.dropped_seconds, 3)
+        if self._loop is not None:
+            self._push(result_dict)
+        else:
+            self.result_queue.put(result_dict)
+        if result_callback:
+            try:
+                result_callback(result_dict)
+            except Exception as e:
+                print(f"Error in result callback: {e}")
+    
+    def _record_lag(self, received: float):
+        # Zeit vom Eintreffen des Audios bis zum Ende seiner Erkennung
+        self.lag_seconds = time.monotonic() - received
+        self.max_lag_seconds = max(self.max_lag_seconds, self.lag_seconds)
+        get_metrics().observe("vosk.lag_seconds", self.lag_seconds)
+    
     def _stream_worker(self, result_callback: Optional[Callable]):
         """Worker thread for processing audio stream."""
         print("Vosk stream worker started")
@@ -279,12 +566,32 @@ class VoskStreamTranscriber:
         while self.is_running:
             try:
                 # Get audio data from queue
-                audio_data = self.audio_queue.get(timeout=0.1)
+                item = self.audio_queue.get(timeout=0.1)
+                if item is None:
+                    continue
+                
+                if isinstance(item, Future):
+                    # flush(): Rest der Äußerung finalisieren
+                    final_result = json.loads(self.recognizer.FinalResult())
+                    if final_result.get('text'):
+                        self._emit({
+                            'text': final_result['text'],
+                            'confidence': final_result.get('conf', 0.0),
+                            'words': final_result.get('result', []),
+                            'partial': False,
+                            'timestamp': time.time()
+                        }, result_callback)
+                    item.set_result(None)
+                    continue
+                
+                audio_data, received = item
                 print(f"Processing audio chunk in worker: {len(audio_data)} bytes")
                 
                 # Process with Vosk
                 try:
-                    if self.recognizer.AcceptWaveform(audio_data):
+                    accepted = self.recognizer.AcceptWaveform(audio_data)
+                    self._record_lag(received)
+                    if accepted:
                         result = json.loads(self.recognizer.Result())
                         print(f"Vosk AcceptWaveform returned result: {result}")
                         
@@ -298,16 +605,7 @@ class VoskStreamTranscriber:
                             }
                             
                             print(f"Vosk final result: {result_dict}")
-                            
-                            # Add to result queue
-                            self.result_queue.put(result_dict)
-                            
-                            # Call callback if provided
-                            if result_callback:
-                                try:
-                                    result_callback(result_dict)
-                                except Exception as e:
-                                    print(f"Error in result callback: {e}")
+                            self._emit(result_dict, result_callback)
                     
                     # Always get partial result to show intermediate progress
                     partial_result = json.loads(self.recognizer.PartialResult())
@@ -323,22 +621,11 @@ class VoskStreamTranscriber:
                         }
                         
                         print(f"Vosk partial result: {result_dict}")
-                        
-                        # Add to result queue
-                        self.result_queue.put(result_dict)
-                        
-                        # Call callback if provided
-                        if result_callback:
-                            try:
-                                result_callback(result_dict)
-                            except Exception as e:
-                                print(f"Error in partial result callback: {e}")
+                        self._emit(result_dict, result_callback)
                                 
                 except Exception as vosk_error:
                     print(f"Vosk processing error: {vosk_error}")
                 
-            except queue.Empty:
-                continue
             except Exception as e:
                 print(f"Error in streaming worker: {e}")
         
@@ -348,9 +635,101 @@ class VoskStreamTranscriber:
         """Cleanup when object is destroyed."""
         self.stop_streaming()
 
+class VoskSessionManager:
+    """
+    Creates and tracks per-connection streaming sessions.
+    
+    All sessions share one loaded ``vosk.Model``; every session gets its own
+    ``KaldiRecognizer``, audio/result queues and worker thread, so concurrent
+    dictations never interleave audio or steal each other's results.
+    """
+    
+    def __init__(self, model_path: str = VOSK_MODEL_PATH, sample_rate: int = 16000,
+                 max_sessions: int = VOSK_MAX_SESSIONS):
+        self.model_path = model_path
+        self.model_name = _register_vosk_model(model_path)
+        self.sample_rate = sample_rate
+        self.max_sessions = max_sessions
+        self._sessions: Dict[str, VoskStreamTranscriber] = {}
+        self._lock = threading.Lock()
+    
+    def load_model(self) -> vosk.Model:
+        """Load the shared model ahead of the first session (e.g. for preloading)."""
+        return load_shared_vosk_model(self.model_path)
+    
+    def create_session(self, session_id: Optional[str] = None) -> VoskStreamTranscriber:
+        """
+        Create a new streaming session.
+        
+        Args:
+            session_id: Identifier of the session (e.g. the WebSocket connection id)
+            
+        Returns:
+            A fresh, not yet started ``VoskStreamTranscriber``
+        """
+        # Jede offene Session hält das Modell in der Registry, bis sie geschlossen wird
+        get_model_registry().acquire(self.model_name)
+        
+        with self._lock:
+            if session_id is None:
+                session_id = f"session-{uuid.uuid4().hex[:8]}"
+            error = None
+            if session_id in self._sessions:
+                error = ValueError(f"Vosk session {session_id} already exists")
+            elif len(self._sessions) >= self.max_sessions:
+                error = RuntimeError(f"Too many concurrent Vosk sessions ({self.max_sessions})")
+            if error is not None:
+                get_model_registry().release(self.model_name)
+                raise error
+            
+            session = VoskStreamTranscriber(
+                self.model_path,
+                self.sample_rate,
+                session_id=session_id,
+                on_close=self._forget
+            )
+            self._sessions[session_id] = session
+        
+        print(f"Vosk session created: {session_id} ({self.active_session_count()} active)")
+        return session
+    
+    def get_session(self, session_id: str) -> Optional[VoskStreamTranscriber]:
+        """Return the session with the given id, if it is still open."""
+        with self._lock:
+            return self._sessions.get(session_id)
+    
+    def close_session(self, session_id: str):
+        """Stop a session's worker and remove it from the manager."""
+        session = self.get_session(session_id)
+        if session:
+            session.stop_streaming()
+    
+    def _forget(self, session_id: str):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            get_model_registry().release(self.model_name)
+    
+    def active_session_count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+    
+    def session_stats(self) -> List[Dict[str, Any]]:
+        """Lag and queue statistics of every open session."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return [session.stats() for session in sessions]
+    
+    def close_all(self):
+        """Stop every open session."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            session.stop_streaming()
+
 # Global instances for reuse
 _vosk_transcriber = None
-_vosk_stream_transcriber = None
+_vosk_session_manager = None
 
 def get_vosk_transcriber() -> VoskTranscriber:
     """Get or create the global Vosk transcriber instance."""
@@ -359,23 +738,34 @@ def get_vosk_transcriber() -> VoskTranscriber:
         _vosk_transcriber = VoskTranscriber()
     return _vosk_transcriber
 
+def get_vosk_session_manager() -> VoskSessionManager:
+    """Get or create the global Vosk session manager."""
+    global _vosk_session_manager
+    if _vosk_session_manager is None:
+        _vosk_session_manager = VoskSessionManager()
+    return _vosk_session_manager
+
 def get_vosk_stream_transcriber() -> VoskStreamTranscriber:
-    """Get or create the global Vosk stream transcriber instance."""
-    global _vosk_stream_transcriber
-    if _vosk_stream_transcriber is None:
-        _vosk_stream_transcriber = VoskStreamTranscriber()
-    return _vosk_stream_transcriber
+    """
+    Create a new streaming session on the shared model.
+    
+    Kept for existing callers; every call returns an independent session
+    that is released again by ``stop_streaming()``.
+    """
+    return get_vosk_session_manager().create_session()
 
 def cleanup_vosk_resources():
     """Cleanup Vosk resources."""
-    global _vosk_transcriber, _vosk_stream_transcriber
+    global _vosk_transcriber, _vosk_session_manager
     
-    if _vosk_stream_transcriber:
-        _vosk_stream_transcriber.stop_streaming()
-        _vosk_stream_transcriber = None
+    if _vosk_session_manager:
+        _vosk_session_manager.close_all()
+        _vosk_session_manager = None
     
     if _vosk_transcriber:
         _vosk_transcriber = None
     
+    get_model_registry().unload(VOSK_MODEL_NAME)
+    
     gc.collect()
     print("Vosk resources cleaned up")
@@ -0,0 +1,135 @@
+"""
+Background model warmup.
+
+The server starts accepting connections immediately; models are loaded
+afterwards by a single background thread, one after another. Each warmup
+task loads a model and runs a short dummy inference so that lazy
+allocations (CUDA context, kernels, tokenizer caches) happen before the
+first real request. Requests that arrive while their model is still warming
+up can wait for it (``wait_until_ready``) or are told "warming up".
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.metrics import get_metrics
+
+# === Konfiguration ===
+# Modelle, die nach dem Start im Hintergrund geladen werden (kommagetrennt, leer = keine)
+WARMUP_MODELS = [
+    name.strip() for name in
+    os.environ.get("ASR_WARMUP_MODELS", "Spellcheck,SpeechBrain CRDNN,MultiMed Whisper,Grammar Corrector").split(",")
+    if name.strip()
+]
+# Wie lange ein Request höchstens auf ein Modell im Warmup wartet, bevor "warming up" gemeldet wird
+WARMUP_WAIT_SECONDS = float(os.environ.get("ASR_WARMUP_WAIT_SECONDS", "20"))
+
+# Zustände eines Warmup-Tasks
+WARMUP_PENDING = "pending"
+WARMUP_RUNNING = "warming_up"
+WARMUP_READY = "ready"
+WARMUP_FAILED = "failed"
+
+
+class WarmupScheduler:
+    """Runs warmup tasks sequentially in a daemon thread and tracks their state."""
+
+    def __init__(self):
+        self._tasks: "OrderedDict[str, Callable[[], Any]]" = OrderedDict()
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.started_at: Optional[float] = None
+
+    def schedule(self, name: str, task: Callable[[], Any]):
+        """Add a warmup task; tasks run in the order they were scheduled."""
+        with self._lock:
+            if name in self._tasks:
+                return
+            self._tasks[name] = task
+            self._state[name] = {"state": WARMUP_PENDING, "seconds": None, "error": None}
+            self._events[name] = threading.Event()
+
+    def start(self, tasks: List[Tuple[str, Callable[[], Any]]] = ()):
+        """Schedule ``tasks`` and start the background thread (once)."""
+        for name, task in tasks:
+            self.schedule(name, task)
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                pending = [name for name, state in self._state.items() if state["state"] == WARMUP_PENDING]
+                if not pending:
+                    self._thread = None
+                    return
+                name = pending[0]
+                task = self._tasks[name]
+                self._state[name]["state"] = WARMUP_RUNNING
+
+            print(f"Warmup: {name}")
+            start = time.perf_counter()
+            try:
+                task()
+                state, error = WARMUP_READY, None
+            except Exception as e:
+                print(f"Warmup of {name} failed: {e}")
+                state, error = WARMUP_FAILED, str(e)
+                get_metrics().increment("warmup.failures")
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self._state[name].update({"state": state, "seconds": round(elapsed, 2), "error": error})
+                self._events[name].set()
+            get_metrics().observe(f"warmup.seconds.{name}", elapsed)
+            print(f"Warmup: {name} {state} after {elapsed:.1f}s")
+
+    def state(self, name: str) -> Optional[str]:
+        """Warmup state of a model, or None if it is not part of the warmup."""
+        with self._lock:
+            entry = self._state.get(name)
+            return entry["state"] if entry else None
+
+    def is_warming(self, name: str) -> bool:
+        return self.state(name) in (WARMUP_PENDING, WARMUP_RUNNING)
+
+    def wait_until_ready(self, name: str, timeout: float = WARMUP_WAIT_SECONDS) -> bool:
+        """
+        Block until the warmup of ``name`` has finished (successfully or not).
+
+        Returns:
+            True if the model is not being warmed up (anymore), False on timeout
+        """
+        with self._lock:
+            event = self._events.get(name)
+        if event is None:
+            return True
+        return event.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        """Overall readiness plus the state of every warmup task."""
+        with self._lock:
+            tasks = {name: dict(state) for name, state in self._state.items()}
+        return {
+            "ready": all(t["state"] in (WARMUP_READY, WARMUP_FAILED) for t in tasks.values()),
+            "uptime_seconds": round(time.time() - self.started_at, 1) if self.started_at else 0,
+            "warmup": tasks,
+        }
+
+
+# Global instance for reuse
+_warmup_scheduler = WarmupScheduler()
+
+
+def get_warmup_scheduler() -> WarmupScheduler:
+    """Get the process-wide warmup scheduler."""
+    return _warmup_scheduler
@@ -1,6 +1,6 @@
 import { useEffect, useState, useRef } from "react";
 import { motion, AnimatePresence } from "framer-motion";
-import { getModels, transcribeAudioBlob, LiveTranscription } from "../API/transcription";
+import { getModels, transcribeAudioBlobStream, LiveTranscription } from "../API/transcription";
 import ModelSelector from "./ModelSelector";
 import AudioUploader from "./AudioUploader";
 import TranscriptionOutput from "./TranscriptionOutput";
@@ -41,7 +41,10 @@ export default function TranscriptionForm() {
     setOutput([]);
 
     try {
-      const steps = await transcribeAudioBlob(selectedModel, audioToSend);
+      // Zwischenstufen sofort anzeigen, am Ende durch die vollständigen Schritte ersetzen
+      const steps = await transcribeAudioBlobStream(selectedModel, audioToSend, (step) =>
+        setOutput(prev => [...prev, step])
+      );
       setOutput(steps);
     } catch (e) {
       setOutput(["❌ Fehler beim Senden der Anfrage."]);
@@ -47,24 +47,114 @@ export async function transcribeAudioBlob(model: string, audioBlob: Blob): Promi
     return res.data.steps;
 }
 
+// Streaming-Variante: ruft onStep für jede fertige Stufe (Rohtext, Rechtschreibung,
+// Grammatik) auf, sobald sie fertig ist, und liefert am Ende alle Schritte
+export async function transcribeAudioBlobStream(
+  model: string,
+  audioBlob: Blob,
+  onStep: (step: string) => void
+): Promise<string[]> {
+    const formData = new FormData();
+    formData.append("model_name", model);
+    formData.append("file", audioBlob, "microphone-audio.wav");
+
+    const res = await fetch(`${API_BASE_USED}/api/transcribe-stream`, { method: "POST", body: formData });
+    if (!res.ok || !res.body) {
+      throw new Error(`HTTP ${res.status}`);
+    }
+
+    // NDJSON: eine JSON-Zeile pro Event
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let steps: string[] = [];
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split("\n");
+      buffer = lines.pop() ?? "";
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const event = JSON.parse(line);
+        if (event.stage === "final") {
+          steps = event.steps;
+        } else if (event.stage === "error") {
+          throw new Error(event.message);
+        } else if (event.stage === "segment") {
+          onStep(`⏱ [${event.start.toFixed(0)}s] ${event.text}`);
+        } else if (event.step) {
+          onStep(`${event.step} (${event.seconds.toFixed(2)}s)`);
+        }
+      }
+    }
+    return steps;
+}
+
+// Binäres Audio-Protokoll (Version 2): 16-Byte-Header + rohe Audiodaten statt Base64 in JSON
+const AUDIO_PROTOCOL_VERSION = 2;
+const AUDIO_FRAME_HEADER_SIZE = 16;
+export const AUDIO_CODEC = {
+  webm: 1,
+  wav: 2,
+  pcm_s16le: 3,
+  pcm_f32le: 4,
+} as const;
+
+function encodeAudioFrame(
+  payload: ArrayBuffer,
+  codec: number,
+  sessionId: number,
+  chunkId: number,
+  sampleRate = 0
+): ArrayBuffer {
+  const frame = new Uint8Array(AUDIO_FRAME_HEADER_SIZE + payload.byteLength);
+  const view = new DataView(frame.buffer);
+  frame[0] = 0x41; // "A"
+  frame[1] = 0x53; // "S"
+  view.setUint8(2, AUDIO_PROTOCOL_VERSION);
+  view.setUint8(3, codec);
+  view.setUint32(4, sessionId >>> 0, true);
+  view.setUint32(8, chunkId >>> 0, true);
+  view.setUint32(12, sampleRate >>> 0, true);
+  frame.set(new Uint8Array(payload), AUDIO_FRAME_HEADER_SIZE);
+  return frame.buffer;
+}
+
+function codecForBlob(blob: Blob): number {
+  return blob.type.includes("wav") ? AUDIO_CODEC.wav : AUDIO_CODEC.webm;
+}
+
+function randomSessionId(): number {
+  return Math.floor(Math.random() * 0xffffffff);
+}
+
 // WebSocket-Klasse für Live-Transkription
 export class LiveTranscription {
   private ws: WebSocket | null = null;
+  private sessionId = randomSessionId();
+  private chunkCounter = 0;
+  private currentModel: string | null = null;
+  private chunkIds = new Map<number, string>();
   private onTranscription: (text: string, chunkId: string) => void;
   private onError: (error: string) => void;
   private onConnect: () => void;
   private onDisconnect: () => void;
+  // Streaming-Whisper (rollender Puffer auf dem Server) nur auf Wunsch: jedes Update dekodiert neu
+  private streaming: boolean;
 
   constructor(
     onTranscription: (text: string, chunkId: string) => void,
     onError: (error: string) => void,
     onConnect: () => void,
-    onDisconnect: () => void
+    onDisconnect: () => void,
+    streaming = false
   ) {
     this.onTranscription = onTranscription;
     this.onError = onError;
     this.onConnect = onConnect;
     this.onDisconnect = onDisconnect;
+    this.streaming = streaming;
   }
 
   connect(): Promise<void> {
@@ -85,8 +175,22 @@ export class LiveTranscription {
           const data = JSON.parse(event.data);
           
           if (data.type === "transcription") {
-            this.onTranscription(data.text, data.chunk_id);
+            // Binär-Frames tragen numerische Chunk-IDs, der Aufrufer kennt seine eigenen
+            const chunkId = this.chunkIds.get(data.chunk_id) ?? String(data.chunk_id);
+            this.chunkIds.delete(data.chunk_id);
+            this.onTranscription(data.text, chunkId);
+          } else if (data.type === "busy") {
+            // Backpressure (429): der Server hat den Chunk verworfen
+            this.chunkIds.delete(data.chunk_id);
+            this.onError(`Server ausgelastet, Audio-Abschnitt übersprungen (erneut in ${data.retry_after}s)`);
+          } else if (data.type === "warming_up") {
+            // Modell wird noch geladen: Chunk verworfen, spätere Chunks laufen normal
+            this.chunkIds.delete(data.chunk_id);
+            this.onError(`Modell ${data.model} wird noch geladen, Audio-Abschnitt übersprungen`);
           } else if (data.type === "error") {
+            if (data.chunk_id !== undefined) {
+              this.chunkIds.delete(data.chunk_id);
+            }
             this.onError(data.message);
           }
         };
@@ -115,15 +219,22 @@ export class LiveTranscription {
       const reader = new FileReader();
       reader.onload = () => {
         const arrayBuffer = reader.result as ArrayBuffer;
-        const base64Audio = base64ArrayBuffer(arrayBuffer);
-;
-        
-        this.ws!.send(JSON.stringify({
-          type: "audio_chunk",
-          audio: base64Audio,
-          model: model,
-          chunk_id: chunkId
-        }));
+
+        // Modell wird einmal pro Wechsel per "hello" gesetzt, nicht in jedem Chunk
+        if (model !== this.currentModel) {
+          this.ws!.send(JSON.stringify({
+            type: "hello",
+            protocol: AUDIO_PROTOCOL_VERSION,
+            model: model,
+            // Whisper: rollender Puffer auf dem Server, "text" enthält nur bestätigten Text
+            streaming: this.streaming && model.startsWith("Whisper")
+          }));
+          this.currentModel = model;
+        }
+
+        const frameChunkId = ++this.chunkCounter;
+        this.chunkIds.set(frameChunkId, chunkId);
+        this.ws!.send(encodeAudioFrame(arrayBuffer, codecForBlob(audioBlob), this.sessionId, frameChunkId));
         
         resolve();
       };
@@ -144,6 +255,8 @@ export class LiveTranscription {
 // WebSocket-Klasse für Vosk Live-Streaming-Transkription
 export class VoskLiveTranscription {
   private ws: WebSocket | null = null;
+  private sessionId = randomSessionId();
+  private chunkCounter = 0;
   private onTranscription: (text: string, partial: boolean, confidence: number) => void;
   private onError: (error: string) => void;
   private onConnect: () => void;
@@ -209,12 +322,8 @@ export class VoskLiveTranscription {
       const reader = new FileReader();
       reader.onload = () => {
         const arrayBuffer = reader.result as ArrayBuffer;
-        const base64Audio = base64ArrayBuffer(arrayBuffer);
         
-        this.ws!.send(JSON.stringify({
-          type: "audio_chunk",
-          audio: base64Audio
-        }));
+        this.ws!.send(encodeAudioFrame(arrayBuffer, codecForBlob(audioBlob), this.sessionId, ++this.chunkCounter));
         
         resolve();
       };
@@ -240,11 +349,3 @@ export class VoskLiveTranscription {
   }
 }
 
-function base64ArrayBuffer(arrayBuffer: ArrayBuffer): string {
-  const bytes = new Uint8Array(arrayBuffer);
-  let binary = "";
-  for (let i = 0; i < bytes.length; i++) {
-    binary += String.fromCharCode(bytes[i]);
-  }
-  return btoa(binary);
-}
@@ -1,4 +1,5 @@
 # run.py
+import argparse
 import subprocess
 import uvicorn
 import threading
@@ -12,11 +13,42 @@ def run_frontend():
 def run_backend():
     uvicorn.run("backend.main:app", host="0.0.0.0", port=7860, reload=True)
 
+def run_production(args):
+    # Modelle einmal laden, dann Worker forken (Gewichte copy-on-write geteilt)
+    from backend.prefork import serve_prefork
+    model_hosts = []
+    if args.model_hosts:
+        # Inferenz in eigenen Model-Host-Prozessen, die Worker bedienen nur HTTP/WebSocket
+        from backend.model_host import start_model_hosts, stop_model_hosts
+        model_hosts = start_model_hosts(args.model_hosts)
+    try:
+        serve_prefork("backend.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        if model_hosts:
+            stop_model_hosts(model_hosts)
+
 if __name__ == "__main__":
-    t = threading.Thread(target=run_frontend)
-    t.start()
+    parser = argparse.ArgumentParser(description="AI-Speech starten")
+    parser.add_argument("--prod", action="store_true",
+                        help="Produktionsmodus: nur Backend, vorgeladene Modelle, mehrere Worker (ohne Reload)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Anzahl Worker-Prozesse im Produktionsmodus (Standard: ASR_WORKERS bzw. CPU-Kerne / 4)")
+    parser.add_argument("--model-hosts", type=int, default=0,
+                        help="Modelle in N eigenen Model-Host-Prozessen statt in jedem Worker (nur mit --prod)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=7860)
+    args = parser.parse_args()
+
+    if args.prod:
+        if args.workers is None:
+            from backend.prefork import PREFORK_WORKERS
+            args.workers = PREFORK_WORKERS
+        run_production(args)
+    else:
+        t = threading.Thread(target=run_frontend)
+        t.start()
 
-    # Optional: Warten, damit der Frontend-Server zuerst startet
-    time.sleep(2)
-    subprocess.Popen(["caddy", "run"])
-    run_backend()
+        # Optional: Warten, damit der Frontend-Server zuerst startet
+        time.sleep(2)
+        subprocess.Popen(["caddy", "run"])
+        run_backend()
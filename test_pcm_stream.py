@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark für den rohen PCM-Stream (/api/transcribe-pcm-stream)
+
+Streamt eine WAV-Datei in Echtzeit als 16kHz-Mono-s16le-Frames (Protokoll 2)
+und misst Zeit bis zum ersten Ergebnis, Latenz nach Stream-Ende und den
+Echtzeitfaktor der Verarbeitung.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import wave
+
+import websockets
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from backend.audio_protocol import CODEC_PCM_S16LE, encode_audio_frame
+
+URI = "ws://localhost:7860/api/transcribe-pcm-stream"
+AUDIO_FILE = "/home/paul-schaefer/Dokumente/Klinikum_Fulda/Spech_to_Text_Demo/testAudio/Test_Quantenphysik.wav"
+MODEL = sys.argv[1] if len(sys.argv) > 1 else "Vosk German"
+FRAME_MS = 100  # Audio pro Frame
+REALTIME = True  # False = so schnell wie möglich senden (Durchsatz-Messung)
+
+async def receive_results(websocket, stats):
+    """Sammelt Ergebnisse bis der Server 'stopped' meldet."""
+    while True:
+        data = json.loads(await websocket.recv())
+        now = time.perf_counter()
+
+        if data.get("type") == "transcription":
+            if stats["first_result"] is None:
+                stats["first_result"] = now
+            if not data.get("partial") and data.get("text"):
+                stats["results"].append(data["text"])
+                print(f"[FINAL] {data['text']}")
+        elif data.get("type") in ("error", "busy"):
+            print(f"Server: {data}")
+        elif data.get("type") == "stopped":
+            stats["stopped"] = now
+            return
+
+async def benchmark_pcm_stream():
+    if not os.path.exists(AUDIO_FILE):
+        print(f"Audio file not found: {AUDIO_FILE}")
+        return
+
+    # Konvertiere zu 16kHz Mono s16le
+    temp_wav = "/tmp/test_pcm_16k_mono.wav"
+    result = subprocess.run([
+        'ffmpeg', '-y', '-i', AUDIO_FILE, '-ar', '16000', '-ac', '1', '-f', 'wav', temp_wav
+    ], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"FFmpeg conversion failed: {result.stderr}")
+        return
+
+    with wave.open(temp_wav, 'rb') as wav_file:
+        audio_data = wav_file.readframes(wav_file.getnframes())
+    os.remove(temp_wav)
+
+    audio_seconds = len(audio_data) / 32000
+    frame_bytes = 16000 * 2 * FRAME_MS // 1000
+    frames = [audio_data[i:i + frame_bytes] for i in range(0, len(audio_data), frame_bytes)]
+    print(f"Model: {MODEL}, audio: {audio_seconds:.1f}s in {len(frames)} frames of {FRAME_MS}ms")
+
+    stats = {"first_result": None, "stopped": None, "results": []}
+
+    async with websockets.connect(URI) as websocket:
+        await websocket.send(json.dumps({"type": "start", "model": MODEL, "format": "s16le", "framed": True}))
+        print(f"Server: {await websocket.recv()}")
+
+        receiver = asyncio.create_task(receive_results(websocket, stats))
+
+        start = time.perf_counter()
+        for i, frame in enumerate(frames):
+            await websocket.send(encode_audio_frame(frame, CODEC_PCM_S16LE, 1, i, 16000))
+            if REALTIME:
+                # Echtzeit simulieren: Frame i darf frühestens nach i * FRAME_MS gesendet werden
+                delay = start + (i + 1) * FRAME_MS / 1000 - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        sent = time.perf_counter()
+
+        await websocket.send(json.dumps({"type": "stop_stream"}))
+        await receiver
+
+    print("\n=== PCM STREAM BENCHMARK ===")
+    print(f"Audio duration:        {audio_seconds:.2f}s")
+    print(f"Send duration:         {sent - start:.2f}s")
+    if stats["first_result"]:
+        print(f"Time to first result:  {stats['first_result'] - start:.3f}s")
+    print(f"Latency after stop:    {stats['stopped'] - sent:.3f}s")
+    print(f"Real-time factor:      {(stats['stopped'] - start) / audio_seconds:.3f}")
+    print(f"Final segments:        {len(stats['results'])}")
+    print(f"Text: {' '.join(stats['results'])}")
+
+if __name__ == "__main__":
+    asyncio.run(benchmark_pcm_stream())
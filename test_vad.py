@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Prüft den VAD-Trim (backend/vad.py) mit kurzen und langen Chunks.
+
+Kurze Reste (z.B. beim Flush des PCM-Streams) müssen ohne Fehler durchlaufen:
+Chunks unter einem Frame ergeben keine Sprache, alle anderen behalten bei
+durchgehender Sprache jeden vollständigen Frame.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from backend.vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+# Von kürzer als ein Frame bis über die Hangover-Breite (17 Frames = 510ms) hinaus
+LENGTHS = [0, 100, 479, 480, 2400, 7680, 8160, 8260, 16000, 48000]
+
+
+def tone(samples: int, amplitude: float) -> np.ndarray:
+    t = np.arange(samples) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+
+
+def test_trim_short_chunks():
+    frame_size = VoiceActivityDetector().frame_size
+    for samples in LENGTHS:
+        speech = VoiceActivityDetector().trim(tone(samples, 0.3))
+        assert len(speech.audio) == samples // frame_size * frame_size, samples
+        silence = VoiceActivityDetector().trim(tone(samples, 0.0))
+        assert len(silence.audio) == 0 and not silence.has_speech, samples
+        print(f"✓ {samples} samples: {len(speech.audio)} kept")
+
+
+def test_trim_keeps_hangover():
+    vad = VoiceActivityDetector()
+    frame_size = vad.frame_size
+    # 1s Stille, 0.3s Ton, 1s Stille: der Hangover hält Frames vor und nach dem Ton
+    audio = np.concatenate((tone(SAMPLE_RATE, 0.0), tone(4800, 0.3), tone(SAMPLE_RATE, 0.0)))
+    result = vad.trim(audio)
+    assert len(result.audio) > 4800
+    assert len(result.audio) <= 4800 + 2 * 8 * frame_size + 2 * frame_size
+    print(f"✓ hangover: {len(result.audio)} of {len(audio)} samples kept")
+
+
+if __name__ == "__main__":
+    test_trim_short_chunks()
+    test_trim_keeps_hangover()
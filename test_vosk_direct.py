@@ -9,7 +9,7 @@ import os
 # Pfad hinzufügen
 sys.path.append('/home/paul-schaefer/Dokumente/Klinikum_Fulda/Spech_to_Text_Demo')
 
-from backend.vosk_transcription import get_vosk_stream_transcriber
+from backend.vosk_transcription import get_vosk_session_manager
 import wave
 import numpy as np
 import time
@@ -32,8 +32,8 @@ def test_vosk_directly():
     
     print(f"Generated test audio: {len(audio_data)} samples")
     
-    # Teste Vosk Stream Transcriber
-    transcriber = get_vosk_stream_transcriber()
+    # Teste Vosk Stream Transcriber (eigene Session auf dem geteilten Modell)
+    transcriber = get_vosk_session_manager().create_session("direct-test")
     
     def result_callback(result):
         print(f"Callback result: {result}")
@@ -64,5 +64,31 @@ def test_vosk_directly():
     transcriber.stop_streaming()
     print("Test completed.")
 
+def test_vosk_concurrent_sessions():
+    print("\n=== Vosk Concurrent Sessions Test ===")
+    
+    manager = get_vosk_session_manager()
+    sessions = [manager.create_session(f"concurrent-{i}") for i in range(2)]
+    
+    for session in sessions:
+        session.start_streaming()
+    print(f"Active sessions: {manager.active_session_count()}")
+    
+    # Zwei Sekunden Stille nur an die erste Session
+    silence = np.zeros(16000 * 2, dtype=np.int16).tobytes()
+    sessions[0].add_audio_chunk(silence)
+    time.sleep(1.0)
+    
+    # Die zweite Session darf keine Ergebnisse der ersten erhalten
+    leaked = sessions[1].get_result(timeout=0.5)
+    print(f"Second session result (expected None): {leaked}")
+    
+    # Stoppen der ersten Session darf die zweite nicht beenden
+    sessions[0].stop_streaming()
+    print(f"Second session still running: {sessions[1].is_running}")
+    sessions[1].stop_streaming()
+    print(f"Active sessions after stop: {manager.active_session_count()}")
+
 if __name__ == "__main__":
     test_vosk_directly()
+    test_vosk_concurrent_sessions()
@@ -37,7 +37,7 @@ def test_backend_endpoints():
     
     try:
         from backend.main import model_status
-        print("Model status:", model_status)
+        print("Model status:", model_status("Vosk German"))
     except Exception as e:
         print(f"Error testing endpoints: {e}")
 